@@ -0,0 +1,12 @@
+# ==============================================================================
+#  greenaudit — shared helpers for the Green Learning Audit experiment scripts
+#
+#  The scripts under code/ and hardware_extended_platforms/scripts/ put this
+#  directory's parent (code/) on sys.path and import the modules they need:
+#
+#    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+#    from greenaudit.batching import generate_batch
+#
+#  Modules import their heavy dependencies (torch, transformers, llama_cpp)
+#  themselves, so importing one helper never drags in another backend.
+# ==============================================================================
@@ -0,0 +1,246 @@
+# ==============================================================================
+#  CPU affinity — core-type discovery and thread pinning for the CPU runners
+#
+#  On the Core Ultra 5 / 9 (Meteor Lake: P-cores with Hyper-Threading,
+#  E-cores, and two low-power E-cores on the SoC tile) the OS scheduler moves
+#  llama.cpp's threads between core types from prompt to prompt, and every
+#  prompt runs at the pace of its slowest thread. Latency variance follows.
+#
+#  read_topology() reads /sys/devices/system/cpu/cpuN/ for each online CPU:
+#
+#    topology/core_id, physical_package_id, thread_siblings_list
+#    cpufreq/cpuinfo_max_freq     (kHz — LP-E < E < P on Meteor Lake)
+#    cpu_capacity                 (ARM big.LITTLE, when present)
+#
+#  plus /sys/devices/cpu_core/cpus and /sys/devices/cpu_atom/cpus, which
+#  Intel hybrid kernels expose. core_classes() groups CPUs by (core PMU,
+#  capacity, max frequency), fastest first, and names the groups "P", "E",
+#  "LPE". A homogeneous chip (the Pi 5's four A76) is a single class, "all".
+#
+#  plan_cores(spec) picks the inference set and puts everything else in the
+#  housekeeping set. spec is class names joined with "+", optionally with
+#  ":physical" for one logical CPU per core ("P:physical" = one thread per
+#  P-core), or an explicit list such as "0-5,8".
+#
+#  Linux applies affinity per thread, and a new thread starts with its
+#  creator's mask. The runners therefore pin the main thread to housekeeping
+#  before starting meters and samplers (CodeCarbon's timer, PowerSampler),
+#  then to the inference set before loading the model, so llama.cpp's
+#  worker threads start there. PowerSampler(cpus=...) also pins its own
+#  thread. Self-check on a fake Meteor Lake sysfs tree (from code/):
+#    python -m greenaudit.affinity
+# ==============================================================================
+
+import os
+from collections import namedtuple
+
+Cpu = namedtuple("Cpu", "cpu core package siblings max_khz capacity pmu")
+
+CLASS_NAMES = ["P", "E", "LPE"]
+PMU_RANK    = {"core": 1, "atom": 0, None: 0}
+
+
+def parse_cpu_list(text):
+    """'0-3,8,10-11' → [0, 1, 2, 3, 8, 10, 11]"""
+    cpus = []
+    for part in text.strip().split(","):
+        if not part:
+            continue
+        lo, _, hi = part.partition("-")
+        cpus.extend(range(int(lo), int(hi or lo) + 1))
+    return cpus
+
+
+def format_cpu_list(cpus):
+    """[0, 1, 2, 3, 8] → '0-3,8'"""
+    cpus, runs = sorted(cpus), []
+    for c in cpus:
+        if runs and c == runs[-1][1] + 1:
+            runs[-1][1] = c
+        else:
+            runs.append([c, c])
+    return ",".join(f"{a}-{b}" if a != b else f"{a}" for a, b in runs)
+
+
+def _read(path, default=None):
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return default
+
+
+def read_topology(sysfs="/sys"):
+    """One Cpu per online CPU, from the sysfs tree under `sysfs`."""
+    base   = os.path.join(sysfs, "devices", "system", "cpu")
+    online = _read(os.path.join(base, "online"))
+    pmus   = {}
+    for pmu in ("core", "atom"):
+        listed = _read(os.path.join(sysfs, "devices", f"cpu_{pmu}", "cpus"))
+        for c in parse_cpu_list(listed or ""):
+            pmus[c] = pmu
+
+    cpus = []
+    for c in parse_cpu_list(online) if online else range(os.cpu_count() or 1):
+        d = os.path.join(base, f"cpu{c}")
+        max_khz  = _read(os.path.join(d, "cpufreq", "cpuinfo_max_freq"))
+        capacity = _read(os.path.join(d, "cpu_capacity"))
+        siblings = _read(os.path.join(d, "topology", "thread_siblings_list"))
+        cpus.append(Cpu(
+            cpu=c,
+            core=int(_read(os.path.join(d, "topology", "core_id"), c)),
+            package=int(_read(os.path.join(d, "topology", "physical_package_id"), 0)),
+            siblings=tuple(parse_cpu_list(siblings)) if siblings else (c,),
+            max_khz=int(max_khz) if max_khz else None,
+            capacity=int(capacity) if capacity else None,
+            pmu=pmus.get(c),
+        ))
+    return cpus
+
+
+def core_classes(cpus):
+    """{class name: [cpu ids]}, fastest class first."""
+    def rank(cpu):
+        return (PMU_RANK[cpu.pmu], cpu.capacity or 0, cpu.max_khz or 0)
+
+    groups = {}
+    for cpu in cpus:
+        groups.setdefault(rank(cpu), []).append(cpu.cpu)
+    ordered = [groups[k] for k in sorted(groups, reverse=True)]
+    if len(ordered) == 1:
+        return {"all": ordered[0]}
+    names = CLASS_NAMES + [f"T{i}" for i in range(len(CLASS_NAMES), len(ordered))]
+    return dict(zip(names, ordered))
+
+
+def one_per_core(cpus, chosen):
+    """The lowest-numbered logical CPU of each physical core in `chosen`."""
+    by_id, keep, seen = {c.cpu: c for c in cpus}, [], set()
+    for c in sorted(chosen):
+        key = (by_id[c].package, by_id[c].siblings)
+        if key not in seen:
+            seen.add(key)
+            keep.append(c)
+    return keep
+
+
+def select_cpus(cpus, spec):
+    """CPU ids for a spec: 'P', 'P+E', 'all', 'P:physical', or a list such as '0-5,8'."""
+    spec = spec.strip()
+    if spec[0].isdigit():
+        chosen = parse_cpu_list(spec)
+        unknown = set(chosen) - {c.cpu for c in cpus}
+        if unknown:
+            raise ValueError(f"CPUs {format_cpu_list(unknown)} are not online")
+        return chosen
+
+    names, _, mode = spec.partition(":")
+    classes = core_classes(cpus)
+    chosen = []
+    for name in names.split("+"):
+        if name == "all":
+            chosen += [c.cpu for c in cpus]
+        elif name in classes:
+            chosen += classes[name]
+        else:
+            raise ValueError(f"Unknown core class {name!r} — this host has {sorted(classes)}")
+    chosen = sorted(set(chosen))
+    if mode == "physical":
+        chosen = one_per_core(cpus, chosen)
+    elif mode:
+        raise ValueError(f"Unknown core selection mode {mode!r} (only ':physical')")
+    return chosen
+
+
+def pin_thread(cpus):
+    """Restricts the calling thread (and threads it starts later) to `cpus`."""
+    os.sched_setaffinity(0, set(cpus))
+
+
+class CorePlan:
+    """Inference CPUs and the housekeeping CPUs left for meters and samplers."""
+
+    def __init__(self, inference, housekeeping, classes):
+        self.inference    = sorted(inference)
+        self.housekeeping = sorted(housekeeping)
+        self.classes      = classes
+
+    def pin_housekeeping(self):
+        """Pins the calling thread to the housekeeping CPUs (no-op if there are none)."""
+        if self.housekeeping:
+            pin_thread(self.housekeeping)
+
+    def pin_inference(self):
+        pin_thread(self.inference)
+
+    def describe(self):
+        classes = ", ".join(f"{k}={format_cpu_list(v)}" for k, v in self.classes.items())
+        return (f"inference CPUs {format_cpu_list(self.inference)}, housekeeping "
+                f"{format_cpu_list(self.housekeeping) or 'shared'} ({classes})")
+
+
+def plan_cores(spec, sysfs="/sys"):
+    """CorePlan for `spec`; housekeeping = allowed CPUs outside the inference set."""
+    cpus      = read_topology(sysfs)
+    inference = select_cpus(cpus, spec)
+    allowed   = os.sched_getaffinity(0) if sysfs == "/sys" else {c.cpu for c in cpus}
+    return CorePlan(inference, sorted(set(allowed) - set(inference)), core_classes(cpus))
+
+
+if __name__ == "__main__":
+    # Self-check: a fake Core Ultra 5 125H tree — 4 P-cores with HT (cpu0-7,
+    # 4.5 GHz), 8 E-cores (cpu8-15, 3.6 GHz), 2 LP E-cores (cpu16-17, 2.5 GHz).
+    import tempfile
+    import threading
+
+    def fake_tree(root):
+        def write(path, text):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as f:
+                f.write(text + "\n")
+        base = os.path.join(root, "devices", "system", "cpu")
+        write(os.path.join(base, "online"), "0-17")
+        write(os.path.join(root, "devices", "cpu_core", "cpus"), "0-7")
+        write(os.path.join(root, "devices", "cpu_atom", "cpus"), "8-17")
+        for c in range(18):
+            core = c // 2 if c < 8 else c - 4
+            sibs = f"{c & ~1}-{c | 1}" if c < 8 else f"{c}"
+            khz  = 4500000 if c < 8 else 3600000 if c < 16 else 2500000
+            d = os.path.join(base, f"cpu{c}")
+            write(os.path.join(d, "topology", "core_id"), str(core))
+            write(os.path.join(d, "topology", "physical_package_id"), "0")
+            write(os.path.join(d, "topology", "thread_siblings_list"), sibs)
+            write(os.path.join(d, "cpufreq", "cpuinfo_max_freq"), str(khz))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fake_tree(tmp)
+        cpus = read_topology(tmp)
+        classes = core_classes(cpus)
+        assert classes == {"P": list(range(8)), "E": list(range(8, 16)), "LPE": [16, 17]}
+        assert select_cpus(cpus, "P:physical") == [0, 2, 4, 6]
+        assert select_cpus(cpus, "P+E:physical") == [0, 2, 4, 6] + list(range(8, 16))
+        assert select_cpus(cpus, "2-5,16") == [2, 3, 4, 5, 16]
+        plan = plan_cores("P", sysfs=tmp)
+        assert plan.housekeeping == list(range(8, 18))
+        print("fake 125H:", plan.describe())
+
+    assert parse_cpu_list(format_cpu_list([0, 1, 2, 5, 7, 8])) == [0, 1, 2, 5, 7, 8]
+
+    # Real host: pinning a thread restricts it and the threads it starts
+    allowed = sorted(os.sched_getaffinity(0))
+    target  = allowed[-1:]
+    seen    = {}
+
+    def worker():
+        pin_thread(target)
+        child = threading.Thread(target=lambda: seen.update(child=os.sched_getaffinity(0)))
+        child.start()
+        child.join()
+        seen["self"] = os.sched_getaffinity(0)
+
+    t = threading.Thread(target=worker)
+    t.start()
+    t.join()
+    assert seen["self"] == seen["child"] == set(target)
+    assert sorted(os.sched_getaffinity(0)) == allowed          # main thread untouched
+    print("this host:", plan_cores("all").describe())
@@ -0,0 +1,350 @@
+# ==============================================================================
+#  LpW analysis — every results file in one typed frame, summary.json from it
+#
+#  LpW used to be computed per file: inline in cloud_scoring.py, or with the
+#  commented `df["LpW"] = df["Q_ped"] / (df["Net_Energy_J"] * df["Latency_s"])`
+#  snippet at the end of each platform script, and summary.json was filled in
+#  by hand from a notebook. load_results() reads the Phi-3 results files
+#  listed in SOURCES, numeric columns only, into one frame:
+#
+#    Key, Platform, Precision, Category   categorical
+#    use_cache                            bool
+#    ID                                   int32
+#    Output_Tokens ... Q_ped, LpW         float64 (NaN where a file lacks it)
+#
+#  Files without a Q_ped column (the kvcache_true runs) get it from the judge
+#  scoring sheets via greenaudit.judges.join_scores(), matched on
+#  (use_cache, Precision, ID). LpW is recomputed from Q_ped, Net_Energy_J and
+#  Latency_s for every row that has all three; the kvcache_false masters store
+#  it rounded to 4 decimals.
+#  group_stats() aggregates with np.bincount over factorized group codes, so
+#  the per-configuration and per-category tables are a few array passes, not
+#  a groupby per file. summarize() builds the summary.json structure (keys as
+#  before: platform → results → precision → means), plus per-category means
+#  and the ratios in RATIOS. Notes already in summary.json for configurations
+#  that were not run are kept. lpw_intervals() adds 95 % bootstrap intervals
+#  for each mean LpW and each ratio, paired on prompt ID, with a permutation
+#  p-value (greenaudit/bootstrap.py; seeded, so the file is reproducible).
+#
+#  data/cloud_comparison_results.csv and model_comparison_results.csv compare
+#  other models, the checkpoints/ files are partial copies, and
+#  kvcache_false/FP16/main.csv duplicates the FP16 master — none is loaded.
+#
+#  Regenerate (from code/):  python -m greenaudit.analysis --write
+#  Self-check (from code/):  python -m greenaudit.analysis
+# ==============================================================================
+
+import glob
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from .backends import normalize_columns
+from .bootstrap import mean_intervals, ratio_intervals
+from .judges import KEYS, join_scores, score_files
+from .prompts import DATA_DIR, normalize_category
+
+RESULTS_DIR  = os.path.normpath(os.path.join(DATA_DIR, "..", "hardware_extended_platforms",
+                                             "results"))
+SUMMARY_PATH = os.path.join(RESULTS_DIR, "summary.json")
+
+NUMERIC_COLUMNS = ["Output_Tokens", "Latency_s", "Tokens_per_sec", "Gross_Energy_J",
+                   "Net_Energy_J", "Power_W", "Q_ped", "LpW"]
+
+# (glob under the repository root, key, platform name, use_cache); key and
+# platform None = from the file name / HW_Platform column, as in results/
+SOURCES = [
+    ("hardware_extended_platforms/results/*.csv", None, None, True),
+    ("data/kvcache_true/*/*_corrected_500prompts.csv",
+     "T4_kvcache_true", "NVIDIA T4 (Google Colab)", True),
+    ("data/kvcache_false/*/master_dataset_*.csv",
+     "T4_kvcache_false", "NVIDIA T4 (Google Colab)", False),
+    ("data/windows/*_windows_100prompts.csv",
+     "Windows_IrisXe_CPU", "Intel Core i7-1165G7 (Iris Xe laptop, CPU)", True),
+]
+
+PRECISION_ORDER = ["Q4_K_M", "F16_GGUF", "F16", "FP16", "NF4"]
+
+# (numerator, denominator) precision pairs reported under "ratios"
+RATIOS = [("Q4_K_M", "F16_GGUF"), ("Q4_K_M", "F16"), ("FP16", "NF4")]
+
+# summary.json field → (column, statistic, rounding); rounding is decimals,
+# or ("sig", n) for n significant figures
+SUMMARY_FIELDS = {
+    "latency_mean":    ("Latency_s",      "mean", 2),
+    "latency_std":     ("Latency_s",      "std",  2),
+    "net_energy_mean": ("Net_Energy_J",   "mean", 1),
+    "power_mean":      ("Power_W",        "mean", 1),
+    "q_ped_mean":      ("Q_ped",          "mean", 3),
+    "lpw_mean":        ("LpW",            "mean", ("sig", 5)),
+    "tokens_per_sec":  ("Tokens_per_sec", "mean", 2),
+}
+
+BOOTSTRAP_RESAMPLES = 10_000
+BOOTSTRAP_SEED      = 0
+
+CATEGORY_FIELDS = ["latency_mean", "net_energy_mean", "q_ped_mean", "lpw_mean"]
+RATIO_FIELDS    = {"lpw": "lpw_mean", "latency": "latency_mean",
+                   "net_energy": "net_energy_mean", "q_ped": "q_ped_mean"}
+
+
+# ── Loading ───────────────────────────────────────────────────────────────────
+
+TEXT_COLUMNS = ["Prompt", "Response"]
+
+_COLUMNS = {"ID", "Precision", "Category", "CATEGORY", "HW_Platform", "Platform",
+            "use_cache", "Qped", *NUMERIC_COLUMNS}
+
+
+def _read(path, key, platform, use_cache, text=False):
+    wanted = _COLUMNS | set(TEXT_COLUMNS) | {"PROMPT"} if text else _COLUMNS
+    df = pd.read_csv(path, usecols=lambda c: c.strip().lstrip("\ufeff") in wanted,
+                     encoding="utf-8-sig")
+    df = normalize_columns(df)
+    if key is None:                                 # results/Ultra5_125H_Q4_K_M.csv
+        precision = str(df["Precision"].iloc[0])
+        key = os.path.basename(path)[:-4].removesuffix("_" + precision)
+    if platform is None:
+        platform = str(df["HW_Platform"].iloc[0])
+    df["Key"]      = key
+    df["Platform"] = platform
+    if "use_cache" not in df:
+        df["use_cache"] = use_cache
+    df["_scored"] = "Q_ped" in df                   # else Q_ped from the judge sheets
+    return df
+
+
+def source_files(root=None, sources=None):
+    """[(path, key, platform, use_cache)] for every file matched by `sources` (default SOURCES)."""
+    root = root or os.path.dirname(DATA_DIR)
+    return [(path, key, platform, use_cache)
+            for pattern, key, platform, use_cache in (sources or SOURCES)
+            for path in sorted(glob.glob(os.path.join(root, pattern)))]
+
+
+def load_results(root=None, sources=None, text=False):
+    """
+    One row per prompt run across `sources` (default SOURCES), typed and with
+    LpW computed. text=True also keeps the Prompt and Response columns.
+    """
+    frames = [_read(path, key, platform, use_cache, text)
+              for path, key, platform, use_cache in source_files(root, sources)]
+    if not frames:
+        raise FileNotFoundError(f"No results files under {root or os.path.dirname(DATA_DIR)}")
+    df = pd.concat(frames, ignore_index=True)
+
+    for col in NUMERIC_COLUMNS:
+        df[col] = pd.to_numeric(df[col], errors="coerce").astype("float64") if col in df \
+            else np.nan
+    if "Output_Tokens" in df:                       # results/ files have no Tokens_per_sec
+        missing = df["Tokens_per_sec"].isna().to_numpy()
+        tps = df["Output_Tokens"].to_numpy() / df["Latency_s"].to_numpy()
+        df.loc[missing, "Tokens_per_sec"] = tps[missing]
+
+    unscored = ~df.pop("_scored").to_numpy(bool)
+    if unscored.any() and score_files():            # kvcache_true: scored in xlsx only
+        runs = df.loc[unscored, KEYS].assign(Q_ped=np.nan)
+        df.loc[unscored, "Q_ped"] = join_scores(runs)["Q_ped"].to_numpy()
+
+    q, e, t = (df[c].to_numpy() for c in ("Q_ped", "Net_Energy_J", "Latency_s"))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        lpw = q / (e * t)
+    df["LpW"] = np.where(np.isfinite(lpw), lpw, df["LpW"].to_numpy())
+
+    df["Category"] = df["Category"].map(normalize_category)
+    for col in ("Key", "Platform", "Precision", "Category"):
+        df[col] = df[col].astype("category")
+    df["use_cache"] = df["use_cache"].astype(bool)
+    df["ID"] = df["ID"].astype("int32")
+    columns = ["Key", "Platform", "Precision", "Category", "use_cache", "ID", *NUMERIC_COLUMNS]
+    if text:
+        for col in TEXT_COLUMNS:
+            df[col] = df[col].astype("string") if col in df else pd.NA
+        columns += TEXT_COLUMNS
+    return df[columns]
+
+
+# ── Aggregation ───────────────────────────────────────────────────────────────
+
+def group_stats(codes, values, n_groups):
+    """
+    Per-group (n, mean, std with ddof=1) of each column of `values`, NaNs
+    skipped. codes: int array, one group per row. Returns three arrays of
+    shape (n_groups, n_columns).
+    """
+    values = np.asarray(values, dtype=np.float64).reshape(len(codes), -1)
+    ok     = np.isfinite(values)
+    x      = np.where(ok, values, 0.0)
+    n   = np.stack([np.bincount(codes, ok[:, j], n_groups) for j in range(x.shape[1])], 1)
+    s1  = np.stack([np.bincount(codes, x[:, j], n_groups) for j in range(x.shape[1])], 1)
+    s2  = np.stack([np.bincount(codes, x[:, j] ** 2, n_groups) for j in range(x.shape[1])], 1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = np.where(n > 0, s1 / n, np.nan)
+        var  = np.where(n > 1, (s2 - n * mean ** 2) / (n - 1), np.nan)
+    return n, mean, np.sqrt(np.maximum(var, 0.0))
+
+
+def _round(value, rule):
+    if value is None or not np.isfinite(value):
+        return None
+    if isinstance(rule, tuple):
+        return float(f"{value:.{rule[1]}g}") if value else 0.0
+    return round(float(value), rule)
+
+
+def _stats(df, by):
+    """{group tuple: {summary field: value}} plus row counts, over the `by` columns."""
+    codes, groups = pd.MultiIndex.from_frame(df[by].astype(str)).factorize()
+    cols = [c for c, _, _ in SUMMARY_FIELDS.values()]
+    counts = np.bincount(codes, minlength=len(groups))
+    _, mean, std = group_stats(codes, df[cols].to_numpy(), len(groups))
+    out = {}
+    for g, group in enumerate(groups):
+        row = {"n": int(counts[g])}
+        for j, (field, (_, stat, rule)) in enumerate(SUMMARY_FIELDS.items()):
+            row[field] = _round((mean if stat == "mean" else std)[g, j], rule)
+        out[group] = row
+    return out
+
+
+def _ratio(a, b):
+    if a is None or b is None or b == 0:
+        return None
+    return round(a / b, 3)
+
+
+def lpw_intervals(df, resamples=BOOTSTRAP_RESAMPLES, seed=BOOTSTRAP_SEED, level=0.95):
+    """
+    Bootstrap intervals for each configuration's mean LpW and for the RATIOS
+    pairs within a platform (paired on ID — greenaudit/bootstrap.py).
+    Returns ({(key, precision): (lo, hi)}, {(key, a, b): ratio_interval dict}).
+    """
+    groups = {}
+    for (key, precision), g in df.groupby(["Key", "Precision"], observed=True):
+        lpw = g["LpW"].to_numpy()
+        if np.isfinite(lpw).sum() >= 2:
+            groups[(key, precision)] = (g["ID"].to_numpy(), lpw)
+    pairs = [((k, a), (k, b)) for k in df["Key"].cat.categories for a, b in RATIOS
+             if (k, a) in groups and (k, b) in groups]
+    means  = mean_intervals(groups, resamples, level, seed)
+    ratios = ratio_intervals(groups, pairs, resamples, resamples, level, seed + 1)
+    return means, {(a[0], a[1], b[1]): r for (a, b), r in ratios.items()}
+
+
+def summarize(df, previous=None, intervals=None):
+    """
+    summary.json structure for the frame; `previous` supplies key order and
+    notes, `intervals` (lpw_intervals()) adds lpw_ci95 / p-values.
+    """
+    previous = previous or {}
+    mean_ci, ratio_ci = intervals or ({}, {})
+    configs  = _stats(df, ["Key", "Precision"])
+    by_cat   = _stats(df, ["Key", "Precision", "Category"])
+    platform = df.drop_duplicates("Key").set_index("Key")["Platform"].astype(str).to_dict()
+
+    keys = [k for k in previous if k in platform] + \
+           [k for k in platform if k not in previous]
+    summary = {}
+    for key in keys:
+        old = previous.get(key, {}).get("results", {})
+        precisions = [p for (k, p) in configs if k == key]
+        order = [p for p in old if p in precisions or "note" in old[p]] + \
+                sorted((p for p in precisions if p not in old),
+                       key=lambda p: (PRECISION_ORDER.index(p)
+                                      if p in PRECISION_ORDER else len(PRECISION_ORDER), p))
+        results = {}
+        for p in order:
+            if (key, p) not in configs:
+                results[p] = old[p]                   # e.g. the Pi's F16 note
+                continue
+            entry = dict(configs[(key, p)])
+            if (key, p) in mean_ci:
+                entry["lpw_ci95"] = [_round(v, ("sig", 5)) for v in mean_ci[(key, p)]]
+            entry["by_category"] = {
+                c: {"n": s["n"], **{f: s[f] for f in CATEGORY_FIELDS}}
+                for (k, q, c), s in by_cat.items() if k == key and q == p}
+            results[p] = entry
+        ratios = {}
+        for a, b in RATIOS:
+            if (key, a) in configs and (key, b) in configs:
+                ratios[f"{a}/{b}"] = {name: _ratio(configs[(key, a)][f], configs[(key, b)][f])
+                                      for name, f in RATIO_FIELDS.items()}
+                ci = ratio_ci.get((key, a, b))
+                if ci:
+                    ratios[f"{a}/{b}"].update({
+                        "lpw_ci95":     [round(v, 3) for v in ci["ci"]],
+                        "lpw_p_value":  round(ci["p_value"], 5),
+                        "paired":       ci["paired"],
+                        "n":            ci["n"][0],
+                        "resamples":    ci["resamples"],
+                    })
+        summary[key] = {"platform": platform[key],
+                        "use_cache": bool(df.loc[df["Key"] == key, "use_cache"].iloc[0]),
+                        "results": results}
+        if ratios:
+            summary[key]["ratios"] = ratios
+    return summary
+
+
+def write_summary(summary, path=SUMMARY_PATH):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+    os.replace(tmp, path)
+
+
+def read_summary(path=SUMMARY_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    t0 = time.perf_counter()
+    frame    = load_results()
+    previous = read_summary()
+    summarize(frame, previous)
+    elapsed  = time.perf_counter() - t0
+    t1 = time.perf_counter()
+    intervals = lpw_intervals(frame)
+    boot_s    = time.perf_counter() - t1
+    summary   = summarize(frame, previous, intervals)
+    print(f"{len(frame)} rows, {frame.Key.nunique()} platforms, "
+          f"{frame.groupby(['Key', 'Precision'], observed=True).ngroups} configurations "
+          f"in {elapsed * 1000:.0f} ms; {BOOTSTRAP_RESAMPLES:,} bootstrap resamples "
+          f"in {boot_s * 1000:.0f} ms")
+
+    for key, entry in summary.items():
+        for p, r in entry["results"].items():
+            if "n" in r:
+                print(f"  {key:<20} {p:<9} n={r['n']:>3}  lpw={r['lpw_mean']}  "
+                      f"lat={r['latency_mean']}s  E={r['net_energy_mean']}J")
+        for pair, r in entry.get("ratios", {}).items():
+            print(f"  {key:<20} {pair:<16} LpW ratio {r['lpw']}"
+                  + (f"  95% CI {r['lpw_ci95']}  p={r['lpw_p_value']}" if "lpw_ci95" in r else ""))
+
+    if "--write" in sys.argv:
+        write_summary(summary)
+        print(f"Wrote {SUMMARY_PATH}")
+    else:
+        # Self-check: the regenerated means and (seeded) intervals match
+        # what summary.json records
+        for key, entry in previous.items():
+            for p, old in entry["results"].items():
+                for field, value in old.items():
+                    if field in SUMMARY_FIELDS or field in ("n", "lpw_ci95"):
+                        assert summary[key]["results"][p][field] == value, (key, p, field)
+            for pair, old in entry.get("ratios", {}).items():
+                assert summary[key]["ratios"][pair] == old, (key, pair)
+        assert "lpw_ci95" in summary["T4_kvcache_true"]["ratios"]["FP16/NF4"]  # Q_ped via judges
+        n, mean, std = group_stats(np.array([0, 0, 1, 1, 1]),
+                                   np.array([1.0, 3.0, 2.0, np.nan, 4.0]), 2)
+        assert n.ravel().tolist() == [2, 2] and mean.ravel().tolist() == [2.0, 3.0]
+        assert np.allclose(std.ravel(), [np.sqrt(2), np.sqrt(2)])
+        assert elapsed < 1.0
@@ -0,0 +1,273 @@
+# ==============================================================================
+#  llama.cpp thread / batch auto-tuner — per host, persisted
+#
+#  N_THREADS was hand-set per machine (6 on the Core Ultra, 4 on the Pi, the
+#  library default on the laptops). On hybrid chips such as Meteor Lake,
+#  spilling decode threads onto E-cores or leaving P-cores idle costs 30 %
+#  or more of tokens/s, and the best count differs between F16 and Q4_K_M.
+#
+#  autotune() runs a short coordinate search on a calibration subset (the
+#  scripts pass one prompt per category, generated to TUNE_MAX_TOKENS):
+#
+#    1. n_threads        decode threads, with n_threads_batch = n_threads
+#    2. n_threads_batch  prefill threads, at the best n_threads
+#    3. n_batch          prompt tokens per prefill batch
+#
+#  Every trial loads the model with that setting (GGUF weights are memory-
+#  mapped, so reloads after the first come from the page cache), discards
+#  one warm-up prompt, then measures the subset. The objective is "tok_s"
+#  (total output tokens / total latency, maximised) or "j_per_token" (net
+#  energy per output token through a begin()/end() meter, minimised).
+#
+#  The winner is stored in cache_dir()/autotune.json under the host
+#  fingerprint (CPU model, core counts, memory, OS, hostname, llama.cpp
+#  version), the model file and the objective; later runs on the same host
+#  reuse it without tuning. retune=True measures again. Self-check (from
+#  code/):
+#    python -m greenaudit.autotune
+# ==============================================================================
+
+import hashlib
+import json
+import os
+import platform
+import time
+
+from .backends import measure_prompt
+from .prompts import cache_dir
+
+OBJECTIVES = {"tok_s": "max", "j_per_token": "min"}
+
+
+# ── Host ──────────────────────────────────────────────────────────────────────
+
+def _cpu_model():
+    try:
+        with open("/proc/cpuinfo", encoding="utf-8") as f:
+            for line in f:
+                if line.lower().startswith(("model name", "hardware", "cpu model")):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or platform.machine()
+
+
+def physical_cores():
+    """Distinct physical cores from sysfs topology; os.cpu_count() if unavailable."""
+    cores = set()
+    base  = "/sys/devices/system/cpu"
+    try:
+        for name in os.listdir(base):
+            if name.startswith("cpu") and name[3:].isdigit():
+                path = os.path.join(base, name, "topology", "thread_siblings_list")
+                if os.path.exists(path):
+                    with open(path) as f:
+                        cores.add(f.read().strip())
+    except OSError:
+        pass
+    return len(cores) or os.cpu_count() or 1
+
+
+def host_info():
+    try:
+        mem_gb = round(os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") / 2**30, 1)
+    except (ValueError, OSError, AttributeError):
+        mem_gb = None
+    try:
+        import llama_cpp
+        llama_version = getattr(llama_cpp, "__version__", "unknown")
+    except ImportError:
+        llama_version = None
+    return {
+        "host":           platform.node(),
+        "cpu":            _cpu_model(),
+        "logical_cpus":   os.cpu_count(),
+        "physical_cores": physical_cores(),
+        "mem_gb":         mem_gb,
+        "os":             f"{platform.system()} {platform.release()}",
+        "llama_cpp":      llama_version,
+    }
+
+
+def host_fingerprint(info=None):
+    """Short hash of host_info() — changes with the CPU, OS or llama.cpp build."""
+    info = info or host_info()
+    return hashlib.sha256(json.dumps(info, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def model_key(model_path):
+    """GGUF file name and size — identifies the model without hashing gigabytes."""
+    try:
+        size = os.path.getsize(model_path)
+    except OSError:
+        size = None
+    return f"{os.path.basename(model_path)}:{size}"
+
+
+# ── Search ────────────────────────────────────────────────────────────────────
+
+def _allowed_cpus():
+    try:
+        return len(os.sched_getaffinity(0))     # follows greenaudit/affinity.py pinning
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def thread_candidates(logical=None, physical=None):
+    """A handful of n_threads values: small counts, half / all physical cores, all logical."""
+    logical  = logical or _allowed_cpus()
+    physical = min(physical or physical_cores(), logical)
+    values = {2, 4, 6, 8, max(1, physical // 2), physical, logical}
+    return sorted(v for v in values if 1 <= v <= logical)
+
+
+def measure_setting(make_backend, setting, prompts, meter=None, idle_watts=0.0):
+    """Loads one setting, discards a warm-up prompt, scores the prompts. Returns a trial dict."""
+    t_load = time.time()
+    backend = make_backend(**setting)
+    load_s  = time.time() - t_load
+    backend.generate(prompts[0])                               # discarded warm-up
+
+    rows = [measure_prompt(backend, p, meter, idle_watts) for p in prompts]
+    tokens  = sum(r["Output_Tokens"] for r in rows)
+    latency = sum(r["Latency_s"] for r in rows)
+    trial = {**setting, "Tokens": tokens, "Latency_s": round(latency, 4),
+             "Load_s": round(load_s, 3),
+             "tok_s": round(tokens / latency, 3) if latency > 0 else 0.0}
+    if meter is not None:
+        net_j = sum(r["Net_Energy_J"] for r in rows)
+        trial["j_per_token"] = round(net_j / tokens, 5) if tokens else float("inf")
+    del backend
+    return trial
+
+
+def _best(trials, objective):
+    pick = max if OBJECTIVES[objective] == "max" else min
+    return pick(trials, key=lambda t: t[objective])
+
+
+def search(make_backend, prompts, objective="tok_s", meter=None, idle_watts=0.0,
+           threads=None, batches=(128, 256, 512)):
+    """Coordinate search over n_threads, n_threads_batch, n_batch. Returns (setting, trials)."""
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Unknown objective {objective!r} — choose from {sorted(OBJECTIVES)}")
+    if objective == "j_per_token" and meter is None:
+        raise ValueError("objective 'j_per_token' needs an energy meter")
+    if objective == "tok_s":
+        meter = None                          # no meter reads inside the timed window
+    threads = list(threads or thread_candidates())
+    trials, seen = [], {}
+
+    def run(setting):
+        key = tuple(sorted(setting.items()))
+        if key not in seen:
+            trial = measure_setting(make_backend, setting, prompts, meter, idle_watts)
+            print(f"  threads={setting['n_threads']:>2} batch_threads="
+                  f"{setting['n_threads_batch']:>2} n_batch={setting['n_batch']:>4}  "
+                  f"{trial['tok_s']:>7.2f} tok/s"
+                  + (f"  {trial['j_per_token']:.4f} J/token" if "j_per_token" in trial else ""))
+            trials.append(trial)
+            seen[key] = trial
+        return seen[key]
+
+    def current_first(values, current):
+        # Ties keep the current value: max()/min() return the first best
+        return [current] + [v for v in values if v != current]
+
+    n_batch = max(batches)
+    best = _best([run({"n_threads": t, "n_threads_batch": t, "n_batch": n_batch})
+                  for t in threads], objective)
+    best = _best([run({"n_threads": best["n_threads"], "n_threads_batch": t, "n_batch": n_batch})
+                  for t in current_first(threads, best["n_threads"])], objective)
+    best = _best([run({"n_threads": best["n_threads"], "n_threads_batch": best["n_threads_batch"],
+                       "n_batch": b}) for b in current_first(batches, n_batch)], objective)
+    setting = {k: best[k] for k in ("n_threads", "n_threads_batch", "n_batch")}
+    return setting, trials
+
+
+# ── Persistence ───────────────────────────────────────────────────────────────
+
+def tuning_path():
+    return os.path.join(cache_dir(), "autotune.json")
+
+
+def _load_all(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def autotune(make_backend, prompts, model, objective="tok_s", meter=None, idle_watts=0.0,
+             threads=None, batches=(128, 256, 512), retune=False, path=None):
+    """
+    The tuned {n_threads, n_threads_batch, n_batch} for `model` on this host.
+
+    make_backend(**setting) must return a loaded backend; `model` is the
+    cache key for the model (model_key(gguf_path)). A stored result for this
+    host, model and objective is returned as-is unless retune=True.
+    """
+    path = path or tuning_path()
+    info = host_info()
+    key  = f"{host_fingerprint(info)}|{model}|{objective}"
+    store = _load_all(path)
+    if key in store and not retune:
+        entry = store[key]
+        print(f"Auto-tune: reusing {entry['setting']} for {model} "
+              f"(tuned {entry['at']}, {entry['score']} {objective})")
+        return entry["setting"]
+
+    print(f"Auto-tune: {objective} over {len(prompts)} calibration prompts on {info['cpu']}")
+    t0 = time.time()
+    setting, trials = search(make_backend, prompts, objective, meter, idle_watts,
+                             threads, batches)
+    score = _best(trials, objective)[objective]
+    print(f"Auto-tune: picked {setting} ({score} {objective}, "
+          f"{len(trials)} trials, {time.time() - t0:.0f}s)")
+
+    store = _load_all(path)                     # re-read: another run may have written
+    store[key] = {"setting": setting, "score": score, "objective": objective,
+                  "model": model, "host": info, "trials": trials,
+                  "at": time.strftime("%Y-%m-%d %H:%M:%S")}
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(store, f, indent=2)
+    os.replace(tmp, path)
+    return setting
+
+
+if __name__ == "__main__":
+    # Self-check: a mock whose decode rate peaks at 6 threads (P-cores) and
+    # drops once E-cores join, with a mild n_batch effect. The tuner should
+    # find 6 / 256 and the second call should reuse the stored result.
+    import tempfile
+
+    from .backends import MockBackend
+
+    class HybridMock(MockBackend):
+        def __init__(self, n_threads, n_threads_batch, n_batch):
+            super().__init__(max_new_tokens=32, time_scale=0.05)
+            p_cores = min(n_threads, 6)
+            e_cores = max(n_threads - 6, 0)
+            self.rate = 10.0 * p_cores - 6.0 * e_cores + (2.0 if n_batch == 256 else 0.0)
+            self.rate = max(self.rate, 1.0)
+
+    calls = []
+
+    def make(**setting):
+        calls.append(setting)
+        return HybridMock(**setting)
+
+    prompts = ["What is a derivative?", "Explain osmosis.", "Define a closure."]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "autotune.json")
+        best = autotune(make, prompts, "mock.gguf:0", threads=[2, 4, 6, 8, 12],
+                        batches=(128, 256, 512), path=path)
+        assert best == {"n_threads": 6, "n_threads_batch": 6, "n_batch": 256}, best
+        n_trials = len(calls)
+        assert n_trials == 5 + 4 + 2          # threads, batch threads (one cached), n_batch
+
+        again = autotune(make, prompts, "mock.gguf:0", path=path)
+        assert again == best and len(calls) == n_trials
+        print(f"host {host_fingerprint()}: {host_info()['physical_cores']} physical cores, "
+              f"candidates {thread_candidates()}")
@@ -0,0 +1,401 @@
+# ==============================================================================
+#  Inference backends — one interface over transformers, llama.cpp and a mock
+#
+#  The transformers scripts and the llama.cpp scripts each carried their own
+#  generate-and-measure loop and their own row schema. A backend hides the
+#  library behind four calls:
+#
+#    load()                      → builds the model (once; returns self)
+#    generate(prompt)            → Response, Input_Tokens, Output_Tokens,
+#                                  Latency_s and T_Start for one prompt
+#    stream(prompt)              → the same plus TTFT_s / ITL_* columns
+#                                  (greenaudit/streaming.py)
+#    token_counts(prompt, text)  → (input tokens, output tokens) as the
+#                                  backend's own tokenizer counts them
+#
+#  generate_batch(prompts) → (rows, wall_s, weights) covers batched calls:
+#  one row per prompt, the call's wall time, and each row's share of the
+#  call's energy (summing to 1). Only transformers batches for real.
+#
+#  measure_prompt() is the measurement loop body every script shared — meter
+#  begin, generate, meter end, idle subtraction, derived columns — so it is
+#  written once. Scripts add their own ID / platform columns around it.
+#
+#  Column names follow RESULT_COLUMNS. normalize_columns() maps the names used
+#  by older results files (Qped, Prompt_Tokens, ...) onto them, so tables
+#  from different scripts can be concatenated. Self-check (from code/):
+#    python -m greenaudit.backends
+# ==============================================================================
+
+import hashlib
+import time
+
+from .streaming import TOKEN_TIMING_COLUMNS, token_latency_stats
+
+DEFAULT_MODEL_ID = "microsoft/Phi-3-mini-4k-instruct"
+
+RESULT_COLUMNS = [
+    "ID", "Precision", "Category", "Prompt", "Response",
+    "Input_Tokens", "Output_Tokens", "Latency_s", "Tokens_per_sec",
+    *TOKEN_TIMING_COLUMNS,
+    "Gross_Energy_J", "Net_Energy_J", "Power_W",
+    "Q_ped", "LpW",
+]
+
+# Spellings found in the published results files
+COLUMN_ALIASES = {
+    "Qped":              "Q_ped",             # data/kvcache_false/, supplements/
+    "Prompt_Tokens":     "Input_Tokens",      # data/cloud_comparison_results.csv
+    "Completion_Tokens": "Output_Tokens",
+    "CATEGORY":          "Category",          # data/windows/laptop_100_prompts.csv
+    "PROMPT":            "Prompt",
+}
+
+
+def normalize_columns(df):
+    """Renames legacy column names (COLUMN_ALIASES) to the RESULT_COLUMNS spelling."""
+    return df.rename(columns={k: v for k, v in COLUMN_ALIASES.items()
+                              if k in df.columns and v not in df.columns})
+
+
+class Backend:
+    """Base class; subclasses implement load(), generate() and token_counts()."""
+
+    name = "base"
+
+    def load(self):
+        return self
+
+    def generate(self, prompt):
+        raise NotImplementedError
+
+    def stream(self, prompt):
+        """Backends without token streaming report Latency_s only."""
+        return {**self.generate(prompt), **dict.fromkeys(TOKEN_TIMING_COLUMNS)}
+
+    def token_counts(self, prompt, response):
+        raise NotImplementedError
+
+    def generate_batch(self, prompts):
+        if len(prompts) != 1:
+            raise ValueError(f"{self.name} decodes one prompt at a time")
+        row = self.generate(prompts[0])
+        return [row], row["Latency_s"], [1.0]
+
+
+# ── transformers ──────────────────────────────────────────────────────────────
+
+class TransformersBackend(Backend):
+    """
+    Greedy decoding with model.generate(). Pass model= and tokenizer= to wrap
+    an already loaded pair; otherwise load() builds model_id in `precision`
+    ("FP16" or "NF4") with the T4 scripts' settings.
+    """
+
+    name = "transformers"
+
+    def __init__(self, model_id=DEFAULT_MODEL_ID, precision="FP16", max_new_tokens=200,
+                 use_cache=True, n_threads=None, model=None, tokenizer=None):
+        self.model_id       = model_id
+        self.precision      = precision
+        self.max_new_tokens = max_new_tokens
+        self.use_cache      = use_cache
+        self.n_threads      = n_threads
+        self.model          = model
+        self.tokenizer      = tokenizer
+
+    def load(self):
+        import torch
+        if self.n_threads:
+            torch.set_num_threads(self.n_threads)
+        if self.model is not None:
+            return self
+
+        from transformers import AutoConfig, AutoModelForCausalLM, AutoTokenizer, BitsAndBytesConfig
+        self.tokenizer = AutoTokenizer.from_pretrained(self.model_id, trust_remote_code=True)
+        if self.tokenizer.pad_token is None:
+            self.tokenizer.pad_token = self.tokenizer.eos_token
+        config = AutoConfig.from_pretrained(self.model_id, trust_remote_code=True)
+        config.rope_scaling = None
+        kwargs = dict(config=config, trust_remote_code=True,
+                      device_map="auto" if torch.cuda.is_available() else "cpu")
+        if self.precision == "NF4":
+            kwargs["quantization_config"] = BitsAndBytesConfig(
+                load_in_4bit=True, bnb_4bit_quant_type="nf4",
+                bnb_4bit_compute_dtype=torch.float16, bnb_4bit_use_double_quant=True)
+        else:
+            kwargs["torch_dtype"] = torch.float16
+        self.model = AutoModelForCausalLM.from_pretrained(self.model_id, **kwargs).eval()
+        return self
+
+    def _generate(self, prompt, clock=None):
+        import torch
+        from transformers import LogitsProcessorList
+
+        inputs = self.tokenizer(prompt, return_tensors="pt").to(self.model.device)
+        on_gpu = self.model.device.type == "cuda"
+        if on_gpu:
+            torch.cuda.synchronize()
+        t0 = time.time()
+        with torch.no_grad():
+            output_ids = self.model.generate(
+                **inputs,
+                max_new_tokens=self.max_new_tokens,
+                use_cache=self.use_cache,
+                do_sample=False,
+                temperature=None,
+                top_p=None,
+                pad_token_id=self.tokenizer.eos_token_id,
+                logits_processor=LogitsProcessorList([clock]) if clock else None,
+            )
+        if on_gpu:
+            torch.cuda.synchronize()
+        latency = time.time() - t0
+
+        input_len = inputs["input_ids"].shape[1]
+        return {
+            "Response":      self.tokenizer.decode(output_ids[0][input_len:],
+                                                   skip_special_tokens=True),
+            "Input_Tokens":  int(input_len),
+            "Output_Tokens": int(output_ids.shape[1] - input_len),
+            "Latency_s":     latency,
+            "T_Start":       t0,
+        }
+
+    def generate(self, prompt):
+        return self._generate(prompt)
+
+    def stream(self, prompt):
+        from .streaming import TokenClock
+        clock = TokenClock()
+        row = self._generate(prompt, clock)
+        return {**row, **token_latency_stats(row["T_Start"], clock.stamps)}
+
+    def token_counts(self, prompt, response):
+        return (len(self.tokenizer(prompt)["input_ids"]),
+                len(self.tokenizer(response, add_special_tokens=False)["input_ids"]))
+
+    def generate_batch(self, prompts):
+        from .batching import generate_batch, attribute_energy
+        rows, step_times, wall = generate_batch(self.model, self.tokenizer, prompts,
+                                                self.max_new_tokens, use_cache=self.use_cache)
+        return rows, wall, attribute_energy(1.0, rows, step_times, "finish")
+
+
+# ── llama.cpp ─────────────────────────────────────────────────────────────────
+
+class LlamaCppBackend(Backend):
+    """A GGUF model through llama-cpp-python, greedy, CPU unless n_gpu_layers > 0."""
+
+    name = "llama.cpp"
+
+    def __init__(self, model_path, max_new_tokens=200, n_threads=None, n_ctx=2048,
+                 n_gpu_layers=0, n_threads_batch=None, n_batch=512, prompt_format=None,
+                 llm=None):
+        self.model_path      = model_path
+        self.max_new_tokens  = max_new_tokens
+        self.n_threads       = n_threads
+        self.n_threads_batch = n_threads_batch     # prompt prefill threads (None = n_threads)
+        self.n_batch         = n_batch             # prompt tokens per prefill batch
+        self.n_ctx           = n_ctx
+        self.n_gpu_layers    = n_gpu_layers
+        self.prompt_format   = prompt_format or (lambda text: text)
+        self.llm             = llm
+
+    def load(self):
+        if self.llm is None:
+            from llama_cpp import Llama
+            self.llm = Llama(model_path=self.model_path, n_threads=self.n_threads,
+                             n_threads_batch=self.n_threads_batch, n_batch=self.n_batch,
+                             n_ctx=self.n_ctx, n_gpu_layers=self.n_gpu_layers, verbose=False)
+        return self
+
+    def generate(self, prompt):
+        t0 = time.time()
+        out = self.llm(self.prompt_format(prompt), max_tokens=self.max_new_tokens,
+                       temperature=0.0, echo=False)
+        latency = time.time() - t0
+        return {
+            "Response":      out["choices"][0]["text"],
+            "Input_Tokens":  out["usage"]["prompt_tokens"],
+            "Output_Tokens": out["usage"]["completion_tokens"],
+            "Latency_s":     latency,
+            "T_Start":       t0,
+        }
+
+    def stream(self, prompt):
+        from .streaming import stream_llama
+        gen = stream_llama(self.llm, self.prompt_format(prompt),
+                           max_tokens=self.max_new_tokens, temperature=0.0)
+        return {
+            "Response":      gen["text"],
+            "Input_Tokens":  gen["prompt_tokens"],
+            "Output_Tokens": gen["completion_tokens"],
+            "Latency_s":     gen["latency_s"],
+            "T_Start":       gen["started_at"],
+            **{k: gen[k] for k in TOKEN_TIMING_COLUMNS},
+        }
+
+    def token_counts(self, prompt, response):
+        tokenize = self.llm.tokenize
+        return (len(tokenize(self.prompt_format(prompt).encode("utf-8"))),
+                len(tokenize(response.encode("utf-8"), add_bos=False)))
+
+
+# ── Mock ──────────────────────────────────────────────────────────────────────
+
+class MockBackend(Backend):
+    """
+    No model: output length from a hash of the prompt, throughput modelled from
+    precision / threads / KV cache, time slept at `time_scale` of the modelled
+    duration. watts(t) gives busy or idle power for a SyntheticPower meter.
+    """
+
+    name = "mock"
+
+    def __init__(self, precision="FP16", max_new_tokens=200, n_threads=None, use_cache=True,
+                 time_scale=0.002, busy_w=25.0, idle_w=5.0):
+        rate = 20.0 * (2.0 if precision in ("NF4", "Q4_K_M") else 1.0)
+        rate *= (n_threads or 4) / 4
+        rate /= 1.0 if use_cache else 3.0
+        self.rate           = rate
+        self.max_new_tokens = max_new_tokens
+        self.time_scale     = time_scale
+        self.busy_w         = busy_w
+        self.idle_w         = idle_w
+        self.busy           = False
+
+    def watts(self, t):
+        return self.busy_w if self.busy else self.idle_w
+
+    def _n_out(self, prompt):
+        h = int(hashlib.md5(prompt.encode("utf-8")).hexdigest(), 16)
+        return min(self.max_new_tokens, 40 + h % 200)
+
+    def token_counts(self, prompt, response):
+        return len(prompt.split()), len(response.split())
+
+    def generate_batch(self, prompts):
+        n_out = [self._n_out(p) for p in prompts]
+        speed = self.rate * len(prompts) ** 0.7 / len(prompts)    # batched per-row rate
+        self.busy = True
+        t0 = time.time()
+        time.sleep(max(n_out) / speed * self.time_scale)
+        wall = time.time() - t0
+        self.busy = False
+        rows = [{"Response": " ".join(["tok"] * n), "Input_Tokens": len(p.split()),
+                 "Output_Tokens": n, "Latency_s": wall * n / max(n_out), "T_Start": t0}
+                for p, n in zip(prompts, n_out)]
+        return rows, wall, [n / sum(n_out) for n in n_out]
+
+    def generate(self, prompt):
+        return self.generate_batch([prompt])[0][0]
+
+    def stream(self, prompt):
+        n    = self._n_out(prompt)
+        step = self.time_scale / self.rate
+        self.busy = True
+        t0 = time.time()
+        time.sleep(2 * step)                                       # prefill
+        stamps = []
+        for _ in range(n):
+            time.sleep(step)
+            stamps.append(time.time())
+        self.busy = False
+        return {"Response": " ".join(["tok"] * n), "Input_Tokens": len(prompt.split()),
+                "Output_Tokens": n, "Latency_s": stamps[-1] - t0, "T_Start": t0,
+                **token_latency_stats(t0, stamps)}
+
+
+BACKENDS = {
+    "transformers": TransformersBackend,
+    "llama.cpp":    LlamaCppBackend,
+    "mock":         MockBackend,
+}
+
+
+def load_backend(name, **kwargs):
+    """BACKENDS[name](**kwargs), loaded."""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown backend {name!r} — choose from {sorted(BACKENDS)}")
+    return BACKENDS[name](**kwargs).load()
+
+
+# ── Measurement ───────────────────────────────────────────────────────────────
+
+def measure_prompt(backend, prompt, meter=None, idle=None, stream=False, decimals=2):
+    """
+    One prompt through `backend`, read through a begin()/end(t0, t1) meter.
+
+    idle is an IdleBaseline (its idle_j() and columns() are used) or a flat
+    idle power in watts. Returns the measurement columns of RESULT_COLUMNS
+    plus T_Start, the idle columns and the meter's own columns; Tokens_per_sec
+    and Power_W are rounded to `decimals`.
+    """
+    if meter is not None:
+        meter.begin()
+    gen = backend.stream(prompt) if stream else backend.generate(prompt)
+    t0, latency = gen["T_Start"], gen["Latency_s"]
+    n_out = gen["Output_Tokens"]
+
+    row = {
+        "Response":       gen["Response"],
+        "Input_Tokens":   int(gen["Input_Tokens"]),
+        "Output_Tokens":  int(n_out),
+        "Latency_s":      round(latency, 4),
+        "Tokens_per_sec": round(n_out / latency, decimals) if latency > 0 else 0,
+    }
+    if stream:
+        row.update({k: gen[k] for k in TOKEN_TIMING_COLUMNS})
+    if meter is None:
+        return row
+
+    gross_j = meter.end(t0, t0 + latency)
+    if hasattr(idle, "idle_j"):
+        idle_j, idle_cols = idle.idle_j(t0, t0 + latency), idle.columns(t0, t0 + latency)
+    else:
+        idle_j, idle_cols = (idle or 0.0) * latency, {"T_Start": round(t0, 3)}
+    net_j = max(gross_j - idle_j, 0.01)
+    row.update({
+        "Gross_Energy_J": round(gross_j, 4),
+        "Net_Energy_J":   round(net_j, 4),
+        "Power_W":        round(net_j / latency, decimals) if latency > 0 else 0,
+        **idle_cols,
+        **(meter.columns() if hasattr(meter, "columns") else {}),
+    })
+    return row
+
+
+if __name__ == "__main__":
+    # Self-check: the mock and a tiny random Phi-3 through the same loop, with
+    # a synthetic 25 W busy / 5 W idle meter; old Qped tables normalised.
+    import pandas as pd
+
+    from .power import PowerSampler, SamplerMeter, SyntheticPower
+    from .tiny import tiny_phi3
+
+    mock    = load_backend("mock", max_new_tokens=64)
+    sampler = PowerSampler(SyntheticPower(mock.watts), hz=500).start()
+    meter   = SamplerMeter(sampler)
+    rows = [measure_prompt(mock, p, meter, idle=5.0, stream=s)
+            for p in ["What is a prime number?", "Explain photosynthesis."]
+            for s in (False, True)]
+    sampler.stop()
+    df = pd.DataFrame(rows)
+    print(df[["Input_Tokens", "Output_Tokens", "Latency_s", "TTFT_s", "Power_W"]].to_string())
+    assert df.Power_W.between(15, 25).all(), df.Power_W.tolist()
+    assert df.TTFT_s.notna().sum() == 2
+    assert mock.token_counts("a b c", df.Response[0]) == (3, df.Output_Tokens[0])
+
+    model, tokenizer = tiny_phi3()
+    hf = load_backend("transformers", model=model, tokenizer=tokenizer, max_new_tokens=16)
+    plain, streamed = hf.generate("Define entropy."), hf.stream("Define entropy.")
+    assert plain["Response"] == streamed["Response"]
+    assert plain["Output_Tokens"] == streamed["Output_Tokens"] <= 16
+    assert hf.token_counts("Define entropy.", "")[0] == plain["Input_Tokens"]
+    batch, wall, weights = hf.generate_batch(["Define entropy.", "Name a prime."])
+    assert batch[0]["Response"] == plain["Response"] and abs(sum(weights) - 1) < 1e-9
+    print(f"transformers: {plain['Output_Tokens']} tokens, TTFT {streamed['TTFT_s']}s")
+
+    legacy = normalize_columns(pd.DataFrame({"ID": [1], "Qped": [4]}))
+    assert list(legacy.columns) == ["ID", "Q_ped"]
@@ -0,0 +1,166 @@
+# ==============================================================================
+#  Batched generation — one left-padded model.generate() call per prompt group
+#
+#  A batch shares a single wall-clock window and a single energy reading, so
+#  per-prompt Latency_s and Net_Energy_J have to be attributed afterwards:
+#
+#    Latency_s    = time from batch start until the step that produced the
+#                   prompt's last token (its "finish step")
+#    Net_Energy_J = batch net energy split across prompts, either
+#                     "finish" — each step's energy shared equally by the
+#                                prompts still decoding at that step
+#                     "tokens" — proportional to each prompt's Output_Tokens
+#
+#  CPU self-check with a tiny random Phi-3 (no GPU, no download):
+#    cd code && python -m greenaudit.batching
+# ==============================================================================
+
+import time
+
+import torch
+from transformers import LogitsProcessorList
+
+from .streaming import TokenClock
+
+
+def _eos_ids(model, tokenizer):
+    eos = model.generation_config.eos_token_id
+    if eos is None:
+        eos = tokenizer.eos_token_id
+    return set(eos) if isinstance(eos, (list, tuple)) else {eos}
+
+
+def generate_batch(model, tokenizer, prompts, max_new_tokens, use_cache=True):
+    """
+    Greedy-decode a group of prompts in one generate() call.
+
+    Returns (rows, step_times, wall_s). Each row holds Response, Input_Tokens,
+    Output_Tokens, Latency_s and Finish_Step for one prompt; step_times are
+    seconds since batch start at which each decode step completed.
+    """
+    old_side = tokenizer.padding_side
+    tokenizer.padding_side = "left"     # decoder-only models must pad on the left
+    try:
+        enc = tokenizer(prompts, return_tensors="pt", padding=True).to(model.device)
+    finally:
+        tokenizer.padding_side = old_side
+
+    clock  = TokenClock()
+    on_gpu = model.device.type == "cuda"
+
+    if on_gpu:
+        torch.cuda.synchronize()
+    t0 = time.time()
+
+    with torch.no_grad():
+        outputs = model.generate(
+            input_ids=enc["input_ids"],
+            attention_mask=enc["attention_mask"],
+            max_new_tokens=max_new_tokens,
+            use_cache=use_cache,
+            do_sample=False,
+            temperature=None,
+            top_p=None,
+            pad_token_id=tokenizer.pad_token_id,
+            logits_processor=LogitsProcessorList([clock]),
+        )
+
+    if on_gpu:
+        torch.cuda.synchronize()
+    wall_s = time.time() - t0
+
+    step_times = [t - t0 for t in clock.stamps]
+    eos_ids    = _eos_ids(model, tokenizer)
+    prompt_len = enc["input_ids"].shape[1]
+    input_lens = enc["attention_mask"].sum(dim=1).tolist()
+
+    rows = []
+    for i, seq in enumerate(outputs[:, prompt_len:].tolist()):
+        # Rows that hit EOS early are padded out to the longest row — keep the
+        # EOS itself (the sequential loop counts it too) and drop the padding.
+        n_out = next((j + 1 for j, tok in enumerate(seq) if tok in eos_ids), len(seq))
+        rows.append({
+            "Response":      tokenizer.decode(seq[:n_out], skip_special_tokens=True),
+            "Input_Tokens":  int(input_lens[i]),
+            "Output_Tokens": n_out,
+            "Latency_s":     step_times[n_out - 1] if n_out <= len(step_times) else wall_s,
+            "Finish_Step":   n_out,
+        })
+
+    return rows, step_times, wall_s
+
+
+def attribute_energy(net_j, rows, step_times, mode="finish"):
+    """
+    Split a batch's net energy (J) across its rows. Returns one value per row.
+
+    "finish" assumes constant power over the batch: the prefill interval is
+    shared by every row, and each later decode step is shared by the rows
+    whose Finish_Step has not been reached yet.
+    """
+    if mode == "tokens":
+        total = sum(r["Output_Tokens"] for r in rows)
+        if total == 0:
+            return [net_j / len(rows)] * len(rows)
+        return [net_j * r["Output_Tokens"] / total for r in rows]
+
+    if mode != "finish":
+        raise ValueError(f"Unknown attribution mode: {mode!r} (use 'finish' or 'tokens')")
+
+    span = step_times[-1] if step_times else 0.0
+    if span <= 0:
+        return [net_j / len(rows)] * len(rows)
+
+    shares = [0.0] * len(rows)
+    prev   = 0.0
+    for step, t in enumerate(step_times, start=1):
+        active = [i for i, r in enumerate(rows) if r["Finish_Step"] >= step]
+        for i in active:
+            shares[i] += (t - prev) / len(active)
+        prev = t
+
+    return [net_j * s / span for s in shares]
+
+
+if __name__ == "__main__":
+    # CPU self-check: a left-padded batch must reproduce sequential greedy
+    # generate() token-for-token, and both attribution modes must hand out
+    # exactly the batch's energy.
+    from .tiny import tiny_phi3
+
+    model, tokenizer = tiny_phi3(seed=0)
+    prompts = [
+        "What is a limit in calculus?",
+        "Explain photosynthesis.",
+        "What is recursion in programming? Give an example.",
+        "Who built the Silk Road?",
+    ]
+    # A frequent byte acts as a second EOS so rows finish at different steps
+    model.generation_config.eos_token_id = sorted(
+        {tokenizer.eos_token_id, tokenizer.convert_tokens_to_ids("e")})
+
+    rows, step_times, wall_s = generate_batch(model, tokenizer, prompts, max_new_tokens=24)
+    for prompt, row in zip(prompts, rows):
+        enc = tokenizer(prompt, return_tensors="pt")
+        ref = model.generate(**enc, max_new_tokens=24, do_sample=False,
+                             pad_token_id=tokenizer.pad_token_id)[0, enc["input_ids"].shape[1]:]
+        ref = ref.tolist()
+        assert row["Input_Tokens"] == enc["input_ids"].shape[1]
+        assert row["Output_Tokens"] == len(ref), (row, ref)
+        assert row["Response"] == tokenizer.decode(ref, skip_special_tokens=True)
+        print(f"{row['Output_Tokens']:>3} tok  finish step {row['Finish_Step']:>2}  "
+              f"{row['Latency_s']:.4f}s  ok")
+    assert len({r["Finish_Step"] for r in rows}) > 1, "rows should finish at different steps"
+    assert len(step_times) == max(r["Finish_Step"] for r in rows)
+
+    # "finish": each step split over the rows still decoding at that step
+    fake = [{"Finish_Step": 1, "Output_Tokens": 1},
+            {"Finish_Step": 3, "Output_Tokens": 3}]
+    shares = attribute_energy(40.0, fake, [1.0, 2.0, 4.0], "finish")
+    assert shares == [5.0, 35.0], shares            # step 1: 2 rows × 5 J; steps 2–3: row 2 only
+    assert attribute_energy(40.0, fake, [1.0, 2.0, 4.0], "tokens") == [10.0, 30.0]
+    for mode in ("finish", "tokens"):
+        shares = attribute_energy(100.0, rows, step_times, mode)
+        assert abs(sum(shares) - 100.0) < 1e-9, (mode, shares)
+    print(f"Energy shares (100 J batch, finish): "
+          f"{[round(j, 1) for j in attribute_energy(100.0, rows, step_times)]}")
@@ -0,0 +1,184 @@
+# ==============================================================================
+#  Bootstrap / permutation engine — confidence intervals for LpW and ratios
+#
+#  The headline claims are ratios of mean LpW (FP16 / NF4 on the T4, Q4_K_M /
+#  F16 on the CPUs) with no interval attached. This module draws every
+#  resample at once as an index matrix, so B resamples of an n-row
+#  configuration are one fancy-indexing gather and one mean over axis 1:
+#
+#    idx = index_matrix(n, B)                # (B, n) row indices, one resample per row
+#    boot = x[idx].mean(axis=1)              # B bootstrap means
+#
+#  Two configurations run on the same prompts are resampled in pairs: rows
+#  are aligned on ID and the SAME index matrix is applied to both, so a
+#  prompt that is hard for FP16 stays in the resample together with its NF4
+#  twin. Configurations without shared IDs are resampled independently.
+#  The permutation test swaps each pair's labels (paired, a boolean matrix
+#  times the pair differences) or shuffles the pooled rows (unpaired) and
+#  compares |log ratio| with the observed one.
+#
+#  ratio_intervals() runs one task per configuration pair on a thread pool,
+#  mean_intervals() one per configuration. NumPy's gathers and reductions
+#  release the GIL, so the tasks run in parallel. Each task has its own
+#  generator from one SeedSequence, so the results do not depend on thread
+#  scheduling. Intervals are percentile intervals. Self-check (from code/):
+#    python -m greenaudit.bootstrap
+# ==============================================================================
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+
+def index_matrix(n, resamples=10_000, rng=None):
+    """(resamples, n) row indices drawn with replacement — one bootstrap resample per row."""
+    rng = rng if rng is not None else np.random.default_rng()
+    return rng.integers(0, n, size=(resamples, n), dtype=np.int32)
+
+
+def bootstrap_means(x, resamples=10_000, rng=None, idx=None):
+    """B bootstrap means of x (1-D); pass idx to reuse one index matrix across arrays."""
+    x = np.ascontiguousarray(x, dtype=np.float64)
+    if idx is None:
+        idx = index_matrix(len(x), resamples, rng)
+    return x[idx].mean(axis=1)
+
+
+def percentile_interval(samples, level=0.95):
+    tail = (1.0 - level) / 2.0 * 100.0
+    lo, hi = np.percentile(samples, [tail, 100.0 - tail])
+    return float(lo), float(hi)
+
+
+def _pair(a_ids, a, b_ids, b):
+    """a and b aligned on shared IDs (finite in both), or None if fewer than 2 pairs."""
+    _, ia, ib = np.intersect1d(a_ids, b_ids, assume_unique=True, return_indices=True)
+    ok = np.isfinite(a[ia]) & np.isfinite(b[ib])
+    if ok.sum() < 2:
+        return None
+    return a[ia][ok], b[ib][ok]
+
+
+def ratio_interval(a, b, a_ids=None, b_ids=None, resamples=10_000, permutations=10_000,
+                   level=0.95, rng=None):
+    """
+    Bootstrap interval for mean(a) / mean(b) and a permutation p-value for
+    "no difference". Paired on ID when both ID arrays are given and share
+    rows; otherwise independent. Returns a dict.
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    a, b = np.asarray(a, dtype=np.float64), np.asarray(b, dtype=np.float64)
+    pairs = _pair(np.asarray(a_ids), a, np.asarray(b_ids), b) \
+        if a_ids is not None and b_ids is not None else None
+
+    if pairs is not None:
+        a, b = pairs
+        n = len(a)
+        observed = a.mean() / b.mean()
+        idx = index_matrix(n, resamples, rng)                        # shared by a and b
+        ratios = bootstrap_means(a, idx=idx) / bootstrap_means(b, idx=idx)
+        # Swapping pair i's labels moves (b_i - a_i) from the denominator sum
+        # to the numerator sum: one (P, n) @ (n,) product per statistic
+        swap = rng.integers(0, 2, size=(permutations, n), dtype=np.bool_)
+        moved = swap @ (b - a)
+        num, den = a.sum() + moved, b.sum() - moved
+        sizes = (n, n)
+    else:
+        a, b = a[np.isfinite(a)], b[np.isfinite(b)]
+        if len(a) < 2 or len(b) < 2:
+            return None
+        observed = a.mean() / b.mean()
+        ratios = bootstrap_means(a, resamples, rng) / bootstrap_means(b, resamples, rng)
+        shuffled = rng.permuted(np.broadcast_to(np.concatenate([a, b]),
+                                                (permutations, len(a) + len(b))), axis=1)
+        num = shuffled[:, :len(a)].mean(axis=1)
+        den = shuffled[:, len(a):].mean(axis=1)
+        sizes = (len(a), len(b))
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        extreme = np.abs(np.log(num / den)) >= abs(np.log(observed)) - 1e-12
+    lo, hi = percentile_interval(ratios, level)
+    return {
+        "ratio":        float(observed),
+        "ci":           (lo, hi),
+        "level":        level,
+        "p_value":      float((extreme.sum() + 1) / (permutations + 1)),
+        "paired":       pairs is not None,
+        "n":            sizes,
+        "resamples":    resamples,
+        "permutations": permutations,
+    }
+
+
+def mean_interval(x, resamples=10_000, level=0.95, rng=None):
+    x = np.asarray(x, dtype=np.float64)
+    x = x[np.isfinite(x)]
+    if len(x) < 2:
+        return None
+    return percentile_interval(bootstrap_means(x, resamples, rng), level)
+
+
+def _parallel(fn, items, seed, workers):
+    """fn(item, rng) for each item on a thread pool; rngs are spawned from `seed` in item order."""
+    rngs = [np.random.default_rng(s) for s in np.random.SeedSequence(seed).spawn(len(items))]
+    workers = workers or min(len(items), os.cpu_count() or 1) or 1
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return dict(zip(items, pool.map(fn, items, rngs)))
+
+
+def ratio_intervals(groups, pairs, resamples=10_000, permutations=10_000, level=0.95,
+                    seed=0, workers=None):
+    """
+    groups: {name: (ids, values)}; pairs: [(numerator, denominator)] of names.
+    Returns {(numerator, denominator): ratio_interval(...) or None}, one
+    thread-pool task per pair with its own child generator of `seed`.
+    """
+    pairs = [p for p in pairs if p[0] in groups and p[1] in groups]
+
+    def task(pair, rng):
+        (ia, a), (ib, b) = groups[pair[0]], groups[pair[1]]
+        return ratio_interval(a, b, ia, ib, resamples, permutations, level, rng)
+
+    return _parallel(task, pairs, seed, workers)
+
+
+def mean_intervals(groups, resamples=10_000, level=0.95, seed=0, workers=None):
+    """{name: mean_interval(values) or None} for groups {name: (ids, values)}, threaded."""
+    return _parallel(lambda name, rng: mean_interval(groups[name][1], resamples, level, rng),
+                     list(groups), seed, workers)
+
+
+if __name__ == "__main__":
+    import time
+
+    rng = np.random.default_rng(1)
+    ids = np.arange(1, 501)
+
+    # Paired: B is A's prompts 25 % less efficient, with per-prompt difficulty
+    # shared by both, so pairing should give a much narrower interval
+    difficulty = rng.lognormal(0.0, 0.6, 500)
+    a = difficulty * (1.0 + 0.05 * rng.standard_normal(500))
+    b = difficulty * 0.8 * (1.0 + 0.05 * rng.standard_normal(500))
+    paired   = ratio_interval(a, b, ids, ids, rng=np.random.default_rng(2))
+    unpaired = ratio_interval(a, b, rng=np.random.default_rng(2))
+    print("paired  ", paired["ratio"], paired["ci"], paired["p_value"])
+    print("unpaired", unpaired["ratio"], unpaired["ci"], unpaired["p_value"])
+    assert paired["paired"] and not unpaired["paired"]
+    assert paired["ci"][0] < paired["ratio"] < paired["ci"][1]
+    assert paired["ci"][1] - paired["ci"][0] < (unpaired["ci"][1] - unpaired["ci"][0]) / 3
+    assert paired["p_value"] < 0.001
+
+    # No difference: interval covers 1, p-value is not small
+    null = ratio_interval(a, a[rng.permutation(500)], rng=np.random.default_rng(3))
+    assert null["ci"][0] < 1.0 < null["ci"][1] and null["p_value"] > 0.05
+
+    # Reproducible across thread scheduling, and fast: 6 pairs × 10k × 500
+    groups = {f"c{i}": (ids, difficulty * (1.0 + 0.1 * i)) for i in range(6)}
+    pairs  = [(f"c{i}", f"c{j}") for i, j in ((0, 1), (2, 3), (4, 5), (1, 2), (3, 4), (5, 0))]
+    t0 = time.perf_counter()
+    first = ratio_intervals(groups, pairs, seed=7)
+    elapsed = time.perf_counter() - t0
+    again = ratio_intervals(groups, pairs, seed=7, workers=1)
+    assert all(first[p]["ci"] == again[p]["ci"] for p in pairs)
+    print(f"{len(pairs)} pairs × 10,000 resamples × 500 rows: {elapsed * 1000:.0f} ms")
@@ -0,0 +1,178 @@
+# ==============================================================================
+#  Idle-baseline recalibration — idle_watts(t) instead of one start-up reading
+#
+#  net_j = gross_j - idle_watts * latency used a single 10 s idle window taken
+#  before the first prompt, then applied it for the whole 1–18 h run. On the
+#  Pi and the laptops the idle draw moves with temperature, fan state and
+#  background load over that time.
+#
+#  IdleBaseline re-measures idle power every `every` prompts (a short sleep,
+#  read through the same meter as the prompts) and keeps the readings as
+#  (time, watts) points. watts(t) interpolates linearly between them and
+#  holds the nearest reading beyond either end. Calibrations happen between
+#  prompts, so a prompt never straddles a point and its idle energy is exactly
+#  the trapezoid (watts(t0) + watts(t1)) / 2 × latency.
+#
+#  While the run is going, a row can only see readings taken before it, so
+#  the live Net_Energy_J holds the last reading. correct(df) recomputes every
+#  row once the run is over, against the full curve, and writes Idle_W and
+#  Idle_Drift_W (idle power at the row minus the first reading).
+#
+#  Readings are appended to <output stem>.idle.jsonl so --resume keeps the
+#  curve of the interrupted session. Self-check (from code/):
+#    python -m greenaudit.idle
+# ==============================================================================
+
+import json
+import os
+import time
+
+import numpy as np
+
+
+def meter_idle_watts(meter, seconds=10):
+    """Mean watts over an idle sleep, read through a begin()/end(t0, t1) meter."""
+    meter.begin()
+    t0 = time.time()
+    time.sleep(seconds)
+    t1 = time.time()
+    return meter.end(t0, t1) / (t1 - t0)
+
+
+def idle_path(output_file):
+    """green_audit_output/x.csv → green_audit_output/x.idle.jsonl"""
+    return os.path.splitext(str(output_file))[0] + ".idle.jsonl"
+
+
+class IdleBaseline:
+    """
+    measure(seconds) → idle watts. calibrate() takes one reading;
+    maybe_calibrate(n) takes one after every `every`-th prompt (0 = never).
+    `clock` must be the clock the rows' T_Start comes from.
+    """
+
+    def __init__(self, measure, path=None, seconds=10, every=25, resume=False, clock=time.time):
+        self.measure = measure
+        self.clock   = clock
+        self.path    = path
+        self.seconds = seconds
+        self.every   = every
+        self.times   = []
+        self.watts_  = []
+        self.spent_s = 0.0            # wall time spent in idle windows this session
+        if path and os.path.exists(path):
+            if resume:
+                with open(path, encoding="utf-8") as f:
+                    for line in f:
+                        if line.strip():
+                            point = json.loads(line)
+                            self.times.append(point["t"])
+                            self.watts_.append(point["Idle_W"])
+            else:
+                os.remove(path)
+
+    def __len__(self):
+        return len(self.times)
+
+    def calibrate(self):
+        t0 = self.clock()
+        w  = float(self.measure(self.seconds))
+        t1 = self.clock()
+        self.spent_s += t1 - t0
+        self.times.append((t0 + t1) / 2)
+        self.watts_.append(w)
+        if self.path:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"t": self.times[-1], "Idle_W": w,
+                                    "At": time.strftime("%Y-%m-%d %H:%M:%S")}) + "\n")
+        return w
+
+    def maybe_calibrate(self, n_done):
+        """Recalibrates after every `every`-th prompt of this session; returns the reading or None."""
+        if self.every and n_done and n_done % self.every == 0:
+            return self.calibrate()
+        return None
+
+    def watts(self, t):
+        return np.interp(t, self.times, self.watts_)
+
+    def idle_j(self, t0, t1):
+        return (self.watts(t0) + self.watts(t1)) / 2 * (np.asarray(t1) - np.asarray(t0))
+
+    def columns(self, t0, t1):
+        """Per-row idle columns for a prompt over [t0, t1]."""
+        latency = t1 - t0
+        idle_w  = self.idle_j(t0, t1) / latency if latency > 0 else self.watts(t0)
+        return {
+            "T_Start":      round(t0, 3),
+            "Idle_W":       round(float(idle_w), 3),
+            "Idle_Drift_W": round(float(idle_w - self.watts_[0]), 3),
+        }
+
+    def correct(self, df, power_decimals=2):
+        """
+        Recomputes Net_Energy_J, Power_W, Idle_W and Idle_Drift_W of every row
+        that has T_Start and Gross_Energy_J, against the full idle curve.
+        """
+        if df.empty or not {"T_Start", "Gross_Energy_J"} <= set(df.columns):
+            return df
+        df  = df.copy()
+        ok  = df["T_Start"].notna() & df["Gross_Energy_J"].notna()
+        t0  = df.loc[ok, "T_Start"].to_numpy(float)
+        lat = df.loc[ok, "Latency_s"].to_numpy(float)
+        idle_j = self.idle_j(t0, t0 + lat)
+        net_j  = np.maximum(df.loc[ok, "Gross_Energy_J"].to_numpy(float) - idle_j, 0.01)
+        idle_w = np.divide(idle_j, lat, out=self.watts(t0), where=lat > 0)
+        df.loc[ok, "Net_Energy_J"] = np.round(net_j, 4)
+        df.loc[ok, "Power_W"]      = np.round(np.divide(net_j, lat, out=np.zeros_like(lat),
+                                                        where=lat > 0), power_decimals)
+        df.loc[ok, "Idle_W"]       = np.round(idle_w, 3)
+        df.loc[ok, "Idle_Drift_W"] = np.round(idle_w - self.watts_[0], 3)
+        return df
+
+
+if __name__ == "__main__":
+    # Self-check: idle power rising linearly from 5 W to 8 W as the board
+    # warms up. Prompts see a flat 10 W on top of idle. The corrected rows
+    # should recover the 10 W exactly; a single start-up baseline cannot.
+    import tempfile
+    import pandas as pd
+
+    clock = {"t": 0.0}
+
+    def idle_at(t):
+        return 5.0 + 3.0 * t / 1000.0
+
+    def fake_measure(seconds):
+        t0 = clock["t"]
+        clock["t"] += seconds
+        return (idle_at(t0) + idle_at(clock["t"])) / 2   # mean of a linear ramp
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = idle_path(os.path.join(tmp, "run.csv"))
+        baseline = IdleBaseline(fake_measure, path=path, seconds=2, every=10,
+                                clock=lambda: clock["t"])
+        baseline.calibrate()
+        first_w = baseline.watts_[0]
+
+        rows = []
+        for i in range(1, 101):
+            t0 = clock["t"]
+            clock["t"] += 9.0
+            gross = (idle_at(t0) + idle_at(clock["t"])) / 2 * 9.0 + 10.0 * 9.0
+            rows.append({"ID": i, "T_Start": t0, "Latency_s": 9.0, "Gross_Energy_J": gross,
+                         "Net_Energy_J": gross - first_w * 9.0})
+            baseline.maybe_calibrate(i)
+
+        df = baseline.correct(pd.DataFrame(rows))
+        single = pd.DataFrame(rows)["Net_Energy_J"] / 9.0
+        print(f"{len(baseline)} idle readings, drift {df.Idle_Drift_W.max():.2f} W; "
+              f"net power {df.Power_W.min():.2f}–{df.Power_W.max():.2f} W corrected, "
+              f"{single.min():.2f}–{single.max():.2f} W with one baseline")
+        assert len(baseline) == 11
+        assert np.allclose(df["Power_W"], 10.0, atol=0.02)
+        assert single.max() > 12.0
+
+        # --resume reloads the curve from the .idle.jsonl file
+        again = IdleBaseline(fake_measure, path=path, resume=True)
+        assert again.times == baseline.times and again.watts_ == baseline.watts_
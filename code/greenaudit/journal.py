@@ -0,0 +1,131 @@
+# ==============================================================================
+#  Append-only results journal — one fsynced JSON line per completed prompt
+#
+#  Rewriting the full results CSV every N prompts costs O(n²) I/O and still
+#  loses up to N-1 rows on a crash; writing only at the end loses everything.
+#  The journal appends each row as it completes and fsyncs it, so a
+#  disconnect at prompt 480 keeps 479 rows. A resumed run reads journal.done and
+#  skips them; compact() turns the journal into the final CSV.
+#
+#  A torn final line (crash mid-write) is dropped when the journal is opened.
+#  Self-check (from code/):
+#    python -m greenaudit.journal
+# ==============================================================================
+
+import json
+import os
+import time
+
+import pandas as pd
+
+
+def _default(obj):
+    # numpy scalars (np.float32, np.int64, np.bool_) → plain Python values
+    if hasattr(obj, "item"):
+        return obj.item()
+    raise TypeError(f"Not JSON serialisable: {type(obj).__name__}")
+
+
+def journal_path(output_file):
+    """Journal that sits next to a results CSV: results.csv → results.journal.jsonl."""
+    return os.path.splitext(str(output_file))[0] + ".journal.jsonl"
+
+
+def read_rows(path):
+    """All complete rows in a journal (empty list if it does not exist)."""
+    if not os.path.exists(path):
+        return []
+    rows = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.endswith("\n"):
+                break                                   # torn write — ignore
+            rows.append(json.loads(line))
+    return rows
+
+
+class Journal:
+    """
+    Opens `path` for appending. With resume=False an existing journal is moved
+    aside to <path>.<timestamp>.bak rather than overwritten.
+    """
+
+    def __init__(self, path, resume=False, key="ID"):
+        self.path = str(path)
+        self.key  = key
+        if os.path.exists(self.path) and not resume:
+            os.replace(self.path, f"{self.path}.{time.strftime('%Y%m%d-%H%M%S')}.bak")
+        self._drop_torn_tail()
+        self.done = {row[key] for row in read_rows(self.path)}
+        self._f = open(self.path, "a", encoding="utf-8")
+
+    def _drop_torn_tail(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb+") as f:
+            data = f.read()
+            if data and not data.endswith(b"\n"):
+                f.truncate(data.rfind(b"\n") + 1)
+
+    def append(self, row):
+        self._f.write(json.dumps(row, ensure_ascii=False, default=_default) + "\n")
+        self._f.flush()
+        os.fsync(self._f.fileno())
+        self.done.add(row[self.key])
+
+    def close(self):
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def compact(path, output_csv, key="ID", **to_csv_kwargs):
+    """
+    Writes the journal's rows to `output_csv`, sorted by `key` with the last
+    entry winning for duplicated keys. Returns the DataFrame.
+    """
+    df = pd.DataFrame(read_rows(path))
+    if not df.empty:
+        df = (df.drop_duplicates(subset=key, keep="last")
+                .sort_values(key)
+                .reset_index(drop=True))
+    df.to_csv(output_csv, index=False, **to_csv_kwargs)
+    return df
+
+
+if __name__ == "__main__":
+    # Self-check: a crash mid-write, a resumed run, a fresh run and compaction
+    import glob
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = journal_path(os.path.join(tmp, "results.csv"))
+        with Journal(path) as j:
+            for i in (3, 1, 2, 4):
+                j.append({"ID": i, "Net_Energy_J": float(i)})
+        size = os.path.getsize(path)
+        with open(path, "rb+") as f:                    # crash mid-write: row 4 cut mid-JSON
+            f.truncate(size - 8)
+
+        with Journal(path, resume=True) as j:
+            assert j.done == {1, 2, 3}, j.done
+            with open(path, "rb") as f:
+                assert f.read().endswith(b"\n")
+            j.append({"ID": 4, "Net_Energy_J": 4.0})
+            j.append({"ID": 2, "Net_Energy_J": 20.0})    # re-run of 2: the last one wins
+        assert [r["ID"] for r in read_rows(path)] == [3, 1, 2, 4, 2]
+
+        df = compact(path, os.path.join(tmp, "results.csv"))
+        assert df["ID"].tolist() == [1, 2, 3, 4]
+        assert df.set_index("ID")["Net_Energy_J"].to_dict() == {1: 1.0, 2: 20.0, 3: 3.0, 4: 4.0}
+        assert pd.read_csv(os.path.join(tmp, "results.csv"))["ID"].tolist() == [1, 2, 3, 4]
+
+        with Journal(path) as j:                        # no resume: old journal moved aside
+            assert not j.done
+        backups = glob.glob(f"{path}.*.bak")
+        assert len(backups) == 1 and len(read_rows(backups[0])) == 5
+    print("journal ok")
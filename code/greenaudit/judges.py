@@ -0,0 +1,268 @@
+# ==============================================================================
+#  Judge scores — the xlsx scoring sheets as one tidy long table
+#
+#  Q_ped comes from 13 raters per response: ten teachers (one sheet each in
+#  *_teacher_scored.xlsx / *_all10teachers.xlsx) and three AI judges (one
+#  workbook each: chatgpt, claude, gemini), on four criteria:
+#
+#    CA  Conceptual Accuracy      SQ  Scaffolding Quality
+#    CC  Clarity & Coherence      LA  Level Appropriateness
+#
+#  load_scores() parses every workbook in SCORE_GLOBS with openpyxl in
+#  read-only (streaming) mode and returns one row per score:
+#
+#    use_cache, Precision, ID, judge, rater, criterion, score
+#
+#  judge is "teacher", "chatgpt", "claude" or "gemini"; rater is T1..T10 or
+#  GPT4 / Claude / Gemini, the column prefixes of the kvcache_false master
+#  datasets. Each workbook's table is pickled under cache_dir() keyed on the
+#  SHA-256 of the file, so a sheet is parsed once per edit, not per analysis.
+#  The blank templates in evaluation_sheets/ are not loaded.
+#
+#  q_ped() combines the scores as the master datasets do: per criterion,
+#  HUMAN_WEIGHT × teacher mean + (1 − HUMAN_WEIGHT) × AI-judge mean, then the
+#  mean of the four criteria. join_scores() adds Q_ped (and optionally the
+#  wide per-rater columns) to run rows on (use_cache, Precision, ID).
+#  Self-check against the master datasets (from code/):
+#    python -m greenaudit.judges
+# ==============================================================================
+
+import glob
+import hashlib
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from .prompts import DATA_DIR, cache_dir
+
+SCORE_GLOBS = ["kvcache_true/*/*.xlsx", "kvcache_false/*/*.xlsx"]
+
+CRITERIA = {
+    "conceptual accuracy":   "CA",
+    "clarity & coherence":   "CC",
+    "scaffolding quality":   "SQ",
+    "level appropriateness": "LA",
+}
+
+AI_RATERS    = {"chatgpt": "GPT4", "claude": "Claude", "gemini": "Gemini"}
+HUMAN_WEIGHT = 0.6
+
+KEYS = ["use_cache", "Precision", "ID"]
+
+
+# ── Parsing ───────────────────────────────────────────────────────────────────
+
+def _judge(path):
+    name = os.path.basename(path).lower()
+    if "teacher" in name:
+        return "teacher"
+    for judge in AI_RATERS:
+        if judge in name:
+            return judge
+    return None
+
+
+def _criterion(header):
+    text = " ".join(str(header or "").split()).lower()
+    for prefix, code in CRITERIA.items():
+        if text.startswith(prefix):
+            return code
+    return None
+
+
+def _read_sheet(rows):
+    """(ids, criteria, scores (n, k)) from a sheet's row iterator; None without an ID header."""
+    for i, row in enumerate(rows):
+        if row and str(row[0]).strip() == "ID":
+            cols = [(j, _criterion(h)) for j, h in enumerate(row) if _criterion(h)]
+            break
+        if i >= 5:
+            return None
+    else:
+        return None
+    ids, values = [], []
+    for row in rows:
+        if not row or row[0] is None:
+            continue
+        try:
+            ids.append(int(row[0]))
+        except (TypeError, ValueError):
+            continue
+        values.append([row[j] if j < len(row) else None for j, _ in cols])
+    scores = pd.DataFrame(values).apply(pd.to_numeric, errors="coerce").to_numpy(np.float64)
+    return np.asarray(ids, dtype=np.int32), [c for _, c in cols], scores
+
+
+def parse_workbook(path):
+    """Tidy score rows of one scoring workbook (read-only openpyxl, values only)."""
+    from openpyxl import load_workbook
+
+    judge = _judge(path)
+    if judge is None:
+        raise ValueError(f"Cannot tell the judge from the file name: {path}")
+    precision = os.path.basename(os.path.dirname(path))
+    use_cache = "kvcache_true" in path.replace("\\", "/")
+
+    parts = []
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        for ws in wb.worksheets:
+            if judge == "teacher":
+                m = re.fullmatch(r"Teacher (\d+)", ws.title.strip())
+                if not m:
+                    continue
+                rater = f"T{m.group(1)}"
+            else:
+                rater = AI_RATERS[judge]
+            sheet = _read_sheet(ws.iter_rows(values_only=True))
+            if sheet is None:
+                continue
+            ids, criteria, scores = sheet
+            k = len(criteria)
+            parts.append(pd.DataFrame({
+                "ID":        np.repeat(ids, k),
+                "rater":     rater,
+                "criterion": np.tile(criteria, len(ids)),
+                "score":     scores.ravel(),
+            }))
+            if judge != "teacher":
+                break                               # AI workbooks: first scored sheet only
+    finally:
+        wb.close()
+
+    df = pd.concat(parts, ignore_index=True) if parts else \
+        pd.DataFrame(columns=["ID", "rater", "criterion", "score"])
+    df = df.dropna(subset=["score"])
+    df.insert(0, "judge", judge)
+    df.insert(0, "Precision", precision)
+    df.insert(0, "use_cache", use_cache)
+    return df[[*KEYS, "judge", "rater", "criterion", "score"]].reset_index(drop=True)
+
+
+# ── Cache ─────────────────────────────────────────────────────────────────────
+
+def _sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _cached(path, refresh=False):
+    stem = re.sub(r"[^A-Za-z0-9_.-]", "_",
+                  os.path.relpath(path, DATA_DIR).removesuffix(".xlsx"))
+    pickle_path = os.path.join(cache_dir(), f"scores-{stem}-{_sha256(path)[:16]}.pkl")
+    if os.path.exists(pickle_path) and not refresh:
+        return pd.read_pickle(pickle_path)
+    df = parse_workbook(path)
+    for stale in glob.glob(os.path.join(cache_dir(), f"scores-{stem}-*.pkl")):
+        os.remove(stale)
+    tmp = f"{pickle_path}.{os.getpid()}.tmp"
+    df.to_pickle(tmp)
+    os.replace(tmp, pickle_path)
+    return df
+
+
+def score_files(data_dir=None):
+    data_dir = data_dir or DATA_DIR
+    return [p for pattern in SCORE_GLOBS
+            for p in sorted(glob.glob(os.path.join(data_dir, pattern))) if _judge(p)]
+
+
+def load_scores(data_dir=None, refresh=False):
+    """Every judge score as a tidy long table (see the header), typed."""
+    df = pd.concat([_cached(p, refresh) for p in score_files(data_dir)], ignore_index=True)
+    for col in ("Precision", "judge", "rater", "criterion"):
+        df[col] = df[col].astype("category")
+    df["use_cache"] = df["use_cache"].astype(bool)
+    df["ID"]        = df["ID"].astype("int32")
+    df["score"]     = df["score"].astype("float64")
+    return df
+
+
+# ── Combining ─────────────────────────────────────────────────────────────────
+
+def q_ped(scores, human_weight=HUMAN_WEIGHT):
+    """Q_ped per (use_cache, Precision, ID): weighted teacher / AI mean per criterion, averaged."""
+    human = np.where(scores["judge"].to_numpy() == "teacher", "human", "ai")
+    means = (scores.assign(side=human)
+                   .groupby([*KEYS, "criterion", "side"], observed=True)["score"].mean()
+                   .unstack("side"))
+    weighted = human_weight * means["human"] + (1.0 - human_weight) * means["ai"]
+    return weighted.groupby(KEYS, observed=True).mean().rename("Q_ped").reset_index()
+
+
+def wide_scores(scores):
+    """One row per response, one column per rater and criterion (T1_CA ... Gemini_LA)."""
+    wide = scores.pivot_table(index=KEYS, columns=["rater", "criterion"], values="score",
+                              observed=True)
+    wide.columns = [f"{r}_{c}" for r, c in wide.columns]
+    return wide.reset_index()
+
+
+def join_scores(runs, scores=None, wide=False):
+    """
+    runs with Q_ped from the judge scores, matched on (use_cache, Precision, ID);
+    rows that already have a Q_ped keep it. wide=True also adds the per-rater
+    columns.
+    """
+    scores = load_scores() if scores is None else scores
+    table = q_ped(scores)
+    if wide:
+        table = table.merge(wide_scores(scores), on=KEYS)
+    left = runs.copy()
+    for k in KEYS:
+        left[k] = left[k].astype(table[k].dtype if k != "Precision" else str)
+    table["Precision"] = table["Precision"].astype(str)
+    merged = left.merge(table, on=KEYS, how="left", suffixes=("", "_judges"))
+    if "Q_ped_judges" in merged:
+        merged["Q_ped"] = merged["Q_ped"].fillna(merged.pop("Q_ped_judges"))
+    return merged
+
+
+if __name__ == "__main__":
+    import time
+
+    t0 = time.perf_counter()
+    scores = load_scores()
+    first = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    scores = load_scores()
+    cached = time.perf_counter() - t0
+    print(f"{len(scores):,} scores from {len(score_files())} workbooks "
+          f"({first:.2f}s, cached {cached * 1000:.0f} ms)")
+    print(scores.groupby(["use_cache", "Precision", "judge"], observed=True)["score"]
+                .agg(["count", "mean"]).round(3).to_string())
+
+    # Self-check: the kvcache_false master datasets were built from these
+    # sheets — the same per-rater scores and the same Q_ped
+    q = q_ped(scores)
+    for precision, name in (("FP16", "master_dataset_FP16_noprompt.csv"),
+                            ("NF4", "master_dataset_NF4.csv")):
+        master = pd.read_csv(os.path.join(DATA_DIR, "kvcache_false", precision, name))
+        mine = q[(~q.use_cache) & (q.Precision == precision)].set_index("ID")["Q_ped"]
+        assert np.allclose(mine.loc[master.ID].to_numpy(), master.Qped, atol=1e-3), precision
+        wide = wide_scores(scores[(~scores.use_cache) & (scores.Precision == precision)])
+        wide = wide.set_index("ID").loc[master.ID]
+        for col in ("T1_CA", "T10_LA", "GPT4_SQ", "Gemini_CC"):
+            assert np.allclose(wide[col].to_numpy(), master[col].to_numpy()), (precision, col)
+
+    t0 = time.perf_counter()
+    runs = pd.DataFrame({"use_cache": True, "Precision": "NF4", "ID": np.arange(1, 501)})
+    joined = join_scores(runs, scores)
+    print(f"join 500 runs: {(time.perf_counter() - t0) * 1000:.0f} ms, "
+          f"mean Q_ped {joined.Q_ped.mean():.3f}")
+    assert joined.Q_ped.notna().all()
+
+    # load_results() fills Q_ped from the sheets for files without it, so the
+    # kvcache_true runs get an LpW (and the FP16 / NF4 ratio an interval)
+    from .analysis import load_results
+    frame = load_results()
+    kvtrue = frame[frame.Key == "T4_kvcache_true"]
+    assert len(kvtrue) and kvtrue.LpW.notna().all()
+    lpw = kvtrue.groupby("Precision", observed=True)["LpW"].mean()
+    assert abs(lpw["FP16"] / lpw["NF4"] - 1.331) < 1e-3, lpw["FP16"] / lpw["NF4"]
+    print("judges ok")
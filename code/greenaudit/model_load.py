@@ -0,0 +1,200 @@
+# ==============================================================================
+#  Model load profiling and warm-start cache
+#
+#  from_pretrained() is one opaque call. LoadProfiler.patched() wraps the
+#  transformers internals it goes through and charges their time to phases
+#  (exclusive — a nested call's time is not counted twice):
+#
+#    config       AutoConfig.from_pretrained (timed with profiler.phase())
+#    weight_read  modeling_utils.load_state_dict — safetensors shard → tensors
+#    materialize  _load_state_dict_into_(meta_)model — tensors into modules
+#    quantize     Bnb4BitHfQuantizer.create_quantized_param — NF4 packing
+#                 (bitsandbytes quantizes as it moves the weight to the GPU)
+#    to_device    set_module_tensor_to_device, dispatch_model
+#    other        everything else: model construction, remote-code import, ...
+#
+#  Internals that do not exist in the installed version are skipped, so the
+#  profile degrades to coarser phases rather than failing. Written against
+#  transformers 4.44.
+#
+#  Warm start: save_warm_start() writes the loaded model with
+#  save_pretrained() (safetensors) to warm_start_dir(). For NF4 that stores
+#  the already-packed 4-bit weights and their quantization state, and a later
+#  from_pretrained() of that directory loads them directly instead of
+#  re-quantizing FP16 weights. Loading memory-maps the safetensors files.
+#  Self-check on a tiny random Phi-3 (from code/):
+#    python -m greenaudit.model_load
+# ==============================================================================
+
+import importlib
+import json
+import os
+import shutil
+import time
+from contextlib import contextmanager
+
+import torch
+
+from .prompts import cache_dir
+
+# (phase, module, attribute path)
+PROFILED_CALLS = [
+    ("weight_read", "transformers.modeling_utils", "load_state_dict"),
+    ("materialize", "transformers.modeling_utils", "_load_state_dict_into_meta_model"),
+    ("materialize", "transformers.modeling_utils", "_load_state_dict_into_model"),
+    ("quantize",    "transformers.quantizers.quantizer_bnb_4bit",
+                    "Bnb4BitHfQuantizer.create_quantized_param"),
+    ("to_device",   "transformers.modeling_utils", "set_module_tensor_to_device"),
+    ("to_device",   "transformers.modeling_utils", "dispatch_model"),
+]
+
+
+def _sync():
+    if torch.cuda.is_available():
+        torch.cuda.synchronize()
+
+
+class LoadProfiler:
+    def __init__(self):
+        self.phases = {}
+        self.calls  = {}
+        self._stack = []          # [phase, started_at] of open phases, innermost last
+        self._t0    = None
+        self._t1    = None
+
+    def _enter(self, name):
+        now = time.perf_counter()
+        if self._stack:
+            parent = self._stack[-1]
+            self.phases[parent[0]] = self.phases.get(parent[0], 0.0) + now - parent[1]
+        self._stack.append([name, now])
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    def _exit(self):
+        _sync()
+        now = time.perf_counter()
+        name, started = self._stack.pop()
+        self.phases[name] = self.phases.get(name, 0.0) + now - started
+        if self._stack:
+            self._stack[-1][1] = now
+
+    @contextmanager
+    def phase(self, name):
+        if self._t0 is None:
+            self._t0 = time.perf_counter()
+        self._enter(name)
+        try:
+            yield
+        finally:
+            self._exit()
+            self._t1 = time.perf_counter()
+
+    def _wrap(self, name, fn):
+        def timed(*args, **kwargs):
+            self._enter(name)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self._exit()
+        return timed
+
+    @contextmanager
+    def patched(self):
+        """Times from_pretrained() internals by phase for the duration of the block."""
+        restore = []
+        for name, module_name, attr in PROFILED_CALLS:
+            try:
+                owner = importlib.import_module(module_name)
+            except ImportError:
+                continue
+            *parents, leaf = attr.split(".")
+            for p in parents:
+                owner = getattr(owner, p, None)
+            if owner is None or not hasattr(owner, leaf):
+                continue
+            original = owner.__dict__[leaf] if leaf in vars(owner) else getattr(owner, leaf)
+            restore.append((owner, leaf, original))
+            setattr(owner, leaf, self._wrap(name, getattr(owner, leaf)))
+
+        with self.phase("other"):
+            try:
+                yield self
+            finally:
+                for owner, leaf, original in reversed(restore):
+                    setattr(owner, leaf, original)
+
+    @property
+    def total_s(self):
+        return (self._t1 - self._t0) if self._t0 is not None and self._t1 is not None else 0.0
+
+    def report(self):
+        order = ["config", "weight_read", "materialize", "quantize", "to_device", "save", "other"]
+        names = [n for n in order if n in self.phases] + \
+                [n for n in self.phases if n not in order]
+        total = self.total_s or 1e-9
+        lines = [f"  {n:<12} {self.phases[n]:>8.2f}s  {100 * self.phases[n] / total:>5.1f}%"
+                 for n in names]
+        return "\n".join(lines + [f"  {'total':<12} {self.total_s:>8.2f}s"])
+
+
+# ── Warm-start cache ──────────────────────────────────────────────────────────
+
+def warm_start_dir(model_id, label):
+    import transformers
+    safe_id = model_id.replace("/", "--")
+    return os.path.join(cache_dir(), "models", f"{safe_id}-{label}-tf{transformers.__version__}")
+
+
+def is_warm(path):
+    return os.path.exists(os.path.join(path, "warm_start.json"))
+
+
+def save_warm_start(model, path, tokenizer=None, **meta):
+    """
+    save_pretrained() into `path` (written to a temp dir, then renamed).
+    warm_start.json is written last and marks the directory complete.
+    """
+    tmp = f"{path}.tmp{os.getpid()}"
+    shutil.rmtree(tmp, ignore_errors=True)
+    model.save_pretrained(tmp, safe_serialization=True)
+    if tokenizer is not None:
+        tokenizer.save_pretrained(tmp)
+    with open(os.path.join(tmp, "warm_start.json"), "w") as f:
+        json.dump({"created": time.strftime("%Y-%m-%d %H:%M:%S"), **meta}, f, indent=2)
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    os.replace(tmp, path)
+
+
+if __name__ == "__main__":
+    # Self-check: profile a cold load from a saved tiny Phi-3, write the warm
+    # start, reload it, and compare logits.
+    import tempfile
+    from transformers import AutoConfig, AutoModelForCausalLM
+    from .tiny import tiny_phi3
+
+    model, tokenizer = tiny_phi3(seed=0, num_hidden_layers=4, hidden_size=256,
+                                 intermediate_size=1024)
+    ids = torch.tensor([tokenizer("What is a prime number?")["input_ids"]])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["GREENAUDIT_CACHE"] = tmp
+        hub = os.path.join(tmp, "hub")
+        model.save_pretrained(hub)
+
+        for attempt in ("cold", "warm"):
+            warm = warm_start_dir("tiny/phi3", "FP32")
+            source = warm if is_warm(warm) else hub
+            profiler = LoadProfiler()
+            with profiler.phase("config"):
+                cfg = AutoConfig.from_pretrained(source)
+            with profiler.patched():
+                loaded = AutoModelForCausalLM.from_pretrained(source, config=cfg)
+            if not is_warm(warm):
+                with profiler.phase("save"):
+                    save_warm_start(loaded, warm, model_id="tiny/phi3")
+            print(f"{attempt} load from {os.path.relpath(source, tmp)}:\n{profiler.report()}")
+
+            with torch.no_grad():
+                assert torch.equal(model(ids).logits, loaded.eval()(ids).logits)
+        assert is_warm(warm)
@@ -0,0 +1,107 @@
+# ==============================================================================
+#  Staged producer/consumer pipeline — keep only generation on the critical path
+#
+#  The scoring loops ran generate → energy → judge call → LpW → checkpoint
+#  strictly in sequence, so every prompt waited for the previous response's
+#  judge round-trip and CSV write. Pipeline moves everything after the energy
+#  reading onto worker threads:
+#
+#    main thread ──put()──▶ [queue] ─▶ stage 1 ─▶ [queue] ─▶ stage 2 ─▶ ...
+#
+#  Each stage is one thread running fn(item) → item for the next stage
+#  (return None to drop the item). Queues are bounded by `maxsize`, so a slow
+#  stage applies backpressure: put() blocks the generation thread rather
+#  than letting unscored rows pile up without limit. Items stay in order.
+#
+#  If a stage raises, it keeps draining its queue so nothing upstream
+#  deadlocks, and the exception is re-raised from the next put() or close().
+# ==============================================================================
+
+import queue
+import threading
+import time
+
+_DONE = object()
+
+
+class Stage(threading.Thread):
+    def __init__(self, name, fn, inbox, outbox):
+        super().__init__(name=f"Pipeline-{name}", daemon=True)
+        self.stage_name = name
+        self.fn         = fn
+        self.inbox      = inbox
+        self.outbox     = outbox
+        self.error      = None
+        self.items      = 0
+        self.busy_s     = 0.0       # time spent inside fn
+        self.max_depth  = 0         # inbox high-water mark
+
+    def run(self):
+        while True:
+            self.max_depth = max(self.max_depth, self.inbox.qsize())
+            item = self.inbox.get()
+            if item is _DONE:
+                break
+            if self.error is not None:
+                continue                        # failed — drain so upstream never blocks
+            t0 = time.perf_counter()
+            try:
+                out = self.fn(item)
+            except BaseException as e:
+                self.error = e
+                continue
+            finally:
+                self.busy_s += time.perf_counter() - t0
+            self.items += 1
+            if self.outbox is not None and out is not None:
+                self.outbox.put(out)
+        if self.outbox is not None:
+            self.outbox.put(_DONE)
+
+
+class Pipeline:
+    """
+    stages: [(name, fn), ...] run in order, each on its own thread.
+    Use as a context manager, or call close() after the last put().
+    """
+
+    def __init__(self, stages, maxsize=16):
+        queues = [queue.Queue(maxsize) for _ in stages]
+        self.stages = [
+            Stage(name, fn, queues[i], queues[i + 1] if i + 1 < len(stages) else None)
+            for i, (name, fn) in enumerate(stages)
+        ]
+        self.put_wait_s = 0.0           # time the producer spent blocked on backpressure
+        for stage in self.stages:
+            stage.start()
+
+    def _raise_if_failed(self):
+        for stage in self.stages:
+            if stage.error is not None:
+                raise RuntimeError(f"Pipeline stage '{stage.stage_name}' failed") from stage.error
+
+    def put(self, item):
+        self._raise_if_failed()
+        t0 = time.perf_counter()
+        self.stages[0].inbox.put(item)
+        self.put_wait_s += time.perf_counter() - t0
+
+    def close(self):
+        """Waits for every queued item to pass through all stages."""
+        self.stages[0].inbox.put(_DONE)
+        for stage in self.stages:
+            stage.join()
+        self._raise_if_failed()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+
+    def report(self):
+        return "\n".join(
+            f"  {s.stage_name:<8} {s.items:>5} items  {s.busy_s:>8.1f}s busy  max queue {s.max_depth}"
+            for s in self.stages
+        ) + f"\n  producer blocked {self.put_wait_s:.1f}s on full queues"
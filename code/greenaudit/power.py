@@ -0,0 +1,339 @@
+# ==============================================================================
+#  Background power sampler — per-prompt energy from a high-rate power trace
+#
+#  The scripts originally force a CodeCarbon reading before and after every
+#  prompt (main_tracker._measure_power_and_energy(), a private API polled at
+#  1 s), which under-resolves short prompts. PowerSampler instead reads a
+#  power backend on its own thread at `hz` samples/s into a preallocated ring
+#  buffer, and energy_j(t0, t1) integrates the trace (trapezoidal, linearly
+#  interpolated at both edges) over exactly the prompt's window.
+#
+#  Backends implement read_watts() → instantaneous watts:
+#    NvmlPower       — NVIDIA GPU board power via pynvml
+#    SyntheticPower  — any function of time; for checks without hardware
+#    SumPower        — several backends added together (e.g. GPU + CPU)
+#
+#  The sampler also keeps a running (trapezoidal) energy integral and
+#  checkpoints it every `checkpoint_s` seconds for the whole session, so a
+#  window that starts before the oldest buffered sample — e.g. one reading
+#  over a long continuous-batch run — is still answered: its start is read
+#  from the checkpoints (linear between them) instead of raising.
+#
+#  If read_watts() raises, the sampling thread stores the exception and
+#  stops; the next energy_j() raises it rather than extrapolating the trace
+#  past its last sample, as does a window that no sample covers yet.
+#
+#  Timestamps use time.time(), the same clock the scripts time prompts with.
+#  Self-check with SyntheticPower (from code/):
+#    python -m greenaudit.power
+# ==============================================================================
+
+import threading
+import time
+
+import numpy as np
+
+
+# ── Backends ──────────────────────────────────────────────────────────────────
+
+class PowerBackend:
+    name = "base"
+
+    def read_watts(self):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class SyntheticPower(PowerBackend):
+    """Power as a function of wall-clock time: fn(t) → watts. Default 50 W flat."""
+
+    name = "synthetic"
+
+    def __init__(self, fn=None):
+        self.fn = fn or (lambda t: 50.0)
+
+    def read_watts(self):
+        return float(self.fn(time.time()))
+
+
+class NvmlPower(PowerBackend):
+    """Board power of one or more NVIDIA GPUs (nvmlDeviceGetPowerUsage, mW)."""
+
+    name = "nvml"
+
+    def __init__(self, indices=(0,)):
+        try:
+            import pynvml
+        except ImportError as e:
+            raise ImportError("NvmlPower needs pynvml: pip install nvidia-ml-py") from e
+        self._nvml = pynvml
+        pynvml.nvmlInit()
+        self.handles = [pynvml.nvmlDeviceGetHandleByIndex(i) for i in indices]
+
+    def read_watts(self):
+        return sum(self._nvml.nvmlDeviceGetPowerUsage(h) for h in self.handles) / 1000.0
+
+    def close(self):
+        self._nvml.nvmlShutdown()
+
+
+class SumPower(PowerBackend):
+    name = "sum"
+
+    def __init__(self, *backends):
+        self.backends = backends
+        self.name = "+".join(b.name for b in backends)
+
+    def read_watts(self):
+        return sum(b.read_watts() for b in self.backends)
+
+    def close(self):
+        for b in self.backends:
+            b.close()
+
+
+# ── Sampler ───────────────────────────────────────────────────────────────────
+
+class PowerSampler:
+    """
+    Samples `backend` at `hz` on a daemon thread into a ring buffer holding the
+    last `window_s` seconds, plus a cumulative-energy checkpoint every
+    `checkpoint_s` for older windows. Use as a context manager or call
+    start()/stop(). cpus pins the sampling thread (greenaudit/affinity.py),
+    off the inference cores.
+    """
+
+    def __init__(self, backend, hz=50, window_s=3600, cpus=None, checkpoint_s=1.0):
+        if not 1 <= hz <= 1000:
+            raise ValueError(f"hz must be between 1 and 1000, got {hz}")
+        self.backend  = backend
+        self.hz       = hz
+        self.period   = 1.0 / hz
+        self.capacity = int(hz * window_s)
+        self.cpus     = cpus
+        self._t       = np.zeros(self.capacity)
+        self._w       = np.zeros(self.capacity)
+        self._e       = np.zeros(self.capacity)   # cumulative joules at each sample
+        self._n       = 0                     # total samples ever written
+        self.checkpoint_s = checkpoint_s
+        self._ckpt_t  = []                    # (time, cumulative joules), whole session
+        self._ckpt_e  = []
+        self._lock    = threading.Lock()
+        self._stop    = threading.Event()
+        self._thread  = None
+        self.error    = None                  # read_watts() exception that ended the thread
+
+    def start(self):
+        self._stop.clear()
+        self.error = None
+        self._thread = threading.Thread(target=self._run, name="PowerSampler", daemon=True)
+        self._thread.start()
+        if not self._wait_for(time.time()):
+            self._check()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.backend.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _run(self):
+        if self.cpus:
+            from .affinity import pin_thread
+            pin_thread(self.cpus)
+        deadline = time.time()
+        prev, energy = None, 0.0
+        while not self._stop.is_set():
+            try:
+                w = self.backend.read_watts()
+            except Exception as e:
+                self.error = e
+                break
+            t = time.time()
+            if prev is not None:
+                energy += (w + prev[1]) * (t - prev[0]) / 2.0
+            with self._lock:
+                i = self._n % self.capacity
+                self._t[i] = t
+                self._w[i] = w
+                self._e[i] = energy
+                self._n += 1
+                if not self._ckpt_t or t - self._ckpt_t[-1] >= self.checkpoint_s:
+                    self._ckpt_t.append(t)
+                    self._ckpt_e.append(energy)
+            prev = (t, w)
+            deadline += self.period
+            delay = deadline - time.time()
+            if delay > 0:
+                self._stop.wait(delay)
+            else:
+                deadline = time.time()        # fell behind — don't try to catch up
+
+    # ── queries ──────────────────────────────────────────────────────────────
+
+    def samples(self):
+        """Chronological copy of the buffered (times, watts)."""
+        t, w, _ = self._buffer()
+        return t, w
+
+    def _buffer(self):
+        with self._lock:
+            n = min(self._n, self.capacity)
+            start = self._n % self.capacity if self._n > self.capacity else 0
+            idx = (start + np.arange(n)) % self.capacity
+            return self._t[idx], self._w[idx], self._e[idx]
+
+    def _energy_at(self, x, t, w, e):
+        """Cumulative joules at time x: exact in the buffer, from checkpoints before it."""
+        if x >= t[0]:
+            i  = int(np.searchsorted(t, x, side="right")) - 1
+            wx = np.interp(x, t, w)
+            return e[i] + (w[i] + wx) * (x - t[i]) / 2.0
+        with self._lock:
+            ct, ce = list(self._ckpt_t), list(self._ckpt_e)
+        if x < ct[0]:
+            raise RuntimeError(
+                f"Window starts {ct[0] - x:.1f}s before the sampler's first sample")
+        return float(np.interp(x, ct + [t[0]], ce + [e[0]]))
+
+    def _wait_for(self, t, timeout=None):
+        """Block until a sample at or after time t exists (or the timeout passes)."""
+        limit = time.time() + (timeout if timeout is not None else 5 * self.period + 1.0)
+        while time.time() < limit:
+            with self._lock:
+                if self._n and self._t[(self._n - 1) % self.capacity] >= t:
+                    return True
+            if self._thread is None or not self._thread.is_alive():
+                return False
+            time.sleep(self.period / 4)
+        return False
+
+    def _check(self):
+        """Raises if the sampling thread failed or is not running."""
+        if self.error is not None:
+            raise RuntimeError(f"PowerSampler's {self.backend.name} backend failed: "
+                               f"{self.error!r}") from self.error
+        if self._thread is None or not self._thread.is_alive():
+            raise RuntimeError("PowerSampler is not running — stopped, or start() was not called")
+        raise RuntimeError("PowerSampler fell behind: no sample within the wait timeout")
+
+    def energy_j(self, t0, t1):
+        """Energy in joules between wall-clock times t0 and t1."""
+        if t1 <= t0:
+            return 0.0
+        if self.error is not None or not self._wait_for(t1):
+            self._check()
+        t, w, e = self._buffer()
+        if t.size == 0:
+            raise RuntimeError("PowerSampler has no samples — was start() called?")
+        return float(self._energy_at(t1, t, w, e) - self._energy_at(t0, t, w, e))
+
+    def mean_watts(self, t0, t1):
+        return self.energy_j(t0, t1) / (t1 - t0) if t1 > t0 else 0.0
+
+
+# ── Meters — one interface for the scripts' before/after energy readings ─────
+
+class CodecarbonMeter:
+    """The original per-prompt approach: two forced EmissionsTracker readings."""
+
+    def __init__(self, tracker):
+        self.tracker = tracker
+        self._kwh0   = None
+
+    def begin(self):
+        self.tracker._measure_power_and_energy()
+        self._kwh0 = self.tracker._total_energy.kWh
+
+    def end(self, t0, t1):
+        self.tracker._measure_power_and_energy()
+        return (self.tracker._total_energy.kWh - self._kwh0) * 3.6e6
+
+
+class SamplerMeter:
+    """Energy from a running PowerSampler, integrated over exactly [t0, t1]."""
+
+    def __init__(self, sampler):
+        self.sampler = sampler
+
+    def begin(self):
+        pass
+
+    def end(self, t0, t1):
+        return self.sampler.energy_j(t0, t1)
+
+
+if __name__ == "__main__":
+    # Self-check: a 10 W → 110 W ramp over one second, so every window has a
+    # closed-form energy. The ring holds 0.25 s, so it wraps four times.
+    t_start = time.time()
+
+    def ramp(t):
+        return 10.0 + 100.0 * (t - t_start)
+
+    def exact(t0, t1):
+        return (ramp(t0) + ramp(t1)) / 2.0 * (t1 - t0)
+
+    sampler = PowerSampler(SyntheticPower(ramp), hz=200, window_s=0.25, checkpoint_s=0.05)
+    with sampler:
+        time.sleep(1.0)
+        t_end = time.time()
+        times, watts = sampler.samples()
+        assert sampler._n > 2 * sampler.capacity and len(times) == sampler.capacity
+        assert np.all(np.diff(times) > 0)                       # chronological after the wrap
+
+        # Edges between samples: interpolated, so a linear trace is integrated exactly
+        t0, t1 = times[10] + 0.3 * sampler.period, times[-5] - 0.6 * sampler.period
+        assert abs(sampler.energy_j(t0, t1) - exact(t0, t1)) < 1e-3 * exact(t0, t1)
+        assert abs(sampler.mean_watts(t0, t1) - ramp((t0 + t1) / 2)) < 0.1
+
+        # Starts long before the buffer: the running integral's checkpoints
+        t0 = t_start + 0.1
+        assert t0 < times[0]
+        joules = sampler.energy_j(t0, t_end)
+        assert abs(joules - exact(t0, t_end)) < 0.01 * exact(t0, t_end), (joules, exact(t0, t_end))
+
+        # Before the first sample, or an empty window
+        try:
+            sampler.energy_j(t_start - 10.0, t_end)
+        except RuntimeError:
+            pass
+        else:
+            raise AssertionError("a window before the first sample must raise")
+        assert sampler.energy_j(t_end, t_end) == 0.0
+
+    # A backend that fails: the thread ends, and the window past its last
+    # sample raises instead of being extrapolated flat
+    class Failing(PowerBackend):
+        name = "failing"
+
+        def __init__(self):
+            self.calls = 0
+
+        def read_watts(self):
+            self.calls += 1
+            if self.calls > 20:
+                raise OSError("sensor gone")
+            return 30.0
+
+    failing = PowerSampler(Failing(), hz=200).start()
+    t0 = time.time()
+    failing._thread.join(timeout=1.0)
+    assert not failing._thread.is_alive() and isinstance(failing.error, OSError)
+    try:
+        failing.energy_j(t0, time.time())
+    except RuntimeError as e:
+        assert isinstance(e.__cause__, OSError)
+    else:
+        raise AssertionError("energy_j after a backend failure must raise")
+    failing.stop()
+    print(f"power ok: {sampler._n} samples, {len(sampler._ckpt_t)} checkpoints")
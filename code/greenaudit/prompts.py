@@ -0,0 +1,173 @@
+# ==============================================================================
+#  Prompt corpora — one loader instead of prompt lists pasted into each script
+#
+#  Each corpus is a data file plus the order the study ran it in. Row IDs are
+#  run positions (1..N), matching the ID column of the published results:
+#
+#    lpw500     data/prompts/LpW_500_Questions.xlsx ("All Questions" sheet),
+#               grouped by category in CATEGORY_ORDER, questionnaire ID order
+#               within a category (Question_ID keeps the sheet's own ID).
+#               kvcache_false study: local_colab.py, local_pc.py, cloud_scoring.py
+#    kvtrue500  data/prompts/kvtrue_500_prompts.csv
+#               kvcache_true study: kvtrue_FP16/NF4.py, run_ultra_series.py
+#    laptop100  data/windows/laptop_100_prompts.csv — 20 per category from kvtrue500
+#    rpi5_100   data/prompts/rpi5_100_prompts.csv
+#
+#  The parsed table is pickled under cache_dir() keyed on the source file's
+#  mtime and size, so the xlsx is parsed once per edit rather than per run.
+#  Category labels are normalised to the results' spelling ("Programming-CS",
+#  "Meta-cognition"). Self-check (from code/):
+#    python -m greenaudit.prompts
+# ==============================================================================
+
+import glob
+import os
+
+import pandas as pd
+
+DATA_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                         "..", "..", "data"))
+
+CATEGORY_ORDER = ["Mathematics", "Science", "Programming-CS", "Humanities", "Meta-cognition"]
+
+_CATEGORY_ALIASES = {
+    "Programming / CS": "Programming-CS",
+    "Programming_CS":   "Programming-CS",
+    "Programming - CS": "Programming-CS",
+    "Metacognition":    "Meta-cognition",
+}
+
+
+def normalize_category(label):
+    label = str(label).strip()
+    return _CATEGORY_ALIASES.get(label, label)
+
+
+def cache_dir():
+    """Where derived artefacts are cached ($GREENAUDIT_CACHE or ~/.cache/greenaudit)."""
+    path = os.environ.get("GREENAUDIT_CACHE",
+                          os.path.join(os.path.expanduser("~"), ".cache", "greenaudit"))
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+# ── Readers ───────────────────────────────────────────────────────────────────
+
+def _read_questionnaire(path):
+    df = pd.read_excel(path, sheet_name="All Questions", engine="openpyxl", usecols=[0, 1, 2])
+    df.columns = ["Question_ID", "Category", "Prompt"]
+    df = df.dropna(subset=["Prompt"])
+    df["Category"] = df["Category"].map(normalize_category)
+    df["_order"]   = df["Category"].map(CATEGORY_ORDER.index)
+    df = df.sort_values(["_order", "Question_ID"], kind="stable").drop(columns="_order")
+    df.insert(0, "ID", range(1, len(df) + 1))
+    df["Question_ID"] = df["Question_ID"].astype(int)
+    return df.reset_index(drop=True)
+
+
+def _read_csv(path):
+    df = pd.read_csv(path, encoding="utf-8")
+    df = df.rename(columns={c: c.title() for c in df.columns if c.upper() in ("CATEGORY", "PROMPT")})
+    df["Category"] = df["Category"].map(normalize_category)
+    return df[["ID", "Category", "Prompt"]]
+
+
+CORPORA = {
+    "lpw500":    ("prompts/LpW_500_Questions.xlsx", _read_questionnaire),
+    "kvtrue500": ("prompts/kvtrue_500_prompts.csv", _read_csv),
+    "laptop100": ("windows/laptop_100_prompts.csv", _read_csv),
+    "rpi5_100":  ("prompts/rpi5_100_prompts.csv",   _read_csv),
+}
+
+
+# ── Loading ───────────────────────────────────────────────────────────────────
+
+_loaded = {}    # (corpus, mtime_ns, size) → DataFrame, for repeated calls in one process
+
+
+def _corpus(name, refresh=False):
+    if name not in CORPORA:
+        raise KeyError(f"Unknown prompt corpus '{name}' — choose from {sorted(CORPORA)}")
+    rel, reader = CORPORA[name]
+    path = os.path.join(DATA_DIR, rel)
+    st   = os.stat(path)
+    key  = (name, st.st_mtime_ns, st.st_size)
+    if key in _loaded and not refresh:
+        return _loaded[key]
+
+    pickle_path = os.path.join(cache_dir(), f"prompts-{name}-{st.st_mtime_ns}-{st.st_size}.pkl")
+    if os.path.exists(pickle_path) and not refresh:
+        df = pd.read_pickle(pickle_path)
+    else:
+        df = reader(path)
+        for stale in glob.glob(os.path.join(cache_dir(), f"prompts-{name}-*.pkl")):
+            os.remove(stale)
+        tmp = f"{pickle_path}.{os.getpid()}.tmp"
+        df.to_pickle(tmp)
+        os.replace(tmp, pickle_path)
+
+    _loaded[key] = df
+    return df
+
+
+def load_prompts(corpus="lpw500", categories=None, ids=None, refresh=False):
+    """
+    Prompt table for `corpus`: ID, Category, Prompt (+ Question_ID for lpw500).
+
+    categories / ids optionally restrict the rows (category aliases accepted).
+    The result is a copy, in run order.
+    """
+    df = _corpus(corpus, refresh)
+    mask = pd.Series(True, index=df.index)
+    if categories is not None:
+        if isinstance(categories, str):
+            categories = [categories]
+        mask &= df["Category"].isin([normalize_category(c) for c in categories])
+    if ids is not None:
+        mask &= df["ID"].isin(list(ids))
+    return df[mask].reset_index(drop=True)
+
+
+def stratified_sample(df, per_category, seed=0):
+    """`per_category` rows drawn from each category (seeded), returned in ID order."""
+    return (df.groupby("Category", group_keys=False)
+              .sample(n=per_category, random_state=seed)
+              .sort_values("ID")
+              .reset_index(drop=True))
+
+
+if __name__ == "__main__":
+    # Self-check in a scratch cache: every corpus round-trips through its
+    # pickle unchanged, and editing a source file invalidates its entry
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["GREENAUDIT_CACHE"] = os.path.join(tmp, "cache")
+        sizes = {"lpw500": 500, "kvtrue500": 500, "laptop100": 100, "rpi5_100": 100}
+        for name, (rel, reader) in CORPORA.items():
+            parsed = reader(os.path.join(DATA_DIR, rel))
+            first  = load_prompts(name)
+            _loaded.clear()                             # force the pickle path
+            again  = load_prompts(name)
+            pd.testing.assert_frame_equal(first, parsed)
+            pd.testing.assert_frame_equal(again, parsed)
+            assert len(parsed) == sizes[name] and parsed["ID"].tolist() == list(range(1, len(parsed) + 1))
+            assert set(parsed["Category"]) == set(CATEGORY_ORDER), name
+        assert len(glob.glob(os.path.join(cache_dir(), "prompts-*.pkl"))) == len(CORPORA)
+
+        # An edited source: new contents are read, the stale pickle is removed
+        src = os.path.join(tmp, "corpus.csv")
+        CORPORA["check"] = (src, _read_csv)           # absolute: os.path.join keeps it
+        pd.DataFrame({"ID": [1, 2], "CATEGORY": ["Science", "Metacognition"],
+                      "PROMPT": ["What is light?", "How do you revise?"]}).to_csv(src, index=False)
+        assert load_prompts("check")["Category"].tolist() == ["Science", "Meta-cognition"]
+        pd.DataFrame({"ID": [1, 2], "CATEGORY": ["Science", "Science"],
+                      "PROMPT": ["What is light, exactly?", "Why is the sky blue?"]}).to_csv(src, index=False)
+        _loaded.clear()
+        assert load_prompts("check")["Prompt"].tolist() == ["What is light, exactly?", "Why is the sky blue?"]
+        assert len(glob.glob(os.path.join(cache_dir(), "prompts-check-*.pkl"))) == 1
+        del CORPORA["check"]
+
+    sample = stratified_sample(load_prompts("kvtrue500"), 2)
+    assert sample.groupby("Category").size().eq(2).all()
+    print("prompts ok")
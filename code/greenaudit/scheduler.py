@@ -0,0 +1,295 @@
+# ==============================================================================
+#  Continuous-batching scheduler — greedy decoding with slot refill
+#
+#  Static batching (batching.py) holds every slot until the longest response
+#  in the batch reaches MAX_NEW_TOKENS. Here a prompt that hits EOS frees its
+#  slot immediately and the next queued prompt is prefilled into it, so the
+#  decode batch stays full.
+#
+#  The KV cache is kept as one left-padded batch (legacy (key, value) tuples,
+#  wrapped in a DynamicCache for each forward pass). Admitting a prompt pads
+#  either the batch or the new row on the left so their lengths match;
+#  finishing a prompt drops its row and trims any all-padding columns.
+#
+#  Per-request timing:
+#    Queue_Wait_s — submitted → admitted into a slot
+#    Prefill_s    — the prompt's own prefill forward pass (gives token 1)
+#    Decode_s     — token 1 → last token, while sharing decode steps
+#    TTFT_s       — submitted → token 1
+#    Latency_s    — admitted → last token (service time, excludes queueing)
+#
+#  CPU self-check with a tiny random Phi-3 (no GPU, no download; from code/):
+#    python -m greenaudit.scheduler
+# ==============================================================================
+
+import time
+from collections import deque
+from dataclasses import dataclass, field
+
+import torch
+import torch.nn.functional as F
+from transformers.cache_utils import DynamicCache
+
+
+@dataclass
+class Request:
+    request_id: int
+    prompt: str
+    input_ids: list
+    submitted_at: float
+    output_ids: list = field(default_factory=list)
+    admitted_at: float = None
+    first_token_at: float = None
+    finished_at: float = None
+    prefill_s: float = 0.0
+
+    @property
+    def timings(self):
+        return {
+            "Queue_Wait_s": round(self.admitted_at - self.submitted_at, 4),
+            "Prefill_s":    round(self.prefill_s, 4),
+            "Decode_s":     round(self.finished_at - self.first_token_at, 4),
+            "TTFT_s":       round(self.first_token_at - self.submitted_at, 4),
+            "Latency_s":    round(self.finished_at - self.admitted_at, 4),
+        }
+
+
+def _sync(device):
+    if device.type == "cuda":
+        torch.cuda.synchronize()
+
+
+def _pad_left(kv, mask, width):
+    """Left-pad every (key, value) tensor and the attention mask by `width` columns."""
+    if width == 0:
+        return kv, mask
+    kv = [(F.pad(k, (0, 0, width, 0)), F.pad(v, (0, 0, width, 0))) for k, v in kv]
+    return kv, F.pad(mask, (width, 0))
+
+
+class ContinuousBatcher:
+    """
+    Greedy continuous batching over a Hugging Face causal LM.
+
+    `max_batch` is the number of decode slots. `timeline` records one entry per
+    forward pass: (start_s, end_s, request_ids_in_pass), relative to the first
+    submit() — attribute_timeline() turns it into per-request energy shares.
+
+    `on_retire(requests)` is called with the requests that finished in each
+    forward pass, as they finish, so callers can persist them mid-run.
+    """
+
+    def __init__(self, model, tokenizer, max_batch=8, max_new_tokens=200, eos_token_id=None,
+                 on_retire=None):
+        self.model          = model
+        self.tokenizer      = tokenizer
+        self.max_batch      = max_batch
+        self.max_new_tokens = max_new_tokens
+        self.device         = model.device
+        self.on_retire      = on_retire
+
+        eos = eos_token_id if eos_token_id is not None else model.generation_config.eos_token_id
+        if eos is None:
+            eos = tokenizer.eos_token_id
+        self.eos_ids = set(eos) if isinstance(eos, (list, tuple)) else {eos}
+
+        self.queue    = deque()
+        self.finished = []
+        self.timeline = []
+        self._epoch   = None
+        self._next_id = 1
+
+        # Batch state — one row per active slot
+        self._active = []
+        self._kv     = None     # list of (key, value), each [B, heads, T, head_dim]
+        self._mask   = None     # [B, T] — 0 over left padding
+        self._last   = None     # [B] — last emitted token per row
+
+    # ── queue ────────────────────────────────────────────────────────────────
+
+    def submit(self, prompt, request_id=None):
+        now = time.time()
+        if self._epoch is None:
+            self._epoch = now
+        if request_id is None:
+            request_id = self._next_id
+        self._next_id = max(self._next_id, request_id) + 1
+
+        ids = self.tokenizer(prompt)["input_ids"]
+        req = Request(request_id, prompt, list(ids), now)
+        self.queue.append(req)
+        return req
+
+    def run(self, prompts=None):
+        """Submit `prompts` (if given) and decode until every request is finished."""
+        for p in prompts or []:
+            self.submit(p)
+        while self.queue or self._active:
+            self.step()
+        return sorted(self.finished, key=lambda r: r.request_id)
+
+    # ── scheduling ───────────────────────────────────────────────────────────
+
+    def step(self):
+        """Fill free slots from the queue, then run one batched decode step."""
+        while self.queue and len(self._active) < self.max_batch:
+            self._admit(self.queue.popleft())
+        if self._active:
+            self._decode()
+
+    @torch.no_grad()
+    def _admit(self, req):
+        req.admitted_at = time.time()
+        ids = torch.tensor([req.input_ids], device=self.device)
+
+        _sync(self.device)
+        t0  = time.time()
+        out = self.model(
+            input_ids=ids,
+            attention_mask=torch.ones_like(ids),
+            past_key_values=DynamicCache(),
+            use_cache=True,
+        )
+        next_tok = out.logits[:, -1].argmax(dim=-1)
+        _sync(self.device)
+        t1 = time.time()
+
+        req.prefill_s      = t1 - t0
+        req.first_token_at = t1
+        self.timeline.append((t0 - self._epoch, t1 - self._epoch, (req.request_id,)))
+
+        kv   = list(out.past_key_values.to_legacy_cache())
+        mask = torch.ones_like(ids)
+
+        if self._active:
+            width = self._mask.shape[1] - mask.shape[1]
+            if width >= 0:
+                kv, mask = _pad_left(kv, mask, width)
+            else:
+                self._kv, self._mask = _pad_left(self._kv, self._mask, -width)
+            self._kv   = [(torch.cat([k0, k1]), torch.cat([v0, v1]))
+                          for (k0, v0), (k1, v1) in zip(self._kv, kv)]
+            self._mask = torch.cat([self._mask, mask])
+            self._last = torch.cat([self._last, next_tok])
+        else:
+            self._kv, self._mask, self._last = kv, mask, next_tok
+
+        self._active.append(req)
+        self._emit([next_tok.item()], t1)
+
+    @torch.no_grad()
+    def _decode(self):
+        mask = F.pad(self._mask, (0, 1), value=1)
+        pos  = (mask.sum(dim=1, keepdim=True) - 1)
+
+        _sync(self.device)
+        t0  = time.time()
+        out = self.model(
+            input_ids=self._last[:, None],
+            attention_mask=mask,
+            position_ids=pos,
+            past_key_values=DynamicCache.from_legacy_cache(tuple(self._kv)),
+            use_cache=True,
+        )
+        next_tok = out.logits[:, -1].argmax(dim=-1)
+        _sync(self.device)
+        t1 = time.time()
+
+        self.timeline.append((t0 - self._epoch, t1 - self._epoch,
+                              tuple(r.request_id for r in self._active)))
+        self._kv   = list(out.past_key_values.to_legacy_cache())
+        self._mask = mask
+        self._last = next_tok
+        self._emit(next_tok.tolist(), t1)
+
+    def _emit(self, tokens, now):
+        """Append freshly decoded tokens; retire rows that hit EOS or the token limit."""
+        rows = range(len(self._active) - len(tokens), len(self._active))
+        done = []
+        for row, tok in zip(rows, tokens):
+            req = self._active[row]
+            req.output_ids.append(tok)
+            if tok in self.eos_ids or len(req.output_ids) >= self.max_new_tokens:
+                req.finished_at = now
+                done.append(row)
+        if done:
+            self._retire(done)
+
+    def _retire(self, rows):
+        keep    = [i for i in range(len(self._active)) if i not in rows]
+        retired = [self._active[i] for i in rows]
+        self.finished.extend(retired)
+        self._active = [self._active[i] for i in keep]
+        if not keep:
+            self._kv = self._mask = self._last = None
+        else:
+            self._compact(keep)
+        if self.on_retire is not None:
+            self.on_retire(retired)
+
+    def _compact(self, keep):
+        """Keep only rows `keep` of the batch state."""
+        idx  = torch.tensor(keep, device=self.device)
+        mask = self._mask.index_select(0, idx)
+        # Drop leading columns that are padding for every remaining row
+        trim = int((mask.sum(dim=0) == 0).int().cumprod(dim=0).sum())
+        self._mask = mask[:, trim:]
+        self._kv   = [(k.index_select(0, idx)[:, :, trim:], v.index_select(0, idx)[:, :, trim:])
+                      for k, v in self._kv]
+        self._last = self._last.index_select(0, idx)
+
+    def decode(self, req):
+        return self.tokenizer.decode(req.output_ids, skip_special_tokens=True)
+
+
+def attribute_timeline(net_j, timeline):
+    """
+    Split net energy (J) over a run across requests, assuming constant power:
+    each forward pass's share of the run is divided equally among the requests
+    in it. Returns {request_id: joules}.
+    """
+    busy = sum(t1 - t0 for t0, t1, _ in timeline)
+    if busy <= 0:
+        return {}
+    shares = {}
+    for t0, t1, ids in timeline:
+        for rid in ids:
+            shares[rid] = shares.get(rid, 0.0) + (t1 - t0) / len(ids)
+    return {rid: net_j * s / busy for rid, s in shares.items()}
+
+
+if __name__ == "__main__":
+    # CPU self-check: continuous batching must reproduce sequential greedy
+    # generate() token-for-token on a tiny random Phi-3.
+    from .tiny import tiny_phi3
+
+    model, tokenizer = tiny_phi3(seed=0)
+    prompts = [
+        "What is a limit in calculus?",
+        "Explain photosynthesis.",
+        "What is recursion in programming? Give an example.",
+        "Who built the Silk Road?",
+        "Explain spaced repetition.",
+        "What is a prime number?",
+    ]
+    # A frequent byte acts as a second EOS so responses end at different steps
+    eos = {tokenizer.eos_token_id, tokenizer.convert_tokens_to_ids("e")}
+
+    retired = []
+    batcher = ContinuousBatcher(model, tokenizer, max_batch=3, max_new_tokens=24,
+                                eos_token_id=sorted(eos), on_retire=retired.extend)
+    done = batcher.run(prompts)
+    assert sorted(r.request_id for r in retired) == [r.request_id for r in done]
+
+    model.generation_config.eos_token_id = sorted(eos)
+    for req in done:
+        ids = torch.tensor([req.input_ids])
+        ref = model.generate(input_ids=ids, attention_mask=torch.ones_like(ids),
+                             max_new_tokens=24, do_sample=False,
+                             pad_token_id=tokenizer.pad_token_id)[0, ids.shape[1]:].tolist()
+        status = "ok" if ref == req.output_ids else "MISMATCH"
+        print(f"{req.request_id:>3} {len(req.output_ids):>3} tok {status:<8} {req.timings}")
+        assert ref == req.output_ids, (ref, req.output_ids)
+
+    shares = attribute_timeline(100.0, batcher.timeline)
+    print(f"Energy shares (100 J run): { {k: round(v, 1) for k, v in sorted(shares.items())} }")
@@ -0,0 +1,87 @@
+# ==============================================================================
+#  Persistent Q_ped score cache — SQLite, content-addressed
+#
+#  A judgment depends only on what the judge sees and who the judge is, so
+#  the key is SHA-256 over (prompt, response, system prompt, judge model).
+#  Re-exporting a sheet or re-running a scoring pass then costs no API calls
+#  for responses already scored; changing the rubric or the judge changes
+#  the key and forces a fresh judgment.
+#
+#  Entries past `max_entries` are evicted least-recently-used. Fallback
+#  scores from failed calls are never stored. One connection is shared
+#  across threads behind a lock (BackgroundScorer calls in from its own).
+# ==============================================================================
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+
+def score_key(prompt, response, system_prompt, model):
+    payload = json.dumps([prompt, response, system_prompt, model], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ScoreCache:
+    def __init__(self, path="score_cache.sqlite", max_entries=100_000):
+        self.path        = str(path)
+        self.max_entries = max_entries
+        self.hits        = 0
+        self.misses      = 0
+        self._lock       = threading.Lock()
+        self._conn       = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS scores ("
+            " key TEXT PRIMARY KEY, model TEXT, score INTEGER, reason TEXT,"
+            " created REAL, used REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS scores_used ON scores(used)")
+        self._conn.commit()
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM scores").fetchone()[0]
+
+    def get(self, key):
+        """(score, reason) for `key`, or None on a miss."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT score, reason FROM scores WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute("UPDATE scores SET used = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            return row[0], row[1]
+
+    def put(self, key, model, score, reason):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO scores VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, int(score), reason, now, now))
+            excess = self._conn.execute("SELECT COUNT(*) FROM scores").fetchone()[0] - self.max_entries
+            if excess > 0:
+                self._conn.execute(
+                    "DELETE FROM scores WHERE key IN "
+                    "(SELECT key FROM scores ORDER BY used LIMIT ?)", (excess,))
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
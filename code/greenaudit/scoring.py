@@ -0,0 +1,327 @@
+# ==============================================================================
+#  Q_ped auto-scoring — LLM judge calls, sequential or concurrent
+#
+#  score_response() is the original blocking call from cloud_scoring.py: one
+#  request per response, made inside the inference loop. Scoring 1000
+#  responses that way takes ~1000 × round-trip time, and the wall time lands
+#  in the same session as the energy measurements.
+#
+#  AsyncScorer runs many judge calls at once against an AsyncAnthropic client:
+#    concurrency  — asyncio.Semaphore bounding requests in flight
+#    rate_per_s   — token bucket bounding request starts (set from the
+#                   account's requests-per-minute limit / 60)
+#    retries      — 429 / 5xx / connection errors back off exponentially with
+#                   full jitter, honouring retry-after; a 429 also pauses the
+#                   bucket so the other in-flight workers back off too.
+#                   429 "insufficient_quota" is not retried — it cannot succeed
+#                   (see the GPT-4o rows in data/cloud_comparison_results.csv)
+#
+#  BackgroundScorer runs an AsyncScorer's event loop on a daemon thread, so a
+#  synchronous inference loop (or a Colab cell, which already has a running
+#  loop) can submit() a response and collect a concurrent.futures.Future.
+#
+#  Pass cache=ScoreCache(...) (score_cache.py) to either path to look every
+#  judgment up before calling the API and store the ones that succeed.
+#
+#  Construct the client with max_retries=0 so retries happen here, where the
+#  token bucket can see them:
+#    anthropic.AsyncAnthropic(api_key=..., max_retries=0)
+#
+#  FakeJudge is a local stand-in for the API (latency, server-side rate limit,
+#  429s with retry-after). Self-check, no network (from code/):
+#    python -m greenaudit.scoring
+# ==============================================================================
+
+import asyncio
+import json
+import random
+import threading
+import time
+
+from .score_cache import score_key
+
+SCORING_MODEL = "claude-haiku-4-5-20251001"   # Fast and cheap for scoring
+
+SCORING_SYSTEM_PROMPT = """You are an expert educational evaluator assessing AI tutor responses.
+
+Score the response on a scale of 1-10 using this rubric:
+- 9-10: Correct, clear, age-appropriate, includes analogy or example, well scaffolded
+- 7-8:  Mostly correct, clear, minor omissions or slightly unclear
+- 5-6:  Partially correct, some confusion or missing key ideas
+- 3-4:  Mostly incorrect or unclear, but some relevant content present
+- 1-2:  Incorrect, irrelevant, or incomprehensible
+
+Respond with ONLY a JSON object in this exact format:
+{"score": 8, "reason": "one sentence explanation"}"""
+
+FALLBACK_SCORE = (7, "scoring_failed")   # Conservative fallback, as in the original loop
+
+
+def _request(prompt, response, model):
+    return dict(
+        model=model,
+        max_tokens=100,
+        system=SCORING_SYSTEM_PROMPT,
+        messages=[{
+            "role": "user",
+            "content": f"PROMPT: {prompt}\n\nAI RESPONSE: {response}"
+        }],
+    )
+
+
+def parse_score(message):
+    """(score, reason) from a judge reply in the SCORING_SYSTEM_PROMPT JSON format."""
+    parsed = json.loads(message.content[0].text.strip())
+    return int(parsed["score"]), parsed.get("reason", "")
+
+
+def score_response(prompt, response, client, model=SCORING_MODEL, cache=None):
+    """Auto-score a response using Claude (blocking). Returns (score, reason)."""
+    key = score_key(prompt, response, SCORING_SYSTEM_PROMPT, model)
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+    try:
+        result = parse_score(client.messages.create(**_request(prompt, response, model)))
+    except Exception as e:
+        print(f"  Scoring error: {e}")
+        return FALLBACK_SCORE
+    if cache is not None:
+        cache.put(key, model, *result)
+    return result
+
+
+# ── Retry classification ─────────────────────────────────────────────────────
+
+RETRY_STATUS = {408, 409, 429, 500, 502, 503, 504, 529}
+
+
+def _status(exc):
+    return getattr(exc, "status_code", None)
+
+
+def is_retryable(exc):
+    status = _status(exc)
+    if status == 429:
+        return "insufficient_quota" not in str(exc)
+    if status in RETRY_STATUS:
+        return True
+    # anthropic.APIConnectionError / APITimeoutError carry no status code
+    return type(exc).__name__ in ("APIConnectionError", "APITimeoutError") or \
+        isinstance(exc, (ConnectionError, asyncio.TimeoutError))
+
+
+def retry_after(exc):
+    """Seconds from a retry-after header, if the error carries one."""
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+# ── Concurrent scorer ─────────────────────────────────────────────────────────
+
+class TokenBucket:
+    """`rate` request starts per second with bursts of up to `burst`; hold() pauses it."""
+
+    def __init__(self, rate, burst=None):
+        self.rate       = float(rate)
+        self.capacity   = float(burst or max(1.0, rate))
+        self.tokens     = self.capacity
+        self._t         = time.monotonic()
+        self._held_till = 0.0
+        self._lock      = asyncio.Lock()
+
+    def hold(self, seconds):
+        self._held_till = max(self._held_till, time.monotonic() + seconds)
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._held_till:
+                    await asyncio.sleep(self._held_till - now)
+                    continue
+                self.tokens = min(self.capacity, self.tokens + (now - self._t) * self.rate)
+                self._t = now
+                if self.tokens >= 1.0:
+                    self.tokens -= 1.0
+                    return
+                await asyncio.sleep((1.0 - self.tokens) / self.rate)
+
+
+class AsyncScorer:
+    def __init__(self, client, concurrency=8, rate_per_s=1.0, burst=None,
+                 max_retries=6, base_delay=1.0, max_delay=60.0, model=SCORING_MODEL,
+                 cache=None):
+        self.client      = client
+        self.model       = model
+        self.cache       = cache
+        self.max_retries = max_retries
+        self.base_delay  = base_delay
+        self.max_delay   = max_delay
+        self.bucket      = TokenBucket(rate_per_s, burst)
+        self._sem        = asyncio.Semaphore(concurrency)
+        self.calls       = 0     # successful judge calls
+        self.retries     = 0
+        self.failures    = 0     # rows that fell back to FALLBACK_SCORE
+
+    async def score(self, prompt, response):
+        """(score, reason) for one response; FALLBACK_SCORE once retries run out."""
+        key = score_key(prompt, response, SCORING_SYSTEM_PROMPT, self.model)
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        result = await self._call(prompt, response)
+        if self.cache is not None and result is not FALLBACK_SCORE:
+            self.cache.put(key, self.model, *result)
+        return result
+
+    async def _call(self, prompt, response):
+        async with self._sem:
+            for attempt in range(self.max_retries + 1):
+                await self.bucket.acquire()
+                try:
+                    message = await self.client.messages.create(
+                        **_request(prompt, response, self.model))
+                    self.calls += 1
+                    return parse_score(message)
+                except Exception as e:
+                    if attempt == self.max_retries or not is_retryable(e):
+                        self.failures += 1
+                        print(f"  Scoring error: {e}")
+                        return FALLBACK_SCORE
+                    delay = retry_after(e)
+                    if delay is None:
+                        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+                    if _status(e) == 429:
+                        self.bucket.hold(delay)
+                    self.retries += 1
+                    await asyncio.sleep(delay)
+
+    async def score_many(self, pairs):
+        """Scores (prompt, response) pairs concurrently; results in input order."""
+        return await asyncio.gather(*(self.score(p, r) for p, r in pairs))
+
+
+class BackgroundScorer:
+    """
+    Runs `scorer` on its own event loop in a daemon thread. submit() returns a
+    concurrent.futures.Future resolving to (score, reason).
+    """
+
+    def __init__(self, scorer):
+        self.scorer  = scorer
+        self._loop   = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever,
+                                        name="BackgroundScorer", daemon=True)
+        self._thread.start()
+
+    def submit(self, prompt, response):
+        return asyncio.run_coroutine_threadsafe(self.scorer.score(prompt, response), self._loop)
+
+    def map(self, pairs):
+        """Blocking: scores every pair concurrently, results in input order."""
+        return [f.result() for f in [self.submit(p, r) for p, r in pairs]]
+
+    def close(self):
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ── Local stand-in for the judge API ──────────────────────────────────────────
+
+class FakeStatusError(Exception):
+    def __init__(self, status_code, message, retry_after_s=None):
+        super().__init__(f"Error code: {status_code} - {message}")
+        self.status_code = status_code
+        headers = {} if retry_after_s is None else {"retry-after": f"{retry_after_s:.3f}"}
+        self.response = type("Response", (), {"headers": headers})()
+
+
+class FakeJudge:
+    """
+    Async stand-in for AsyncAnthropic: `client.messages.create(**kwargs)`.
+
+    Each call sleeps `latency_s` and returns a deterministic score derived
+    from the request text. Calls beyond `limit_per_s` starts in the trailing
+    second are rejected with a 429 carrying retry-after, like the real API.
+    """
+
+    def __init__(self, latency_s=0.2, limit_per_s=None, seed=0):
+        self.latency_s     = latency_s
+        self.limit_per_s   = limit_per_s
+        self.seed          = seed
+        self.messages      = self
+        self.requests      = 0
+        self.rejected      = 0
+        self.in_flight     = 0
+        self.max_in_flight = 0
+        self._starts       = []
+
+    async def create(self, **kwargs):
+        self.requests += 1
+        now = time.monotonic()
+        if self.limit_per_s is not None:
+            self._starts = [t for t in self._starts if now - t < 1.0]
+            if len(self._starts) >= self.limit_per_s:
+                self.rejected += 1
+                raise FakeStatusError(429, "rate_limit_error",
+                                      retry_after_s=1.0 - (now - self._starts[0]))
+            self._starts.append(now)
+
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency_s)
+        finally:
+            self.in_flight -= 1
+
+        text  = kwargs["messages"][0]["content"]
+        score = 1 + random.Random(f"{self.seed}:{text}").randrange(10)
+        reply = json.dumps({"score": score, "reason": "fake judge"})
+        return type("Message", (), {"content": [type("Block", (), {"text": reply})()]})()
+
+
+if __name__ == "__main__":
+    # Self-check: 1000 responses against a fake judge with 0.2 s latency and
+    # a 100 req/s server limit. Sequentially this would take ~200 s.
+    pairs = [(f"prompt {i}", f"response {i}") for i in range(1000)]
+
+    judge  = FakeJudge(latency_s=0.2, limit_per_s=100)
+    scorer = AsyncScorer(judge, concurrency=32, rate_per_s=120, burst=10, base_delay=0.1)
+    t0 = time.time()
+    with BackgroundScorer(scorer) as bg:
+        scores = bg.map(pairs)
+    wall = time.time() - t0
+
+    print(f"{len(scores)} scored in {wall:.1f}s — {judge.rejected} × 429, "
+          f"{scorer.retries} retries, {scorer.failures} failures, "
+          f"max {judge.max_in_flight} in flight")
+    assert scorer.failures == 0 and judge.max_in_flight <= 32
+    assert scores == asyncio.run(AsyncScorer(FakeJudge(latency_s=0), rate_per_s=1e6)
+                                 .score_many(pairs))
+
+    # Second pass through a ScoreCache makes no judge calls at all
+    import os
+    import tempfile
+    from .score_cache import ScoreCache
+
+    with tempfile.TemporaryDirectory() as tmp, \
+            ScoreCache(os.path.join(tmp, "scores.sqlite")) as cache:
+        for _ in range(2):
+            judge = FakeJudge(latency_s=0)
+            again = asyncio.run(AsyncScorer(judge, rate_per_s=1e6, cache=cache).score_many(pairs))
+        print(f"Cached rerun: {judge.requests} judge calls, {cache.hits} hits / "
+              f"{cache.misses} misses")
+        assert again == scores and judge.requests == 0
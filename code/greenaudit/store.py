@@ -0,0 +1,182 @@
+# ==============================================================================
+#  Results store — partitioned Parquet, numeric runs apart from response text
+#
+#  Cross-platform analyses re-parse every results CSV, including the 500
+#  full Response texts per T4 and Windows file, to use a handful of numeric
+#  columns. build_store() converts the files in analysis.SOURCES once into
+#  two hive-partitioned Parquet datasets under cache_dir()/results_store:
+#
+#    runs/platform=<key>/precision=<p>/use_cache=<bool>/*.parquet
+#        ID, Category, Output_Tokens ... Q_ped, LpW      (numeric, typed)
+#    responses/platform=<key>/precision=<p>/use_cache=<bool>/*.parquet
+#        ID, Prompt, Response                           (text only)
+#
+#  read_runs(columns, filters) reads through pyarrow.dataset: only the
+#  requested columns are decoded (projection), and filters on the partition
+#  keys skip whole directories while filters on other columns are checked
+#  against row-group statistics (predicate pushdown). read_responses() reads
+#  the text with the same keys; merge on (platform, precision, use_cache, ID).
+#
+#  The store records the (path, mtime, size) of every source file and is
+#  rebuilt when any of them changes, like the prompt cache in prompts.py.
+#  Needs pyarrow (pip install pyarrow). Self-check (from code/):
+#    python -m greenaudit.store
+# ==============================================================================
+
+import json
+import os
+import shutil
+
+from .analysis import NUMERIC_COLUMNS, TEXT_COLUMNS, load_results, source_files
+from .prompts import DATA_DIR, cache_dir
+
+PARTITIONS = ["platform", "precision", "use_cache"]
+
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("The results store needs pyarrow: pip install pyarrow") from e
+    return pa, ds, pq
+
+
+def store_dir():
+    return os.path.join(cache_dir(), "results_store")
+
+
+def _signature(root=None, sources=None):
+    base = root or os.path.dirname(DATA_DIR)
+    return [[os.path.relpath(path, base), os.stat(path).st_mtime_ns, os.stat(path).st_size]
+            for path, *_ in source_files(root, sources)]
+
+
+def _manifest(path):
+    try:
+        with open(os.path.join(path, "manifest.json"), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def build_store(path=None, root=None, sources=None, refresh=False):
+    """Writes the store unless it is current for the source files. Returns its directory."""
+    pa, _, pq = _pyarrow()
+    path = path or store_dir()
+    signature = _signature(root, sources)
+    manifest = _manifest(path)
+    if manifest and manifest["sources"] == signature and not refresh:
+        return path
+
+    df = load_results(root, sources, text=True)
+    df = df.rename(columns={"Key": "platform", "Precision": "precision"})
+    df["platform"]  = df["platform"].astype(str)
+    df["precision"] = df["precision"].astype(str)
+    df["Category"]  = df["Category"].astype(str)
+    platforms = df.drop_duplicates("platform").set_index("platform")["Platform"].astype(str)
+
+    tmp = f"{path}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    runs = df[PARTITIONS + ["ID", "Category", *NUMERIC_COLUMNS]]
+    pq.write_to_dataset(pa.Table.from_pandas(runs, preserve_index=False),
+                        os.path.join(tmp, "runs"), partition_cols=PARTITIONS)
+    text = df[PARTITIONS + ["ID", *TEXT_COLUMNS]].dropna(subset=TEXT_COLUMNS, how="all")
+    if len(text):
+        pq.write_to_dataset(pa.Table.from_pandas(text, preserve_index=False),
+                            os.path.join(tmp, "responses"), partition_cols=PARTITIONS)
+    with open(os.path.join(tmp, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump({"sources": signature, "rows": len(df),
+                   "platforms": platforms.to_dict()}, f, indent=2)
+
+    old = f"{path}.{os.getpid()}.old"
+    if os.path.exists(path):
+        os.replace(path, old)
+    os.replace(tmp, path)
+    shutil.rmtree(old, ignore_errors=True)
+    return path
+
+
+def _dataset(path, name):
+    pa, ds, _ = _pyarrow()
+    partitioning = ds.partitioning(
+        pa.schema([("platform", pa.string()), ("precision", pa.string()),
+                   ("use_cache", pa.bool_())]), flavor="hive")
+    return ds.dataset(os.path.join(path, name), format="parquet", partitioning=partitioning)
+
+
+def _expression(filters):
+    """{"platform": "Ultra5_125H", "precision": ["FP16", "NF4"], ...} → dataset expression."""
+    _, ds, _ = _pyarrow()
+    expr = None
+    for column, value in (filters or {}).items():
+        if isinstance(value, (list, tuple, set)):
+            term = ds.field(column).isin(list(value))
+        else:
+            term = ds.field(column) == value
+        expr = term if expr is None else expr & term
+    return expr
+
+
+def read_runs(columns=None, filters=None, path=None):
+    """
+    Numeric run rows as a DataFrame. columns: which columns to read (partition
+    keys and ID are always included); filters: {column: value or list of
+    values}, or a pyarrow.dataset expression.
+    """
+    path = build_store(path) if path is None else path
+    keep = None
+    if columns is not None:
+        keep = list(dict.fromkeys(PARTITIONS + ["ID", *columns]))
+    expr = filters if not isinstance(filters, dict) else _expression(filters)
+    return _dataset(path, "runs").to_table(columns=keep, filter=expr).to_pandas()
+
+
+def read_responses(filters=None, path=None):
+    """Prompt / Response text for the filtered runs, keyed like read_runs()."""
+    path = build_store(path) if path is None else path
+    if not os.path.isdir(os.path.join(path, "responses")):
+        return None
+    expr = filters if not isinstance(filters, dict) else _expression(filters)
+    return _dataset(path, "responses").to_table(filter=expr).to_pandas()
+
+
+if __name__ == "__main__":
+    # Self-check: build a store of the repository's results in a temporary
+    # directory, read a projected / filtered slice, compare with the CSVs
+    import tempfile
+    import time
+
+    import numpy as np
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = os.path.join(tmp, "results_store")
+        t0 = time.perf_counter()
+        build_store(store)
+        built = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        assert build_store(store) == store                       # current: no rebuild
+        reused = time.perf_counter() - t0
+
+        full = load_results()
+        t0 = time.perf_counter()
+        lpw = read_runs(["LpW", "Latency_s"], {"precision": ["Q4_K_M", "F16_GGUF"],
+                                               "use_cache": True}, path=store)
+        read = time.perf_counter() - t0
+        assert set(lpw.columns) == {"platform", "precision", "use_cache", "ID", "LpW", "Latency_s"}
+        expected = full[full.Precision.isin(["Q4_K_M", "F16_GGUF"]) & full.use_cache]
+        assert len(lpw) == len(expected)
+        assert np.isclose(lpw.LpW.mean(), expected.LpW.mean())
+
+        t4 = read_runs(filters={"platform": "T4_kvcache_false"}, path=store)
+        assert len(t4) == 1000 and not t4.use_cache.any()
+
+        text = read_responses({"platform": "T4_kvcache_true", "precision": "NF4"}, path=store)
+        assert len(text) == 500 and text.Response.notna().all()
+
+        size = sum(os.path.getsize(os.path.join(d, f))
+                   for d, _, files in os.walk(store) for f in files)
+        print(f"store {size / 1e6:.1f} MB, built in {built * 1000:.0f} ms, "
+              f"reused in {reused * 1000:.1f} ms; {len(lpw)} rows × 2 columns "
+              f"read in {read * 1000:.1f} ms")
@@ -0,0 +1,122 @@
+# ==============================================================================
+#  Per-token timing — time-to-first-token and inter-token latency
+#
+#  Latency_s lumps prefill and decode together. These helpers timestamp every
+#  generated token so the two can be reported separately:
+#
+#    TTFT_s                — request start → first token (prefill + 1 step)
+#    ITL_mean_s, ITL_p95_s — gaps between consecutive tokens
+#    Decode_Tokens_per_sec — tokens after the first / time after the first
+#
+#  transformers: pass TokenClock() in generate(logits_processor=...). It is
+#                called once per decode step, right after that step's forward
+#                pass, and returns the scores untouched.
+#  llama.cpp:    stream_llama() drives Llama(..., stream=True) and stamps each
+#                streamed chunk.
+#  Self-check (from code/):
+#    python -m greenaudit.streaming
+# ==============================================================================
+
+import time
+
+import numpy as np
+
+TOKEN_TIMING_COLUMNS = ["TTFT_s", "ITL_mean_s", "ITL_p95_s", "Decode_Tokens_per_sec"]
+
+
+class TokenClock:
+    """Pass-through logits processor that records one timestamp per decode step."""
+
+    def __init__(self):
+        self.stamps = []
+
+    def __call__(self, input_ids, scores):
+        if scores.is_cuda:
+            import torch
+            torch.cuda.synchronize()
+        self.stamps.append(time.time())
+        return scores
+
+
+def token_latency_stats(t0, stamps):
+    """Summarise per-token timestamps (absolute, same clock as t0) into row columns."""
+    if not stamps:
+        return dict.fromkeys(TOKEN_TIMING_COLUMNS)
+
+    ttft = stamps[0] - t0
+    gaps = np.diff(stamps)
+    if gaps.size == 0:
+        return {"TTFT_s": round(ttft, 4), "ITL_mean_s": None, "ITL_p95_s": None,
+                "Decode_Tokens_per_sec": None}
+
+    decode_s = stamps[-1] - stamps[0]
+    return {
+        "TTFT_s":                round(ttft, 4),
+        "ITL_mean_s":            round(float(gaps.mean()), 5),
+        "ITL_p95_s":             round(float(np.percentile(gaps, 95)), 5),
+        "Decode_Tokens_per_sec": round(gaps.size / decode_s, 2) if decode_s > 0 else None,
+    }
+
+
+def stream_llama(llm, prompt, **kwargs):
+    """
+    Run a llama_cpp.Llama completion with stream=True, timestamping each chunk.
+
+    Returns a dict with text, completion_tokens, prompt_tokens, started_at,
+    latency_s and the token_latency_stats() columns. llama.cpp streams one chunk per token,
+    except that bytes of an incomplete UTF-8 character are held back and
+    arrive merged with the next chunk, so the stamps are per chunk while
+    completion_tokens re-tokenizes the text (like the non-streamed "usage").
+    """
+    prompt_tokens = len(llm.tokenize(prompt.encode("utf-8")))
+    pieces, stamps = [], []
+
+    t0 = time.time()
+    for chunk in llm(prompt, stream=True, **kwargs):
+        text = chunk["choices"][0]["text"]
+        if text:                        # the closing chunk carries only finish_reason
+            stamps.append(time.time())
+            pieces.append(text)
+    latency = time.time() - t0
+
+    text = "".join(pieces)
+    return {
+        "text":              text,
+        "completion_tokens": len(llm.tokenize(text.encode("utf-8"), add_bos=False)),
+        "prompt_tokens":     prompt_tokens,
+        "started_at":        t0,
+        "latency_s":         latency,
+        **token_latency_stats(t0, stamps),
+    }
+
+
+if __name__ == "__main__":
+    # Self-check: the summary statistics on known stamps, and stream_llama on
+    # a fake Llama whose multi-byte character arrives as one merged chunk
+    stats = token_latency_stats(100.0, [100.5, 100.6, 100.7, 101.0])
+    assert stats["TTFT_s"] == 0.5
+    assert abs(stats["ITL_mean_s"] - 0.16667) < 1e-9
+    assert 0.1 < stats["ITL_p95_s"] <= 0.3
+    assert stats["Decode_Tokens_per_sec"] == 6.0                   # 3 gaps over 0.5 s
+    assert token_latency_stats(100.0, []) == dict.fromkeys(TOKEN_TIMING_COLUMNS)
+    assert token_latency_stats(100.0, [100.25]) == {
+        "TTFT_s": 0.25, "ITL_mean_s": None, "ITL_p95_s": None, "Decode_Tokens_per_sec": None}
+
+    class FakeLlama:
+        """Tokens are whitespace-separated words; "é" streams as 2 tokens in 1 chunk."""
+
+        def tokenize(self, text, add_bos=True):
+            words = text.decode("utf-8").replace("é", "é é").split()
+            return [0] * add_bos + list(range(1, len(words) + 1))
+
+        def __call__(self, prompt, stream=False, **kwargs):
+            for piece in ["Hello", " world", " é", " again", ""]:
+                time.sleep(0.01)
+                yield {"choices": [{"text": piece}]}
+
+    gen = stream_llama(FakeLlama(), "one two three")
+    assert gen["text"] == "Hello world é again"
+    assert gen["prompt_tokens"] == 4                               # BOS + 3 words
+    assert gen["completion_tokens"] == 5                           # not the 4 chunks
+    assert gen["TTFT_s"] >= 0.01 and gen["ITL_mean_s"] >= 0.01
+    print("streaming ok", gen)
@@ -0,0 +1,328 @@
+# ==============================================================================
+#  Configuration sweep — a matrix of runs, one fresh process per block
+#
+#  FP16 vs NF4, F16 vs Q4_K_M, thread counts and batch sizes were compared by
+#  editing a script's CONFIG and running it again, hours apart. run_sweep()
+#  takes the matrix instead:
+#
+#    backend        "transformers" | "llama.cpp" | "mock" (greenaudit/backends.py)
+#    precision      FP16 / NF4 (transformers), F16 / Q4_K_M (llama.cpp)
+#    max_new_tokens, n_threads, n_ctx, use_cache, batch_size
+#
+#  expand() takes the cartesian product, dropping combinations a backend
+#  cannot run (llama.cpp decodes one prompt at a time with its KV cache on).
+#
+#  Process isolation: every (cell, block) runs in a new interpreter
+#  (python -m greenaudit.sweep --worker spec.json), so no allocator state,
+#  CUDA context or page cache left by one model leaks into the next cell.
+#
+#  Interleaving: the prompt set is split into `blocks` chunks and the cells
+#  take turns chunk by chunk, in ABBA order (cell order reversed on every
+#  other block). Every cell then samples the same stretch of the session, so
+#  thermal and idle drift shift all cells alike instead of biasing whichever
+#  ran last. Each worker warms up and measures its own idle baseline first.
+#
+#  batch_size 1 cells go through backends.measure_prompt(), streamed by
+#  default, so their rows carry the same TTFT / inter-token columns as a
+#  single run's; batched cells use generate_batch() and attribute energy.
+#
+#  Rows go to one journal per cell; combine() stacks them with the cell's
+#  parameters into sweep_results.csv. --resume skips finished blocks.
+#
+#  dry_run swaps every cell's backend for "mock" (throughput modelled from the
+#  cell's parameters, synthetic power) to check a matrix end to end without
+#  models or meters. Self-check (from code/):
+#    python -m greenaudit.sweep
+# ==============================================================================
+
+import itertools
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from .backends import BACKENDS, DEFAULT_MODEL_ID, load_backend, measure_prompt
+from .journal import Journal, compact
+from .prompts import load_prompts
+
+CODE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SWEEP_KEYS = ["backend", "precision", "max_new_tokens", "n_threads", "n_ctx",
+              "use_cache", "batch_size"]
+
+DEFAULTS = {"max_new_tokens": 200, "n_threads": None, "n_ctx": 2048,
+            "use_cache": True, "batch_size": 1}
+
+
+# ── Matrix ────────────────────────────────────────────────────────────────────
+
+def _as_list(v):
+    return list(v) if isinstance(v, (list, tuple)) else [v]
+
+
+def expand(matrix):
+    """
+    Cells of the matrix, in product order. Each key takes a value or a list;
+    "precision" may also be {backend: [precisions]}.
+    """
+    unknown = set(matrix) - set(SWEEP_KEYS)
+    if unknown:
+        raise KeyError(f"Unknown sweep keys {sorted(unknown)} — choose from {SWEEP_KEYS}")
+    spec = {**DEFAULTS, **matrix}
+    cells = []
+    for backend in _as_list(spec["backend"]):
+        precisions = spec["precision"]
+        if isinstance(precisions, dict):
+            precisions = precisions.get(backend, [])
+        rest = [_as_list(spec[k]) for k in SWEEP_KEYS[2:]]
+        for precision, *values in itertools.product(_as_list(precisions), *rest):
+            cell = dict(zip(SWEEP_KEYS, [backend, precision, *values]))
+            reason = invalid(cell)
+            if reason:
+                print(f"  skipping {cell_id(cell)}: {reason}")
+                continue
+            cells.append(cell)
+    return cells
+
+
+def invalid(cell):
+    """Why `cell` cannot run, or None."""
+    if cell["backend"] == "llama.cpp":
+        if cell["batch_size"] != 1:
+            return "llama.cpp decodes one prompt at a time"
+        if not cell["use_cache"]:
+            return "llama.cpp always decodes with its KV cache"
+    if cell["backend"] not in BACKENDS:
+        return f"unknown backend {cell['backend']!r}"
+    return None
+
+
+def cell_id(cell):
+    threads = cell["n_threads"] if cell["n_threads"] is not None else "auto"
+    return (f"{cell['backend']}-{cell['precision']}-tok{cell['max_new_tokens']}"
+            f"-th{threads}-ctx{cell['n_ctx']}-kv{int(bool(cell['use_cache']))}"
+            f"-bs{cell['batch_size']}")
+
+
+def schedule(n_cells, n_items, blocks):
+    """[(cell_index, block, item_indices)] in run order — ABBA across blocks."""
+    order = []
+    for b, chunk in enumerate(np.array_split(np.arange(n_items), blocks)):
+        if chunk.size == 0:
+            continue
+        cells = range(n_cells) if b % 2 == 0 else reversed(range(n_cells))
+        order += [(c, b, chunk.tolist()) for c in cells]
+    return order
+
+
+# ── Orchestrator ──────────────────────────────────────────────────────────────
+
+def run_sweep(matrix, out_dir, corpus="kvtrue500", ids=None, blocks=4, models=None,
+              energy="none", idle_seconds=10, warmup_max=6, dry_run=False, resume=False,
+              stream=True):
+    """
+    Runs every cell of `matrix` over the prompts (`corpus`, optionally only
+    `ids`), interleaved in `blocks`, and returns the combined results table.
+    models: {"transformers": model_id, "llama.cpp": {precision: gguf_path}}.
+    stream: per-token timing columns for batch_size 1 cells.
+    """
+    cells = expand(matrix)
+    if dry_run:
+        cells  = [{**c, "backend": "mock"} for c in cells]
+        energy = "mock"
+    prompt_ids = load_prompts(corpus, ids=ids)["ID"].tolist()
+    os.makedirs(os.path.join(out_dir, "specs"), exist_ok=True)
+
+    journals = [os.path.join(out_dir, f"{cell_id(c)}.journal.jsonl") for c in cells]
+    if not resume:
+        for path in journals:
+            Journal(path).close()               # moves earlier results aside
+    order = schedule(len(cells), len(prompt_ids), blocks)
+
+    print(f"Sweep: {len(cells)} cells × {len(prompt_ids)} prompts in {blocks} blocks "
+          f"→ {len(order)} worker processes{' (dry run)' if dry_run else ''}")
+    t_start = time.time()
+    for n, (c, b, items) in enumerate(order, start=1):
+        block_ids = [prompt_ids[i] for i in items]
+        with Journal(journals[c], resume=True) as journal:
+            todo = [i for i in block_ids if i not in journal.done]
+        if not todo:
+            continue
+        spec = {
+            "cell": cells[c], "block": b, "corpus": corpus, "ids": todo,
+            "journal": journals[c], "models": models or {}, "energy": energy,
+            "idle_seconds": idle_seconds, "warmup_max": warmup_max, "stream": stream,
+        }
+        spec_path = os.path.join(out_dir, "specs", f"{cell_id(cells[c])}-b{b}.json")
+        with open(spec_path, "w") as f:
+            json.dump(spec, f, indent=2)
+        print(f"\n[{n}/{len(order)}] {cell_id(cells[c])}  block {b + 1}/{blocks}  "
+              f"({len(todo)} prompts)")
+        subprocess.run([sys.executable, "-m", "greenaudit.sweep", "--worker", spec_path],
+                       cwd=CODE_DIR, check=True)
+    print(f"\nSweep finished in {time.time() - t_start:.0f}s")
+    return combine(cells, journals, out_dir)
+
+
+def combine(cells, journals, out_dir):
+    """Per-cell journals → one table with the cell parameters as columns."""
+    frames = []
+    for cell, path in zip(cells, journals):
+        df = compact(path, os.path.splitext(path)[0].replace(".journal", "") + ".csv")
+        if df.empty:
+            continue
+        for k in reversed(SWEEP_KEYS):
+            df.insert(0, k, cell[k])
+        df.insert(0, "Cell", cell_id(cell))
+        frames.append(df)
+    table = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    table.to_csv(os.path.join(out_dir, "sweep_results.csv"), index=False)
+    return table
+
+
+def summarize(table):
+    """Mean latency, throughput and energy per cell."""
+    agg = {"n": ("ID", "count"), "Latency_s": ("Latency_s", "mean"),
+           "Tokens_per_sec": ("Tokens_per_sec", "mean")}
+    if "Net_Energy_J" in table:
+        agg.update(Net_Energy_J=("Net_Energy_J", "mean"), Power_W=("Power_W", "mean"))
+    return table.groupby("Cell", sort=False).agg(**agg).round(3)
+
+
+# ── Worker ────────────────────────────────────────────────────────────────────
+
+def _backend(cell, models):
+    """The cell's greenaudit.backends adapter, loaded."""
+    common = dict(max_new_tokens=cell["max_new_tokens"], n_threads=cell["n_threads"])
+    if cell["backend"] == "mock":
+        return load_backend("mock", precision=cell["precision"], use_cache=cell["use_cache"],
+                            **common)
+    if cell["backend"] == "llama.cpp":
+        return load_backend("llama.cpp", model_path=models["llama.cpp"][cell["precision"]],
+                            n_ctx=cell["n_ctx"], **common)
+    return load_backend("transformers", model_id=models.get("transformers", DEFAULT_MODEL_ID),
+                        precision=cell["precision"], use_cache=cell["use_cache"], **common)
+
+
+def _open_meter(energy, backend):
+    """(meter, close) for the worker's energy source; (None, no-op) for "none"."""
+    from .power import (PowerSampler, SamplerMeter, SyntheticPower, NvmlPower,
+                        CodecarbonMeter)
+    if energy == "none":
+        return None, lambda: None
+    if energy == "mock":
+        sampler = PowerSampler(SyntheticPower(backend.watts), hz=200).start()
+        return SamplerMeter(sampler), sampler.stop
+    if energy == "nvml":
+        sampler = PowerSampler(NvmlPower(), hz=50).start()
+        return SamplerMeter(sampler), sampler.stop
+    if energy == "rapl":
+        from .rapl import RaplReader, RaplMeter
+        reader = RaplReader()
+        return RaplMeter(reader), reader.close
+    if energy == "codecarbon":
+        from codecarbon import EmissionsTracker
+        tracker = EmissionsTracker(measure_power_secs=1, save_to_file=False, log_level="error")
+        tracker.start()
+        return CodecarbonMeter(tracker), tracker.stop
+    raise ValueError(f"Unknown energy source {energy!r}")
+
+
+def run_block(spec):
+    """Worker: one block of one cell, appended to the cell's journal."""
+    from .idle import meter_idle_watts
+    from .warmup import warm_up
+
+    cell = spec["cell"]
+    rows = load_prompts(spec["corpus"], ids=spec["ids"])
+    backend = _backend(cell, spec["models"])
+
+    warm_up(lambda p: backend.generate(p)["Output_Tokens"],
+            max_prompts=spec["warmup_max"])
+    meter, close_meter = _open_meter(spec["energy"], backend)
+    idle_w = meter_idle_watts(meter, spec["idle_seconds"]) if meter else 0.0
+
+    with Journal(spec["journal"], resume=True) as journal:
+        if cell["batch_size"] == 1:
+            for _, prompt in rows.iterrows():
+                row = measure_prompt(backend, prompt["Prompt"], meter, idle_w,
+                                     stream=spec.get("stream", True))
+                record = {
+                    "ID":       int(prompt["ID"]),
+                    "Category": prompt["Category"],
+                    "Prompt":   prompt["Prompt"],
+                    **row,
+                    "Block":    spec["block"],
+                }
+                if meter:
+                    record["Idle_W"] = round(idle_w, 3)
+                journal.append(record)
+                print(f"  {record['ID']:>4} {record['Category']:<16} {record['Latency_s']:>7.2f}s "
+                      f"{record['Tokens_per_sec']:>7.1f} tok/s")
+        else:
+            for start in range(0, len(rows), cell["batch_size"]):
+                batch = rows.iloc[start:start + cell["batch_size"]]
+                if meter:
+                    meter.begin()
+                t0 = time.time()
+                out, wall, weights = backend.generate_batch(batch["Prompt"].tolist())
+                gross_j = meter.end(t0, t0 + wall) if meter else None
+
+                for (_, prompt), row, w in zip(batch.iterrows(), out, weights):
+                    latency = row["Latency_s"]
+                    record = {
+                        "ID":             int(prompt["ID"]),
+                        "Category":       prompt["Category"],
+                        "Prompt":         prompt["Prompt"],
+                        "Response":       row["Response"],
+                        "Input_Tokens":   int(row["Input_Tokens"]),
+                        "Output_Tokens":  int(row["Output_Tokens"]),
+                        "Latency_s":      round(latency, 4),
+                        "Tokens_per_sec": round(row["Output_Tokens"] / latency, 2) if latency > 0 else 0.0,
+                        "Block":          spec["block"],
+                    }
+                    if meter:
+                        net_j = max((gross_j - idle_w * wall) * w, 0.01)
+                        record.update({
+                            "Gross_Energy_J": round(gross_j * w, 4),
+                            "Net_Energy_J":   round(net_j, 4),
+                            "Power_W":        round(net_j / latency, 2) if latency > 0 else 0.0,
+                            "Idle_W":         round(idle_w, 3),
+                        })
+                    journal.append(record)
+                    print(f"  {record['ID']:>4} {record['Category']:<16} {latency:>7.2f}s "
+                          f"{record['Tokens_per_sec']:>7.1f} tok/s")
+    close_meter()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3 and sys.argv[1] == "--worker":
+        with open(sys.argv[2]) as f:
+            run_block(json.load(f))
+        sys.exit(0)
+
+    # Self-check: a dry-run sweep of 2 precisions × 2 batch sizes over 40
+    # prompts in 2 blocks — 8 worker processes, ABBA order, combined table.
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp:
+        matrix = {"backend": "transformers", "precision": ["FP16", "NF4"],
+                  "batch_size": [1, 4], "max_new_tokens": 64}
+        table = run_sweep(matrix, tmp, ids=range(1, 41), blocks=2, idle_seconds=0.2,
+                          warmup_max=2, dry_run=True)
+        print(summarize(table).to_string())
+        assert len(table) == 4 * 40 and table.groupby("Cell").ID.nunique().eq(40).all()
+        assert schedule(2, 4, 2) == [(0, 0, [0, 1]), (1, 0, [0, 1]), (1, 1, [2, 3]), (0, 1, [2, 3])]
+        nf4 = table[table.precision == "NF4"].Tokens_per_sec.mean()
+        fp16 = table[table.precision == "FP16"].Tokens_per_sec.mean()
+        assert nf4 > fp16 and (table.Net_Energy_J > 0).all()
+        single = table[table.batch_size == 1]                   # measure_prompt, streamed
+        assert single.TTFT_s.notna().all() and (single.TTFT_s <= single.Latency_s).all()
+
+        # --resume after a finished sweep starts no workers and keeps every row
+        again = run_sweep(matrix, tmp, ids=range(1, 41), blocks=2, dry_run=True, resume=True)
+        assert len(again) == len(table)
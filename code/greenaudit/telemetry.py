@@ -0,0 +1,270 @@
+# ==============================================================================
+#  SoC telemetry — clock, temperature and throttle flags from open sysfs files
+#
+#  run_rpi5.py read the ARM clock and temperature by running `vcgencmd` four
+#  times per prompt: a fork + exec each time, with up to 2 s timeouts, on the
+#  same four cores that run inference and inside the metered window. The
+#  readings were two points per prompt, one of them after the prompt had
+#  already finished.
+#
+#  Telemetry opens each sysfs attribute once and re-reads it with
+#  os.pread(fd, n, 0). sysfs regenerates an attribute's contents on every
+#  read at offset 0, so no open/close or seek is needed per sample:
+#
+#    freq       devices/system/cpu/cpufreq/policy0/scaling_cur_freq   kHz
+#    temp       class/thermal/thermal_zone0/temp                      m°C
+#    throttled  devices/platform/soc*/soc*:firmware/get_throttled     hex
+#
+#  A daemon thread samples all channels at `hz` into a ring buffer, like
+#  PowerSampler. window(t0, t1) returns min/mean/max clock and temperature
+#  over a prompt, plus the OR of the firmware throttle bits seen in it
+#  (THROTTLE_BITS; the Pi's equivalent of `vcgencmd get_throttled`). A
+#  missing attribute is skipped, and its columns are None. Self-check on a
+#  fake sysfs tree (from code/):
+#    python -m greenaudit.telemetry
+# ==============================================================================
+
+import glob
+import os
+import threading
+import time
+
+import numpy as np
+
+# Low 16 bits of get_throttled: the condition holds now (bits 16-19: since boot)
+THROTTLE_BITS = {
+    0: "under-voltage",
+    1: "arm-freq-capped",
+    2: "throttled",
+    3: "soft-temp-limit",
+}
+
+TELEMETRY_COLUMNS = [
+    "CPU_Freq_MHz_min", "CPU_Freq_MHz_mean", "CPU_Freq_MHz_max",
+    "CPU_Temp_C_min",   "CPU_Temp_C_mean",   "CPU_Temp_C_max",
+    "Throttle_Flags",   "Telemetry_Samples",
+]
+
+
+def decode_throttled(mask):
+    """0x50005 → ['under-voltage', 'throttled'] (current conditions only)."""
+    return [name for bit, name in THROTTLE_BITS.items() if mask >> bit & 1]
+
+
+# ── Channels ──────────────────────────────────────────────────────────────────
+
+class SysfsChannel:
+    """One sysfs attribute, opened once and re-read with os.pread."""
+
+    def __init__(self, path, scale=1.0, base=10):
+        self.path  = path
+        self.scale = scale
+        self.base  = base
+        self.fd    = os.open(path, os.O_RDONLY)
+
+    def read(self):
+        raw = os.pread(self.fd, 64, 0).strip()
+        return int(raw, self.base) * self.scale
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+def _first(patterns):
+    for pattern in patterns:
+        found = sorted(glob.glob(pattern))
+        if found:
+            return found[0]
+    return None
+
+
+def find_channels(sysfs="/sys"):
+    """{name: SysfsChannel} for whichever of freq / temp / throttled this host exposes."""
+    paths = {
+        "freq": (_first([
+            os.path.join(sysfs, "devices/system/cpu/cpufreq/policy0/scaling_cur_freq"),
+            os.path.join(sysfs, "devices/system/cpu/cpu0/cpufreq/scaling_cur_freq"),
+        ]), 1e-3, 10),
+        "temp": (_first([
+            os.path.join(sysfs, "class/thermal/thermal_zone0/temp"),
+        ]), 1e-3, 10),
+        "throttled": (_first([
+            os.path.join(sysfs, "devices/platform/*firmware/get_throttled"),
+            os.path.join(sysfs, "devices/platform/*/*firmware/get_throttled"),   # soc[@addr]/
+        ]), 1, 16),
+    }
+    channels = {}
+    for name, (path, scale, base) in paths.items():
+        if path is None:
+            continue
+        try:
+            channel = SysfsChannel(path, scale, base)
+            channel.read()
+        except (OSError, ValueError):
+            continue
+        channels[name] = channel
+    return channels
+
+
+# ── Sampler ───────────────────────────────────────────────────────────────────
+
+class Telemetry:
+    """
+    Samples the channels at `hz` on a daemon thread into a ring buffer holding
+    the last `window_s` seconds. Use as a context manager or start()/stop().
+    cpus pins the sampling thread (greenaudit/affinity.py).
+    """
+
+    def __init__(self, channels=None, hz=10, window_s=3600, cpus=None, sysfs="/sys"):
+        if not 1 <= hz <= 200:
+            raise ValueError(f"hz must be between 1 and 200, got {hz}")
+        self.channels = channels if channels is not None else find_channels(sysfs)
+        self.names    = ["freq", "temp", "throttled"]
+        self.period   = 1.0 / hz
+        self.capacity = int(hz * window_s)
+        self.cpus     = cpus
+        self._t       = np.zeros(self.capacity)
+        self._v       = np.full((self.capacity, len(self.names)), np.nan)
+        self._n       = 0
+        self._lock    = threading.Lock()
+        self._stop    = threading.Event()
+        self._thread  = None
+
+    def describe(self):
+        if not self.channels:
+            return "no sysfs telemetry on this host"
+        return ", ".join(f"{n}={c.path}" for n, c in self.channels.items())
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="Telemetry", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        for channel in self.channels.values():
+            channel.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _read(self):
+        row = []
+        for name in self.names:
+            channel = self.channels.get(name)
+            try:
+                row.append(channel.read() if channel else np.nan)
+            except (OSError, ValueError):
+                row.append(np.nan)
+        return row
+
+    def _run(self):
+        if self.cpus:
+            from .affinity import pin_thread
+            pin_thread(self.cpus)
+        deadline = time.time()
+        while not self._stop.is_set():
+            row = self._read()
+            t = time.time()
+            with self._lock:
+                i = self._n % self.capacity
+                self._t[i] = t
+                self._v[i] = row
+                self._n += 1
+            deadline += self.period
+            delay = deadline - time.time()
+            if delay > 0:
+                self._stop.wait(delay)
+            else:
+                deadline = time.time()
+
+    # ── queries ──────────────────────────────────────────────────────────────
+
+    def latest(self):
+        """(temp_c, freq_mhz) of the newest sample — a ThermalPacer probe."""
+        with self._lock:
+            if not self._n:
+                row = self._read()
+            else:
+                row = self._v[(self._n - 1) % self.capacity]
+        freq, temp = row[0], row[1]
+        return (None if np.isnan(temp) else float(temp),
+                None if np.isnan(freq) else float(freq))
+
+    def samples(self):
+        """Chronological copy of the buffered (times, values[n, 3])."""
+        with self._lock:
+            n = min(self._n, self.capacity)
+            start = self._n % self.capacity if self._n > self.capacity else 0
+            idx = (start + np.arange(n)) % self.capacity
+            return self._t[idx], self._v[idx]
+
+    def window(self, t0, t1):
+        """TELEMETRY_COLUMNS over samples taken between wall-clock times t0 and t1."""
+        t, v = self.samples()
+        inside = v[(t >= t0) & (t <= t1)]
+        if not len(inside) and len(t):
+            inside = v[[np.argmin(np.abs(t - t1))]]   # prompt shorter than one period
+        row = {"Telemetry_Samples": len(inside)}
+        for name, col, digits in (("freq", "CPU_Freq_MHz", 0), ("temp", "CPU_Temp_C", 1)):
+            x = inside[:, self.names.index(name)] if len(inside) else np.array([])
+            x = x[~np.isnan(x)]
+            for stat, fn in (("min", np.min), ("mean", np.mean), ("max", np.max)):
+                row[f"{col}_{stat}"] = round(float(fn(x)), digits) if len(x) else None
+        flags = inside[:, self.names.index("throttled")] if len(inside) else np.array([])
+        flags = flags[~np.isnan(flags)].astype(np.int64)
+        row["Throttle_Flags"] = hex(int(np.bitwise_or.reduce(flags) & 0xFFFF)) if len(flags) else None
+        return {c: row[c] for c in TELEMETRY_COLUMNS}
+
+
+if __name__ == "__main__":
+    # Self-check: a fake Pi 5 sysfs tree whose files are rewritten while the
+    # sampler runs; the same descriptors must see the new values.
+    import tempfile
+
+    def write(path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:                     # truncates in place: same inode
+            f.write(text + "\n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        freq = os.path.join(tmp, "devices/system/cpu/cpufreq/policy0/scaling_cur_freq")
+        temp = os.path.join(tmp, "class/thermal/thermal_zone0/temp")
+        thr  = os.path.join(tmp, "devices/platform/soc/soc:firmware/get_throttled")
+        for path, text in ((freq, "2400000"), (temp, "61250"), (thr, "0")):
+            write(path, text)
+
+        tele = Telemetry(hz=50, sysfs=tmp)
+        assert set(tele.channels) == {"freq", "temp", "throttled"}, tele.describe()
+        with tele:
+            time.sleep(0.1)
+            t0 = time.time()
+            time.sleep(0.1)
+            write(freq, "1500000")
+            write(temp, "82400")
+            write(thr, "50006")
+            time.sleep(0.1)
+            write(freq, "2400000")
+            time.sleep(0.1)
+            t1 = time.time()
+            print(tele.latest())
+        row = tele.window(t0, t1)
+        print(row)
+        assert row["CPU_Freq_MHz_min"] == 1500 and row["CPU_Freq_MHz_max"] == 2400
+        assert row["CPU_Temp_C_min"] == 61.2 and row["CPU_Temp_C_max"] == 82.4
+        assert 1500 < row["CPU_Freq_MHz_mean"] < 2400
+        assert decode_throttled(int(row["Throttle_Flags"], 16)) == ["arm-freq-capped", "throttled"]
+        assert row["Telemetry_Samples"] >= 10
+
+    empty = Telemetry(channels={})
+    assert empty.latest() == (None, None)
+    assert empty.window(0, 1)["CPU_Temp_C_max"] is None
+    print("this host:", Telemetry().describe())
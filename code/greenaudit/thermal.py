@@ -0,0 +1,202 @@
+# ==============================================================================
+#  Thermal pacing — cool-down pauses and re-queued throttled prompts
+#
+#  A Raspberry Pi 5 under sustained llama.cpp load heats until the firmware
+#  lowers the ARM clock (soft limit at 80 °C). run_rpi5.py used to compare one
+#  frequency reading after each prompt against 2100 MHz and leave it to the
+#  analysis to drop flagged rows. ThermalPacer keeps throttled rows out of
+#  the results in the first place:
+#
+#    before a prompt  if the SoC is at or above `pause_c`, sleep in `poll_s`
+#                     steps until it is back to `resume_c` (hysteresis, so
+#                     the board does not start every prompt right at the
+#                     limit); at most `max_cooldown_s` per pause
+#    during a prompt  a watcher thread polls the probe every `poll_s`; the
+#                     run counts as throttled if any poll saw the clock below
+#                     `min_freq_mhz`
+#    after a prompt   a throttled run is discarded and its prompt goes to the
+#                     back of the queue, up to `max_requeue` times; after that
+#                     it is kept with Throttled = True
+#
+#  probe() → (temp_c, freq_mhz); either may be None when a sensor is missing,
+#  which disables that check. cpus pins the watcher thread like PowerSampler's
+#  (greenaudit/affinity.py). report() gives total wall time, time spent
+#  cooling down and time lost to discarded runs. Self-check (from code/):
+#    python -m greenaudit.thermal
+# ==============================================================================
+
+import threading
+import time
+from collections import deque
+
+
+class Watch:
+    """Probe readings over one prompt: hottest temperature, lowest clock."""
+
+    def __init__(self, min_freq_mhz):
+        self.min_freq_mhz = min_freq_mhz
+        self.temp_max  = None
+        self.freq_min  = None
+        self.polls     = 0
+        self.started   = None
+        self.duration  = 0.0
+
+    def add(self, temp_c, freq_mhz):
+        self.polls += 1
+        if temp_c is not None:
+            self.temp_max = temp_c if self.temp_max is None else max(self.temp_max, temp_c)
+        if freq_mhz is not None:
+            self.freq_min = freq_mhz if self.freq_min is None else min(self.freq_min, freq_mhz)
+
+    @property
+    def throttled(self):
+        return self.freq_min is not None and self.freq_min < self.min_freq_mhz
+
+
+class ThermalPacer:
+    def __init__(self, probe, pause_c=75.0, resume_c=65.0, min_freq_mhz=2100, poll_s=1.0,
+                 max_cooldown_s=600, max_requeue=2, cpus=None, clock=time.time, sleep=time.sleep):
+        if resume_c > pause_c:
+            raise ValueError(f"resume_c ({resume_c}) must not exceed pause_c ({pause_c})")
+        self.probe          = probe
+        self.pause_c        = pause_c
+        self.resume_c       = resume_c
+        self.min_freq_mhz   = min_freq_mhz
+        self.poll_s         = poll_s
+        self.max_cooldown_s = max_cooldown_s
+        self.max_requeue    = max_requeue
+        self.cpus           = cpus
+        self.clock          = clock
+        self.sleep          = sleep
+        self.started        = None
+        self.cooldowns      = 0
+        self.cooldown_s     = 0.0
+        self.requeued       = 0
+        self.discarded_s    = 0.0
+        self.kept_throttled = 0
+
+    # ── cool-down ────────────────────────────────────────────────────────────
+
+    def cool_down(self):
+        """Waits until the SoC is below resume_c if it is at or above pause_c. Returns seconds."""
+        temp, _ = self.probe()
+        if temp is None or temp < self.pause_c:
+            return 0.0
+        t0 = self.clock()
+        print(f"     cooling down: {temp:.1f} °C ≥ {self.pause_c:.0f} °C, "
+              f"waiting for {self.resume_c:.0f} °C")
+        while temp is not None and temp > self.resume_c:
+            if self.clock() - t0 >= self.max_cooldown_s:
+                print(f"     cool-down gave up after {self.max_cooldown_s:.0f}s at {temp:.1f} °C")
+                break
+            self.sleep(self.poll_s)
+            temp, _ = self.probe()
+        waited = self.clock() - t0
+        self.cooldowns  += 1
+        self.cooldown_s += waited
+        return waited
+
+    # ── watch ────────────────────────────────────────────────────────────────
+
+    def watch(self, fn):
+        """Runs fn() while a thread polls the probe. Returns (fn's result, Watch)."""
+        w = Watch(self.min_freq_mhz)
+        stop = threading.Event()
+
+        def poll():
+            if self.cpus:
+                from .affinity import pin_thread
+                pin_thread(self.cpus)
+            while True:
+                w.add(*self.probe())
+                if stop.wait(self.poll_s):
+                    break
+
+        w.started = self.clock()
+        poller = threading.Thread(target=poll, name="ThermalWatch", daemon=True)
+        poller.start()
+        try:
+            result = fn()
+        finally:
+            stop.set()
+            poller.join()
+            w.add(*self.probe())                   # state at the end of the prompt
+            w.duration = self.clock() - w.started
+        return result, w
+
+    # ── queue ────────────────────────────────────────────────────────────────
+
+    def run(self, items, fn):
+        """
+        Yields (item, result, watch, retries, cooldown_s) for every item, in
+        queue order. Throttled runs are re-queued, not yielded.
+        """
+        if self.started is None:
+            self.started = self.clock()
+        queue = deque((item, 0) for item in items)
+        while queue:
+            item, retries = queue.popleft()
+            paused = self.cool_down()
+            result, w = self.watch(lambda: fn(item))
+            if w.throttled:
+                if retries < self.max_requeue:
+                    self.requeued    += 1
+                    self.discarded_s += w.duration
+                    print(f"     throttled ({w.freq_min:.0f} MHz, {w.temp_max or 0:.1f} °C) "
+                          f"— discarded, re-queued (retry {retries + 1}/{self.max_requeue})")
+                    queue.append((item, retries + 1))
+                    continue
+                self.kept_throttled += 1
+            yield item, result, w, retries, paused
+
+    def report(self):
+        wall = self.clock() - self.started if self.started is not None else 0.0
+        share = (self.cooldown_s + self.discarded_s) / wall if wall > 0 else 0.0
+        return {
+            "Wall_s":           round(wall, 1),
+            "Cooldowns":        self.cooldowns,
+            "Cooldown_s":       round(self.cooldown_s, 1),
+            "Requeued":         self.requeued,
+            "Discarded_s":      round(self.discarded_s, 1),
+            "Kept_Throttled":   self.kept_throttled,
+            "Overhead_Share":   round(share, 4),
+        }
+
+
+if __name__ == "__main__":
+    # Self-check on a simulated board: each prompt heats it by 6 °C, idling
+    # cools it by 2 °C per second, and above 80 °C the clock drops to
+    # 1500 MHz. Without pacing most prompts would run throttled.
+    state = {"t": 0.0, "temp": 60.0}
+
+    def clock():
+        return state["t"]
+
+    def sleep(s):
+        state["t"] += s
+        state["temp"] = max(45.0, state["temp"] - 2.0 * s)
+
+    def probe():
+        return state["temp"], 1500 if state["temp"] > 80.0 else 2400
+
+    def prompt(i):
+        state["t"] += 10.0
+        state["temp"] += 6.0
+        return i
+
+    pacer = ThermalPacer(probe, pause_c=72, resume_c=62, poll_s=0.0005, clock=clock,
+                         sleep=sleep, max_requeue=2)
+    done = list(pacer.run(range(20), prompt))
+    report = pacer.report()
+    print(report)
+    assert [d[0] for d in done] == list(range(20))
+    assert not any(d[2].throttled for d in done)
+    assert report["Cooldowns"] > 0 and report["Cooldown_s"] > 0
+
+    # A board that is always throttled: every prompt retried, then kept flagged
+    state.update(t=0.0, temp=90.0)
+    hot = ThermalPacer(lambda: (None, 1500), clock=clock, sleep=sleep, poll_s=0.0005,
+                       max_requeue=1)
+    done = list(hot.run(range(3), lambda i: i))
+    assert len(done) == 3 and all(d[2].throttled and d[3] == 1 for d in done)
+    assert hot.report()["Requeued"] == 3 and hot.report()["Kept_Throttled"] == 3
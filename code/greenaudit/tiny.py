@@ -0,0 +1,66 @@
+# ==============================================================================
+#  Tiny randomly initialised Phi-3 — CPU stand-in for microsoft/Phi-3-mini
+#
+#  Same architecture class (Phi3ForCausalLM) and the same tokenizer interface
+#  as the real model, but small enough to build in a second without a GPU or
+#  a Hugging Face download. Used by the self-checks in this package.
+#  Outputs are gibberish; only shapes, caching and timing paths are exercised.
+# ==============================================================================
+
+import torch
+from tokenizers import Tokenizer, decoders, models, pre_tokenizers
+from transformers import AutoModelForCausalLM, Phi3Config, PreTrainedTokenizerFast
+
+SPECIAL_TOKENS = ["<unk>", "<s>", "</s>", "<|user|>", "<|assistant|>", "<|end|>"]
+
+
+def tiny_tokenizer():
+    """Byte-level tokenizer (one token per UTF-8 byte) with Phi-3's special tokens."""
+    alphabet = sorted(pre_tokenizers.ByteLevel.alphabet())
+    vocab    = {tok: i for i, tok in enumerate(SPECIAL_TOKENS + alphabet)}
+
+    backend = Tokenizer(models.BPE(vocab=vocab, merges=[], unk_token="<unk>"))
+    backend.pre_tokenizer = pre_tokenizers.ByteLevel(add_prefix_space=False)
+    backend.decoder       = decoders.ByteLevel()
+    backend.add_special_tokens(SPECIAL_TOKENS)
+
+    return PreTrainedTokenizerFast(
+        tokenizer_object=backend,
+        unk_token="<unk>",
+        bos_token="<s>",
+        eos_token="</s>",
+        pad_token="</s>",                      # Phi-3 scripts also pad with EOS
+        model_input_names=["input_ids", "attention_mask"],
+        clean_up_tokenization_spaces=False,
+    )
+
+
+def tiny_phi3_config(vocab_size, **overrides):
+    """A 2-layer Phi3Config; keyword overrides replace any default."""
+    kwargs = dict(
+        vocab_size=vocab_size,
+        hidden_size=64,
+        intermediate_size=128,
+        num_hidden_layers=2,
+        num_attention_heads=4,
+        num_key_value_heads=4,
+        max_position_embeddings=1024,
+        rope_scaling=None,                     # same override as the T4 scripts
+        bos_token_id=1,
+        eos_token_id=2,
+        pad_token_id=2,
+    )
+    kwargs.update(overrides)
+    return Phi3Config(**kwargs)
+
+
+def tiny_phi3(seed=0, **overrides):
+    """Returns (model, tokenizer) for a randomly initialised tiny Phi-3 on CPU."""
+    tokenizer = tiny_tokenizer()
+    torch.manual_seed(seed)
+    model = AutoModelForCausalLM.from_config(
+        tiny_phi3_config(len(tokenizer), **overrides),
+        attn_implementation="eager",
+    )
+    model.eval()
+    return model, tokenizer
@@ -0,0 +1,112 @@
+# ==============================================================================
+#  Pre-tokenized prompt cache — token IDs for a whole corpus, memory-mapped
+#
+#  The loops called tokenizer(prompt) once per prompt, right next to the
+#  timed region, and the FP16 and NF4 runs re-tokenized identical text.
+#  pretokenize() encodes the corpus once and stores it as two .npy files:
+#
+#    tokens-<key>.ids.npy      int64, every prompt's IDs concatenated
+#    tokens-<key>.offsets.npy  int64, n + 1 boundaries into ids
+#
+#  <key> hashes the tokenizer's name, class, vocabulary size and the
+#  transformers version together with the prompt texts, so a different
+#  tokenizer or an edited corpus gets its own files. Later runs (either
+#  precision) np.load them with mmap_mode="c": prompt i is a view of
+#  ids[offsets[i]:offsets[i + 1]], and torch.from_numpy() wraps it without
+#  copying. Encoding matches tokenizer(prompt) with default arguments.
+#  Self-check with the tiny Phi-3 tokenizer (from code/):
+#    python -m greenaudit.token_cache
+# ==============================================================================
+
+import hashlib
+import json
+import os
+
+import numpy as np
+import torch
+
+from .prompts import cache_dir
+
+
+def tokenizer_key(tokenizer, prompts):
+    import transformers
+    meta = [type(tokenizer).__name__, tokenizer.name_or_path, len(tokenizer),
+            transformers.__version__]
+    h = hashlib.sha256(json.dumps(meta).encode("utf-8"))
+    for p in prompts:
+        h.update(p.encode("utf-8") + b"\0")
+    return h.hexdigest()[:20]
+
+
+class TokenizedCorpus:
+    def __init__(self, ids_path, offsets_path):
+        self.ids     = np.load(ids_path, mmap_mode="c")
+        self.offsets = np.load(offsets_path)
+        self.lengths = np.diff(self.offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        """Token IDs of prompt i — a view into the memory map."""
+        return self.ids[self.offsets[i]:self.offsets[i + 1]]
+
+    def inputs(self, i, device="cpu"):
+        """generate() kwargs for prompt i, like tokenizer(prompt, return_tensors="pt")."""
+        input_ids = torch.from_numpy(self[i]).unsqueeze(0).to(device)
+        return {"input_ids": input_ids, "attention_mask": torch.ones_like(input_ids)}
+
+
+def pretokenize(tokenizer, prompts, directory=None):
+    """Loads the token cache for (tokenizer, prompts), building it on first use."""
+    directory = directory or cache_dir()
+    key = tokenizer_key(tokenizer, prompts)
+    ids_path     = os.path.join(directory, f"tokens-{key}.ids.npy")
+    offsets_path = os.path.join(directory, f"tokens-{key}.offsets.npy")
+
+    if not (os.path.exists(ids_path) and os.path.exists(offsets_path)):
+        encoded = tokenizer(list(prompts))["input_ids"]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(e) for e in encoded])
+        ids = np.fromiter((t for e in encoded for t in e), dtype=np.int64, count=offsets[-1])
+        # offsets last: its presence marks a complete pair
+        for path, arr in ((ids_path, ids), (offsets_path, offsets)):
+            tmp = f"{path}.{os.getpid()}.tmp.npy"
+            np.save(tmp, arr)
+            os.replace(tmp, path)
+
+    return TokenizedCorpus(ids_path, offsets_path)
+
+
+if __name__ == "__main__":
+    # Self-check: the memory-mapped inputs equal tokenizer(prompt) for every
+    # prompt, a second call reuses the files, an edited corpus gets new ones
+    import tempfile
+
+    from .prompts import load_prompts
+    from .tiny import tiny_phi3
+
+    _, tokenizer = tiny_phi3()
+    prompts = load_prompts("kvtrue500")["Prompt"].tolist()[:50] + ["", "é ü — ✓"]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = pretokenize(tokenizer, prompts, directory=tmp)
+        assert isinstance(corpus.ids, np.memmap) and len(corpus) == len(prompts)
+        for i, prompt in enumerate(prompts):
+            expected = tokenizer(prompt, return_tensors="pt")
+            got = corpus.inputs(i)
+            assert torch.equal(got["input_ids"], expected["input_ids"]), prompt
+            assert torch.equal(got["attention_mask"], expected["attention_mask"]), prompt
+        assert corpus.lengths.tolist() == [len(tokenizer(p)["input_ids"]) for p in prompts]
+
+        files = sorted(os.listdir(tmp))
+        mtimes = [os.stat(os.path.join(tmp, f)).st_mtime_ns for f in files]
+        again = pretokenize(tokenizer, prompts, directory=tmp)
+        assert sorted(os.listdir(tmp)) == files
+        assert [os.stat(os.path.join(tmp, f)).st_mtime_ns for f in files] == mtimes
+        assert np.array_equal(again[3], corpus[3])
+
+        edited = pretokenize(tokenizer, prompts[:-1] + ["edited"], directory=tmp)
+        assert len(os.listdir(tmp)) == 4
+        assert edited[len(prompts) - 1].tolist() == tokenizer("edited")["input_ids"]
+    print(f"token cache ok: {int(corpus.offsets[-1])} ids for {len(corpus)} prompts")
@@ -0,0 +1,132 @@
+# ==============================================================================
+#  Warm-up stage — discarded prompts until throughput reaches steady state
+#
+#  Prompt 1 of every run paid one-off costs: CUDA context creation and kernel
+#  autotuning, allocator growth, llama.cpp page-faulting the mmapped GGUF
+#  weights in. It shows up as an outlier first row in the results CSVs.
+#
+#  warm_up() generates WARMUP_PROMPT (not in any study corpus) over and over
+#  and throws the output away. Repeating one prompt keeps the prompt and
+#  output length fixed, so the tokens/s spread is the system settling, not
+#  the mix of prompts. After each prompt SteadyState adds
+#  the run's tokens/s and computes the coefficient of variation (std / mean)
+#  over the last `window` prompts. Warm-up ends when that CV is ≤ max_cv, or
+#  after max_prompts with Warmup_Stable = False. The scripts run it between
+#  model load and the idle baseline, so neither the baseline nor prompt 1 sees
+#  a cold system.
+#
+#  The warm-up cost (prompts, seconds, tokens, final CV, the tokens/s trace)
+#  is appended to <output stem>.warmup.jsonl, one line per session, so a
+#  resumed run records its own warm-up as well. Self-check (from code/):
+#    python -m greenaudit.warmup
+# ==============================================================================
+
+import json
+import os
+import time
+from collections import deque
+
+import numpy as np
+
+WARMUP_PROMPT = "Explain what a rainbow is to a secondary school student."
+
+
+class SteadyState:
+    """Rolling coefficient of variation over the last `window` readings."""
+
+    def __init__(self, window=4, max_cv=0.05):
+        self.window = window
+        self.max_cv = max_cv
+        self.values = deque(maxlen=window)
+
+    def add(self, value):
+        """Records one reading; True once the window is full and its CV ≤ max_cv."""
+        self.values.append(float(value))
+        return self.stable
+
+    @property
+    def cv(self):
+        if len(self.values) < 2:
+            return None
+        v = np.asarray(self.values)
+        mean = v.mean()
+        return float(v.std() / mean) if mean > 0 else None
+
+    @property
+    def stable(self):
+        cv = self.cv
+        return len(self.values) == self.window and cv is not None and cv <= self.max_cv
+
+
+def warm_up(generate, prompt=WARMUP_PROMPT, max_prompts=12, window=4, max_cv=0.05):
+    """
+    generate(prompt) → number of output tokens; its output is discarded.
+    Returns the warm-up cost as Warmup_* fields. max_prompts=0 skips warm-up.
+    """
+    detector = SteadyState(window, max_cv)
+    trace    = []
+    tokens   = 0
+    t_start  = time.time()
+    for i in range(max_prompts):
+        t0 = time.time()
+        n  = generate(prompt)
+        dt = time.time() - t0
+        tokens += n
+        trace.append(round(n / dt, 2) if dt > 0 else 0.0)
+        detector.add(trace[-1])
+        print(f"  warm-up {i + 1:>2}: {trace[-1]:>7.1f} tok/s  "
+              f"CV {'—' if detector.cv is None else f'{detector.cv:.3f}'}")
+        if detector.stable:
+            break
+
+    stats = {
+        "Warmup_Prompts":  len(trace),
+        "Warmup_s":        round(time.time() - t_start, 3),
+        "Warmup_Tokens":   int(tokens),
+        "Warmup_Stable":   detector.stable,
+        "Warmup_CV":       None if detector.cv is None else round(detector.cv, 4),
+        "Warmup_Tok_s":    trace,
+    }
+    if trace:
+        print(f"Warm-up: {len(trace)} prompts, {stats['Warmup_s']:.1f}s — "
+              f"{'steady' if detector.stable else 'NOT steady'} at {trace[-1]:.1f} tok/s")
+    return stats
+
+
+def warmup_path(output_file):
+    """green_audit_output/x.csv → green_audit_output/x.warmup.jsonl"""
+    return os.path.splitext(str(output_file))[0] + ".warmup.jsonl"
+
+
+def record_warmup(output_file, stats, **meta):
+    """Appends this session's warm-up cost next to the results file."""
+    line = {"Started": time.strftime("%Y-%m-%d %H:%M:%S"), **meta, **stats}
+    with open(warmup_path(output_file), "a", encoding="utf-8") as f:
+        f.write(json.dumps(line) + "\n")
+    return warmup_path(output_file)
+
+
+if __name__ == "__main__":
+    # Self-check: a fake backend whose throughput ramps from 20 to ~100 tok/s
+    # over the first prompts, then holds with ±1% noise.
+    rng = np.random.default_rng(0)
+    calls = []
+
+    def fake_generate(prompt):
+        calls.append(prompt)
+        rate = 100.0 * (1 - 0.8 * np.exp(-(len(calls) - 1) / 1.5)) * (1 + rng.normal(0, 0.01))
+        time.sleep(20 / rate)
+        return 20
+
+    stats = warm_up(fake_generate, max_prompts=20, window=4, max_cv=0.03)
+    print({k: v for k, v in stats.items() if k != "Warmup_Tok_s"})
+    assert stats["Warmup_Stable"] and 4 <= stats["Warmup_Prompts"] < 20
+    assert stats["Warmup_Tok_s"][0] < 0.5 * stats["Warmup_Tok_s"][-1]
+    assert set(calls) == {WARMUP_PROMPT}                        # one fixed prompt, repeated
+
+    # A backend that never settles stops at max_prompts
+    delays = iter([0.002, 0.02] * 3)
+    jitter = warm_up(lambda p: (time.sleep(next(delays)), 10)[1],
+                     max_prompts=6, window=3, max_cv=0.05)
+    assert not jitter["Warmup_Stable"] and jitter["Warmup_Prompts"] == 6
+    assert warm_up(fake_generate, max_prompts=0)["Warmup_Prompts"] == 0
@@ -3,10 +3,17 @@
 #  Compares F16 vs Q4_K_M on 100 prompts
 # ==============================================================================
 
-import time
 import os
+import sys
 import pandas as pd
-from llama_cpp import Llama
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from greenaudit.backends import load_backend, measure_prompt
+from greenaudit.rapl import RaplReader, RaplMeter
+from greenaudit.prompts import load_prompts, stratified_sample
+from greenaudit.warmup import warm_up, record_warmup
+from greenaudit.idle import IdleBaseline, meter_idle_watts, idle_path
+from greenaudit.autotune import autotune, model_key
 
 # ================= CONFIG =================
 
@@ -14,13 +21,20 @@ QUANTIZATION   = "Q4_K_M"   # Change to "Q4_K_M" for second run
 MAX_NEW_TOKENS = 200
 N_GPU_LAYERS   = 0       # Keep 0 for Windows CPU
 N_CTX          = 4096
+ENERGY_BACKEND = "none"  # "none" (timing only) | "rapl" (Linux: intel-rapl energy counters)
+WARMUP_MAX     = 12      # discarded warm-up prompts at most (0 = none)
+WARMUP_CV      = 0.05    # steady once tokens/s CV over 4 warm-up prompts is below this
+IDLE_EVERY     = 25      # rapl: re-measure idle power every N prompts (0 = start-up only)
+AUTO_TUNE      = False   # True: pick threads / n_batch by a short sweep, cached per host
+TUNE_OBJECTIVE = "tok_s" # "tok_s" (fastest) | "j_per_token" (least energy per token; needs rapl)
+TUNE_MAX_TOKENS = 64     # output tokens per calibration prompt (one per category)
 
 MODEL_PATHS = {
     "F16":     "./Phi-3-mini-4k-instruct-fp16.gguf",
     "Q4_K_M":  "./Phi-3-mini-4k-instruct-q4.gguf",
 }
 
-PROMPTS_CSV = "./laptop_100_prompts.csv"
+PROMPT_CORPUS = "laptop100"   # data/windows/laptop_100_prompts.csv via greenaudit/prompts.py
 OUTPUT_FILE = f"phi3_{QUANTIZATION}_windows_100prompts.csv"
 
 # ===========================================
@@ -35,22 +49,57 @@ model_path = MODEL_PATHS[QUANTIZATION]
 if not os.path.exists(model_path):
     raise FileNotFoundError(f"Model file not found: {model_path}")
 
+def format_prompt(text):
+    return f"<|user|>\n{text}<|end|>\n<|assistant|>\n"
+
+energy = idle = None
+if ENERGY_BACKEND == "rapl":
+    rapl   = RaplReader()
+    energy = RaplMeter(rapl)
+
+# Auto-tune: short sweep of llama.cpp thread / batch settings, cached per host
+llama_threads = {}      # library defaults
+if AUTO_TUNE:
+    calibration = stratified_sample(load_prompts(PROMPT_CORPUS), per_category=1)["Prompt"].tolist()
+    tune_idle_w = meter_idle_watts(energy, 10) if TUNE_OBJECTIVE == "j_per_token" else 0.0
+    llama_threads = autotune(
+        lambda **s: load_backend("llama.cpp", model_path=model_path, n_ctx=N_CTX,
+                                 max_new_tokens=TUNE_MAX_TOKENS, n_gpu_layers=N_GPU_LAYERS,
+                                 prompt_format=format_prompt, **s),
+        calibration, model_key(model_path), objective=TUNE_OBJECTIVE,
+        meter=energy, idle_watts=tune_idle_w,
+    )
+
 print(f"\nLoading model: {model_path}")
-llm = Llama(
+backend = load_backend(
+    "llama.cpp",
     model_path=model_path,
+    max_new_tokens=MAX_NEW_TOKENS,
     n_ctx=N_CTX,
     n_gpu_layers=N_GPU_LAYERS,
-    verbose=False,
+    prompt_format=format_prompt,
+    **llama_threads,
 )
 print("Model loaded.\n")
 
+# Warm-up: discarded prompts until tokens/s is steady, before any measurement
+print(f"Warming up (up to {WARMUP_MAX} discarded prompts)...")
+warmup = warm_up(lambda p: backend.generate(p)["Output_Tokens"],
+                 max_prompts=WARMUP_MAX, max_cv=WARMUP_CV)
+record_warmup(OUTPUT_FILE, warmup, Precision=QUANTIZATION, **llama_threads)
+print()
+
+if ENERGY_BACKEND == "rapl":
+    print("Measuring idle power baseline (10 seconds)...")
+    idle = IdleBaseline(lambda s: meter_idle_watts(energy, s), path=idle_path(OUTPUT_FILE),
+                        seconds=10, every=IDLE_EVERY)
+    idle_watts = idle.calibrate()
+    print(f"Idle power: {idle_watts:.2f} W ({', '.join(z.label for z in rapl.zones)})\n")
+
 # Load prompts
-prompts_df = pd.read_csv(PROMPTS_CSV)
+prompts_df = load_prompts(PROMPT_CORPUS)
 assert len(prompts_df) == 100, "Expected 100 prompts"
 
-def format_prompt(text):
-    return f"<|user|>\n{text}<|end|>\n<|assistant|>\n"
-
 results = []
 
 print(f"{'ID':>4} {'Category':<16} {'Latency':>8} {'Tok/s':>8}")
@@ -58,41 +107,31 @@ print("-" * 45)
 
 for _, row in prompts_df.iterrows():
     task_id  = int(row["ID"])
-    category = row["CATEGORY"]
-    prompt   = row["PROMPT"]
+    category = row["Category"]
+    prompt   = row["Prompt"]
 
-    formatted = format_prompt(prompt)
-
-    t0 = time.time()
-    output = llm(
-        formatted,
-        max_tokens=MAX_NEW_TOKENS,
-        temperature=0.0,
-        echo=False,
-    )
-    latency = time.time() - t0
-
-    response_text  = output["choices"][0]["text"].strip()
-    tokens_out     = output["usage"]["completion_tokens"]
-    tokens_in      = output["usage"]["prompt_tokens"]
-    tokens_per_sec = tokens_out / latency if latency > 0 else 0
+    # Meter, generate, idle subtraction — greenaudit/backends.py
+    m = measure_prompt(backend, prompt, energy, idle)
+    m["Response"] = m["Response"].strip()
+    latency, tokens_per_sec = m["Latency_s"], m["Tokens_per_sec"]
 
     results.append({
         "ID": task_id,
         "Precision": QUANTIZATION,
         "Category": category,
         "Prompt": prompt,
-        "Response": response_text,
-        "Input_Tokens": tokens_in,
-        "Output_Tokens": tokens_out,
-        "Latency_s": round(latency, 4),
-        "Tokens_per_sec": round(tokens_per_sec, 2),
+        **m,    # Response, Input/Output_Tokens, Latency_s, Tokens_per_sec (+ energy with rapl)
         "Platform": "Windows_IrisXe_CPU",
     })
 
     print(f"{task_id:>4} {category:<16} {latency:>7.2f}s {tokens_per_sec:>7.1f}")
 
+    if energy and idle.maybe_calibrate(len(results)) is not None:
+        print(f"     idle recalibrated: {idle.watts_[-1]:.2f} W")
+
 df = pd.DataFrame(results)
+if energy:
+    df = idle.correct(df)   # net energy against the full idle curve
 
 print("\n" + "=" * 60)
 print(f"RESULTS — {QUANTIZATION}")
@@ -0,0 +1,77 @@
+# ==============================================================================
+#  Configuration sweep — every precision / thread / batch setting in one run
+#
+#  Instead of editing USE_QUANTIZATION or PRECISION and re-running a script,
+#  list the settings to compare in MATRIX. Each cell runs in its own Python
+#  process, and the cells take turns over blocks of prompts (ABBA order) so
+#  thermal and idle drift affect them all alike. See greenaudit/sweep.py.
+#
+#  USAGE:
+#    python code/run_sweep.py              → run the matrix
+#    python code/run_sweep.py --dry-run    → same matrix on the mock backend
+#    python code/run_sweep.py --resume     → continue an interrupted sweep
+#
+#  OUTPUT: OUTPUT_DIR/sweep_results.csv (all rows, one column per setting)
+#          OUTPUT_DIR/<cell>.csv         (one file per cell)
+# ==============================================================================
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from greenaudit.sweep import run_sweep, summarize
+
+# ================= CONFIG =================
+
+MATRIX = {
+    "backend":        ["llama.cpp"],                  # "transformers" | "llama.cpp"
+    "precision":      {"transformers": ["FP16", "NF4"],
+                       "llama.cpp":    ["F16", "Q4_K_M"]},
+    "max_new_tokens": 200,
+    "n_threads":      [4, 6],                         # None = library default
+    "n_ctx":          2048,                           # llama.cpp context window
+    "use_cache":      True,
+    "batch_size":     1,                              # >1: transformers only
+}
+
+MODELS = {
+    "transformers": "microsoft/Phi-3-mini-4k-instruct",
+    "llama.cpp": {
+        "Q4_K_M": "./models/Phi-3-mini-4k-instruct-Q4_K_M.gguf",
+        "F16":    "./models/Phi-3-mini-4k-instruct-F16.gguf",
+    },
+}
+
+PROMPT_CORPUS  = "laptop100"   # greenaudit/prompts.py corpus
+BLOCKS         = 4             # interleaving blocks (even = balanced ABBA order)
+ENERGY_BACKEND = "none"        # "none" | "rapl" | "codecarbon" | "nvml"
+IDLE_SECONDS   = 10            # idle baseline per worker
+WARMUP_MAX     = 6             # discarded warm-up prompts per worker
+OUTPUT_DIR     = "sweep_output"
+
+# ===========================================
+
+DRY_RUN = "--dry-run" in sys.argv
+RESUME  = "--resume" in sys.argv
+
+# Relative model paths are resolved here, not in the worker's directory
+MODELS["llama.cpp"] = {k: os.path.abspath(v) for k, v in MODELS["llama.cpp"].items()}
+
+table = run_sweep(
+    MATRIX, os.path.abspath(OUTPUT_DIR),
+    corpus=PROMPT_CORPUS,
+    blocks=BLOCKS,
+    models=MODELS,
+    energy=ENERGY_BACKEND,
+    idle_seconds=IDLE_SECONDS,
+    warmup_max=WARMUP_MAX,
+    dry_run=DRY_RUN,
+    resume=RESUME,
+)
+
+print("\n" + "=" * 60)
+print(f"  SWEEP RESULTS — {table.Cell.nunique()} cells | {PROMPT_CORPUS}"
+      f"{' | DRY RUN' if DRY_RUN else ''}")
+print("=" * 60)
+print(summarize(table).to_string())
+print(f"\nSaved: {os.path.join(OUTPUT_DIR, 'sweep_results.csv')}")
@@ -20,20 +20,32 @@
 #
 #  THERMAL NOTE: Pi 5 will thermal throttle under sustained load.
 #    Use active cooling (official Pi 5 cooler or heatsink + fan).
-#    Script logs CPU frequency per-prompt so throttling is detectable.
+#    THERMAL_PACING pauses before a prompt when the SoC is hot and re-runs
+#    prompts whose clock dropped below THROTTLE_MHZ (greenaudit/thermal.py).
+#    Clock, temperature and throttle flags are sampled from sysfs at
+#    TELEMETRY_HZ and logged per prompt as min / mean / max.
 #
 #  n=100 prompts (not 500): at ~130s/prompt, 500 = ~18 hours.
 #    100 prompts = ~3.6 hours, matches Appendix D methodology.
 # ==============================================================================
 
-import time
 import os
 import platform
-import subprocess
-import pandas as pd
-from llama_cpp import Llama
+import sys
 from codecarbon import EmissionsTracker
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "code"))
+from greenaudit.backends import load_backend, measure_prompt
+from greenaudit.journal import Journal, journal_path, compact
+from greenaudit.prompts import load_prompts, stratified_sample
+from greenaudit.warmup import warm_up, record_warmup
+from greenaudit.power import CodecarbonMeter
+from greenaudit.idle import IdleBaseline, meter_idle_watts, idle_path
+from greenaudit.autotune import autotune, model_key
+from greenaudit.affinity import plan_cores, format_cpu_list
+from greenaudit.thermal import ThermalPacer
+from greenaudit.telemetry import Telemetry
+
 # ==============================================================================
 # ── CONFIGURATION ──────────────────────────────────────────────────────────────
 # ==============================================================================
@@ -44,7 +56,25 @@ N_CTX       = 1024       # Smaller context saves RAM
 MAX_TOKENS  = 200
 OUTPUT_DIR  = "green_audit_output"
 OUTPUT_FILE = os.path.join(OUTPUT_DIR, "rpi5_Q4_K_M.csv")
+JOURNAL     = journal_path(OUTPUT_FILE)
+RESUME      = "--resume" in sys.argv   # skip prompts already in the journal
 N_PROMPTS   = 100        # Matches Appendix D CPU baseline
+STREAM_TIMING = False     # True: stream tokens → TTFT / ITL columns; changes the timed and
+                          # metered path, so not comparable with the published non-streamed runs
+WARMUP_MAX  = 6          # discarded warm-up prompts at most (0 = none), ~130 s each
+WARMUP_CV   = 0.05       # steady once tokens/s CV over 4 warm-up prompts is below this
+IDLE_EVERY  = 10         # re-measure idle power every N prompts (0 = start-up only)
+IDLE_SECONDS = 10        # length of each idle window
+AUTO_TUNE   = False      # True: pick threads / n_batch by a short sweep, cached per host
+TUNE_OBJECTIVE = "tok_s" # "tok_s" (fastest) | "j_per_token" (least net energy per token)
+TUNE_MAX_TOKENS = 32     # output tokens per calibration prompt (one per category)
+PIN_CORES   = None       # "1-3" with N_THREADS = 3 leaves cpu0 to CodeCarbon; None = OS scheduler
+THERMAL_PACING = True    # cool-down pauses + re-run throttled prompts (False = flag only)
+COOL_START_C = 75        # pause before a prompt at or above this SoC temperature
+COOL_RESUME_C = 65       # ... until it is back down to this
+THROTTLE_MHZ = 2100      # a run is throttled if the ARM clock drops below this (max 2400)
+MAX_REQUEUE = 2          # re-runs of a throttled prompt before it is kept, flagged
+TELEMETRY_HZ = 10        # clock / temperature / throttle-flag samples per second (sysfs)
 
 # ==============================================================================
 # ── DO NOT EDIT BELOW ──────────────────────────────────────────────────────────
@@ -59,298 +89,195 @@ print(f"  Precision: Q4_K_M (F16 not feasible — see header note)")
 print(f"  n_prompts: {N_PROMPTS}")
 print("=" * 60)
 
-# ── CPU frequency helper (detects thermal throttling) ─────────────────────────
-def get_cpu_freq_mhz():
-    try:
-        result = subprocess.run(
-            ["vcgencmd", "measure_clock", "arm"],
-            capture_output=True, text=True, timeout=2
-        )
-        freq_hz = int(result.stdout.split("=")[1].strip())
-        return round(freq_hz / 1e6, 0)
-    except Exception:
-        try:
-            with open("/sys/devices/system/cpu/cpu0/cpufreq/scaling_cur_freq") as f:
-                return round(int(f.read().strip()) / 1e3, 0)
-        except Exception:
-            return None
-
-# ── Temperature helper ─────────────────────────────────────────────────────────
-def get_cpu_temp():
-    try:
-        result = subprocess.run(
-            ["vcgencmd", "measure_temp"],
-            capture_output=True, text=True, timeout=2
-        )
-        temp = float(result.stdout.split("=")[1].replace("'C", "").strip())
-        return temp
-    except Exception:
-        try:
-            with open("/sys/class/thermal/thermal_zone0/temp") as f:
-                return round(int(f.read().strip()) / 1e3, 1)
-        except Exception:
-            return None
-
 # ==============================================================================
 # ── 100 PROMPTS — same first-100 as Appendix D sampling ──────────────────────
 # (20 per category, balanced)
 # ==============================================================================
 
-PROMPTS = [
-    # Mathematics (20)
-    "What is a limit in calculus and how do you evaluate lim(x→2) of (x² - 4)/(x - 2)?",
-    "Explain how to solve a quadratic equation using the quadratic formula, and walk through 2x² + 5x - 3 = 0.",
-    "What is the difference between a function and a relation? Give an example of each.",
-    "Explain what the slope of a line represents and how to calculate it from two points.",
-    "What are exponent rules? Explain the product rule, quotient rule, and power rule with examples.",
-    "Explain what a logarithm is and how it relates to exponentiation. What is log₂(8)?",
-    "What is the chain rule in calculus and when do you use it?",
-    "Explain what a derivative represents geometrically and how to find the derivative of x³.",
-    "What is integration and how does it relate to area under a curve?",
-    "Explain the difference between mean, median, and mode.",
-    "What is standard deviation and what does it tell you about a dataset?",
-    "Explain what a normal distribution is and what the 68-95-99.7 rule means.",
-    "What is probability and how do you calculate the probability of two independent events both occurring?",
-    "What is the Pythagorean theorem and how do you apply it to find a missing side?",
-    "What is modular arithmetic and how does it work?",
-    "Explain what a vector is and how to add two vectors.",
-    "What is Euler's formula and why is it considered beautiful?",
-    "Explain the concept of infinity in mathematics — is infinity a number?",
-    "What is a hypothesis test and what does p-value mean?",
-    "Explain the difference between correlation and causation.",
-
-    # Science (20)
-    "Explain what photosynthesis is, what inputs it needs, and what it produces.",
-    "What is cellular respiration and how does it differ from breathing?",
-    "Explain the structure of DNA and what base pairing rules apply.",
-    "What is mitosis and why do cells need to divide?",
-    "What is natural selection and how does it lead to evolution over time?",
-    "Explain what an enzyme is and how it works.",
-    "What is osmosis and how does it differ from diffusion?",
-    "What is the difference between aerobic and anaerobic respiration?",
-    "What is Newton's first law of motion?",
-    "Explain Newton's second law: F = ma.",
-    "What is Newton's third law and give an example.",
-    "Explain what momentum is and state the law of conservation of momentum.",
-    "What is gravitational potential energy and how is it calculated?",
-    "Explain what kinetic energy is.",
-    "What is the principle of conservation of energy?",
-    "Explain what a wave is and the difference between transverse and longitudinal waves.",
-    "What is the electromagnetic spectrum?",
-    "What is the difference between conductors and insulators?",
-    "Explain Ohm's law.",
-    "What is the difference between series and parallel circuits?",
-
-    # Programming-CS (20)
-    "What is a binary tree and explain what root, leaf, and node mean.",
-    "What is a variable in programming? Explain it like I am 10 years old using a box analogy.",
-    "What is a for loop? Explain it like a chore list.",
-    "What is a function in programming and why do we use them?",
-    "Explain what recursion is with the example of calculating a factorial.",
-    "What is the difference between a syntax error and a runtime error?",
-    "Explain what a stack data structure is and give an example of its use.",
-    "What is a sorting algorithm? Explain bubble sort.",
-    "What is Big O notation and what does O(n) mean?",
-    "What is object-oriented programming?",
-    "Explain what a class and an object are in OOP.",
-    "What is inheritance in OOP? Give an example.",
-    "Explain what an operating system does.",
-    "What is virtual memory?",
-    "Explain what a database is and the difference between SQL and NoSQL.",
-    "Explain what an API is.",
-    "What is the difference between HTTP and HTTPS?",
-    "Explain what encryption is and the difference between symmetric and asymmetric encryption.",
-    "What is machine learning in simple terms?",
-    "Explain what binary search is and why it is faster than linear search.",
-
-    # Humanities (20)
-    "What is the bystander effect and what causes it?",
-    "Explain the main causes of World War I using the MAIN acronym.",
-    "What was the significance of the French Revolution and its key outcomes?",
-    "Explain what the Industrial Revolution was and how it changed society.",
-    "What was the Cold War and the main tensions between the USA and USSR?",
-    "What was the significance of the Magna Carta?",
-    "What were the main causes of World War II?",
-    "Explain the importance of the Renaissance period.",
-    "What was the significance of the Civil Rights Movement in the USA?",
-    "What is globalisation and what are its effects?",
-    "Explain what the United Nations does.",
-    "What is democracy and how does it differ from authoritarianism?",
-    "What is propaganda and how is it used?",
-    "Explain what a GDP and what does it measure?",
-    "Explain the difference between developed and developing countries.",
-    "What is the separation of powers?",
-    "What is a constitution?",
-    "What was the significance of the printing press?",
-    "Explain what the Silk Road was.",
-    "What was the significance of the Nuremberg Trials?",
-
-    # Meta-cognition (20)
-    "Explain how to manage your time effectively during exam revision.",
-    "Explain what metacognition means and why it helps learning.",
-    "What is spaced repetition and why is it effective?",
-    "Explain the Pomodoro technique.",
-    "What is active recall?",
-    "Explain interleaving in studying.",
-    "What is elaborative interrogation?",
-    "Explain the Feynman technique.",
-    "What is the difference between recognition and recall?",
-    "Explain what retrieval practice is and why it works.",
-    "What is working memory and how does it affect learning?",
-    "Explain what long-term memory is and how information gets stored there.",
-    "What is encoding in memory?",
-    "What is deliberate practice?",
-    "What is transfer of learning?",
-    "Explain what schema theory says about how we learn.",
-    "What is scaffolding in education?",
-    "What is the difference between intrinsic and extrinsic motivation?",
-    "Explain what self-efficacy is.",
-    "What is academic procrastination and how do you overcome it?",
-]
-
-CATEGORIES = (
-    ["Mathematics"]    * 20 +
-    ["Science"]        * 20 +
-    ["Programming-CS"] * 20 +
-    ["Humanities"]     * 20 +
-    ["Meta-cognition"] * 20
-)
+corpus     = load_prompts("rpi5_100")   # data/prompts/rpi5_100_prompts.csv
+PROMPTS    = corpus["Prompt"].tolist()
+CATEGORIES = corpus["Category"].tolist()
 
 assert len(PROMPTS) == 100
 
 # ==============================================================================
-# ── MODEL LOAD ─────────────────────────────────────────────────────────────────
+# ── CPU PINNING — inference cores vs. meter / sampler cores ───────────────────
+# ==============================================================================
+
+# Threads inherit the mask of the thread that starts them: the main thread
+# goes to the housekeeping cores while the meter starts its threads, then to
+# the inference cores before llama.cpp starts its workers
+core_plan = plan_cores(PIN_CORES) if PIN_CORES else None
+if core_plan:
+    print(f"\nPinning: {core_plan.describe()}")
+    if N_THREADS > len(core_plan.inference):
+        print(f"WARNING: N_THREADS = {N_THREADS} > {len(core_plan.inference)} pinned CPUs")
+    core_plan.pin_housekeeping()
+
+# ==============================================================================
+# ── ENERGY METER ───────────────────────────────────────────────────────────────
+# ==============================================================================
+
+main_tracker = EmissionsTracker(
+    project_name="rpi5_Q4_K_M",
+    measure_power_secs=1,
+    save_to_file=False,
+    log_level="error",
+)
+main_tracker.start()
+energy = CodecarbonMeter(main_tracker)
+
+# Clock, temperature and firmware throttle flags from open sysfs files,
+# sampled on a background thread — greenaudit/telemetry.py
+telemetry = Telemetry(hz=TELEMETRY_HZ).start()
+print(f"Telemetry: {telemetry.describe()}")
+
+if core_plan:
+    core_plan.pin_inference()
+
+# ==============================================================================
+# ── THREAD AUTO-TUNE — short sweep on a calibration subset, cached per host ───
 # ==============================================================================
 
 assert os.path.exists(MODEL_PATH), f"Model not found: {MODEL_PATH}\nRun setup commands above."
 
+llama_threads = {"n_threads": N_THREADS, "n_threads_batch": None, "n_batch": 512}
+if AUTO_TUNE:
+    calibration = stratified_sample(corpus, per_category=1)["Prompt"].tolist()
+    tune_idle_w = (meter_idle_watts(energy, IDLE_SECONDS)
+                   if TUNE_OBJECTIVE == "j_per_token" else 0.0)
+    llama_threads = autotune(
+        lambda **s: load_backend("llama.cpp", model_path=MODEL_PATH, n_ctx=N_CTX,
+                                 max_new_tokens=TUNE_MAX_TOKENS, n_gpu_layers=0, **s),
+        calibration, model_key(MODEL_PATH), objective=TUNE_OBJECTIVE,
+        meter=energy, idle_watts=tune_idle_w,
+    )
+
+# ==============================================================================
+# ── MODEL LOAD ─────────────────────────────────────────────────────────────────
+# ==============================================================================
+
 print(f"\nLoading Q4_K_M model from {MODEL_PATH}...")
 print("(This may take 30–60 seconds on Pi 5)")
-llm = Llama(
+backend = load_backend(
+    "llama.cpp",
     model_path=MODEL_PATH,
-    n_threads=N_THREADS,
+    max_new_tokens=MAX_TOKENS,
     n_ctx=N_CTX,
     n_gpu_layers=0,
-    verbose=False,
+    **llama_threads,      # n_threads, n_threads_batch, n_batch
 )
-print("Model loaded.")
+print(f"Model loaded ({llama_threads['n_threads']} threads).")
+
+# ==============================================================================
+# ── WARM-UP — discarded prompts until tokens/s is steady ──────────────────────
+# ==============================================================================
+
+print(f"\nWarming up (up to {WARMUP_MAX} discarded prompts)...")
+warmup = warm_up(lambda p: backend.generate(p)["Output_Tokens"],
+                 max_prompts=WARMUP_MAX, max_cv=WARMUP_CV)
+record_warmup(OUTPUT_FILE, warmup, Precision="Q4_K_M", **llama_threads,
+              Pinned_CPUs=format_cpu_list(core_plan.inference) if core_plan else None)
 
 # ==============================================================================
 # ── IDLE BASELINE ──────────────────────────────────────────────────────────────
 # ==============================================================================
 
-print("\nMeasuring idle power baseline (10 seconds)...")
-idle_tracker = EmissionsTracker(measure_power_secs=2, save_to_file=False, log_level="error")
-idle_tracker.start()
-time.sleep(10)
-idle_tracker.stop()
+print(f"\nMeasuring idle power baseline ({IDLE_SECONDS} seconds)...")
 
-idle_energy = getattr(idle_tracker, "_total_energy", None)
-idle_watts = (idle_energy.kWh * 3.6e6) / 10.0 if idle_energy else 0.0
+# Idle windows are read through the main tracker, like the prompts, and
+# repeated every IDLE_EVERY prompts as the board heats up; rows are
+# corrected against the whole idle curve at the end
+idle = IdleBaseline(lambda s: meter_idle_watts(energy, s),
+                    path=idle_path(OUTPUT_FILE), seconds=IDLE_SECONDS, every=IDLE_EVERY,
+                    resume=RESUME)
+idle_watts = idle.calibrate()
 print(f"Idle power: {idle_watts:.2f} W")
 
 print("\nWARNING: Ensure active cooling is attached. Thermal throttling")
-print("         invalidates timing measurements. Throttle events are")
-print("         logged per-prompt via CPU frequency column.\n")
+print("         invalidates timing measurements. Throttled runs are")
+print("         re-queued; any kept are flagged in the Throttled column.\n")
+
+# Reads the newest telemetry sample; the lowest clock during a prompt decides Throttled
+pacer = ThermalPacer(
+    telemetry.latest,
+    pause_c=COOL_START_C if THERMAL_PACING else float("inf"),
+    resume_c=COOL_RESUME_C if THERMAL_PACING else float("inf"),
+    min_freq_mhz=THROTTLE_MHZ,
+    poll_s=1.0 / TELEMETRY_HZ,
+    max_requeue=MAX_REQUEUE if THERMAL_PACING else 0,
+    cpus=core_plan.housekeeping if core_plan else None,
+)
 
 # ==============================================================================
 # ── INFERENCE LOOP ─────────────────────────────────────────────────────────────
 # ==============================================================================
 
-results = []
-
-main_tracker = EmissionsTracker(
-    project_name="rpi5_Q4_K_M",
-    measure_power_secs=1,
-    save_to_file=False,
-    log_level="error",
-)
-main_tracker.start()
+journal = Journal(JOURNAL, resume=RESUME)
+if journal.done:
+    print(f"Resuming: {len(journal.done)} prompts already in {JOURNAL}")
 
 print(f"Running {N_PROMPTS} prompts — Q4_K_M | llama.cpp | Pi 5\n")
 print(f"{'ID':>4} {'Category':<16} {'Latency':>8} {'Net_J':>7} {'Tok/s':>6} {'Temp°C':>7} {'MHz':>6}")
 print("-" * 56)
 
-for idx, (prompt, category) in enumerate(zip(PROMPTS, CATEGORIES)):
-    task_id = idx + 1
-
-    cpu_freq_before = get_cpu_freq_mhz()
-    temp_before = get_cpu_temp()
-
-    main_tracker._measure_power_and_energy()
-    e_before = main_tracker._total_energy.kWh
-
-    t0 = time.time()
-    output = llm(
-        prompt,
-        max_tokens=MAX_TOKENS,
-        temperature=0.0,
-        echo=False,
-    )
-    latency = time.time() - t0
-
-    main_tracker._measure_power_and_energy()
-    e_after = main_tracker._total_energy.kWh
-
-    cpu_freq_after = get_cpu_freq_mhz()
-    temp_after = get_cpu_temp()
-
-    response_text  = output["choices"][0]["text"]
-    tokens_out     = output["usage"]["completion_tokens"]
-    tokens_per_sec = tokens_out / latency if latency > 0 else 0
+pending = [(idx + 1, prompt, category)
+           for idx, (prompt, category) in enumerate(zip(PROMPTS, CATEGORIES))
+           if idx + 1 not in journal.done]
 
-    gross_j = (e_after - e_before) * 3.6e6
-    net_j   = max(gross_j - idle_watts * latency, 0.01)
-    power_w = net_j / latency if latency > 0 else 0
+# Meter, generate, idle subtraction — greenaudit/backends.py
+def run_prompt(item):
+    return measure_prompt(backend, item[1], energy, idle, stream=STREAM_TIMING, decimals=3)
 
-    # Detect throttling: freq drop > 10% from max (2400 MHz on Pi 5)
-    throttled = (cpu_freq_after is not None and cpu_freq_after < 2100)
+n_run = 0
+for (task_id, prompt, category), m, watch, retries, cooldown_s in pacer.run(pending, run_prompt):
+    latency, net_j, tokens_per_sec = m["Latency_s"], m["Net_Energy_J"], m["Tokens_per_sec"]
+    soc = telemetry.window(m["T_Start"], m["T_Start"] + latency)
+    cpu_freq = soc["CPU_Freq_MHz_min"]
+    temp_max = soc["CPU_Temp_C_max"]
 
-    results.append({
+    journal.append({
         "ID":              task_id,
         "HW_Platform":     "Raspberry Pi 5 4GB (BCM2712 Cortex-A76)",
         "Backend":         "llama.cpp",
         "Precision":       "Q4_K_M",
         "Category":        category,
         "Prompt":          prompt,
-        "Response":        response_text,
-        "Output_Tokens":   tokens_out,
-        "Latency_s":       round(latency, 4),
-        "Tokens_per_sec":  round(tokens_per_sec, 3),
-        "Gross_Energy_J":  round(gross_j, 4),
-        "Net_Energy_J":    round(net_j, 4),
-        "Power_W":         round(power_w, 3),
-        "CPU_Freq_MHz":    cpu_freq_after,
-        "CPU_Temp_C":      temp_after,
-        "Throttled":       throttled,
+        **m,               # Response, Input/Output_Tokens, Latency_s, Tokens_per_sec,
+                           # TTFT_s / ITL_* (streaming), energy and idle columns
+        **soc,             # CPU_Freq_MHz_* / CPU_Temp_C_* min/mean/max, Throttle_Flags
+        "Throttled":       watch.throttled,
+        "Cooldown_s":      round(cooldown_s, 1),
+        "Retries":         retries,
         "Q_ped":           "",
         "LpW":             "",
     })
 
-    freq_str = f"{cpu_freq_after:.0f}" if cpu_freq_after else "N/A"
-    temp_str = f"{temp_after:.1f}" if temp_after else "N/A"
-    throttle_flag = " ⚠THROTTLE" if throttled else ""
+    freq_str = f"{cpu_freq:.0f}" if cpu_freq else "N/A"
+    temp_str = f"{temp_max:.1f}" if temp_max else "N/A"
+    throttle_flag = " ⚠THROTTLE" if watch.throttled else ""
     print(
         f"{task_id:>4} {category:<16} {latency:>7.1f}s {net_j:>7.1f}J "
         f"{tokens_per_sec:>5.2f} {temp_str:>7} {freq_str:>6}{throttle_flag}"
     )
 
-    if task_id % 20 == 0:
-        pd.DataFrame(results).to_csv(
-            os.path.join(OUTPUT_DIR, f"checkpoint_rpi5_{task_id}.csv"), index=False
-        )
-        print(f"  >>> Checkpoint saved at {task_id}")
+    n_run += 1
+    if idle.maybe_calibrate(n_run) is not None:
+        print(f"     idle recalibrated: {idle.watts_[-1]:.2f} W")
 
 main_tracker.stop()
+telemetry.stop()
 
 # ==============================================================================
 # ── SAVE & SUMMARY ─────────────────────────────────────────────────────────────
 # ==============================================================================
 
-df = pd.DataFrame(results)
+journal.close()
+df = idle.correct(compact(JOURNAL, OUTPUT_FILE), power_decimals=3)   # full idle curve
 df.to_csv(OUTPUT_FILE, index=False)
 
 throttled_count = df["Throttled"].sum() if "Throttled" in df else 0
+pacing = pacer.report()
 
 print("\n" + "=" * 60)
 print(f"  RESULTS — Q4_K_M | Raspberry Pi 5 | n={N_PROMPTS}")
@@ -359,13 +286,18 @@ print(f"  Avg Latency     : {df.Latency_s.mean():.1f}s")
 print(f"  Avg Net Energy  : {df.Net_Energy_J.mean():.1f} J")
 print(f"  Avg Power       : {df.Power_W.mean():.2f} W")
 print(f"  Avg Tokens/sec  : {df.Tokens_per_sec.mean():.2f}")
-print(f"  Throttled runs  : {throttled_count} / {N_PROMPTS}")
+print(f"  Throttled runs  : {throttled_count} / {N_PROMPTS} kept, {pacing['Requeued']} re-run")
+print(f"  Wall time       : {pacing['Wall_s'] / 60:.1f} min this session")
+print(f"  Thermal overhead: {pacing['Cooldown_s']:.0f}s cooling ({pacing['Cooldowns']} pauses) + "
+      f"{pacing['Discarded_s']:.0f}s discarded runs = {pacing['Overhead_Share']:.1%} of wall time")
+print(f"  Idle drift      : {df.Idle_Drift_W.min():+.2f} to {df.Idle_Drift_W.max():+.2f} W "
+      f"({len(idle)} idle readings, {idle.spent_s:.0f}s this session)")
 print(f"  Saved           : {OUTPUT_FILE}")
 print("=" * 60)
 
-if throttled_count > 10:
-    print("\n  ⚠ WARNING: High throttle count — consider excluding")
-    print("    throttled rows from analysis or re-run with active cooling.")
+if throttled_count > 0:
+    print(f"\n  ⚠ WARNING: {throttled_count} rows stayed throttled after {MAX_REQUEUE} re-runs —")
+    print("    exclude them from analysis or re-run with active cooling.")
 
 print("\nPer-category:")
 print(df.groupby("Category").agg(